@@ -225,6 +225,55 @@ def test_insert_multiple_rows():
         return 'Success.'
 
 
+def test_bulk_insert():
+    """
+    multi-insert 100k rows (1k on a micro controller) in one call into a
+    table with 1000 rows per page, and report the insert rate
+    check rows landed on the right pages and the caller's list is untouched
+    """
+    total = 1000 if uC else 100000
+    rows = [{"name": "bulk_{0}".format(i), "password": "p"}
+            for i in range(total)]
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("bulktable", ["name", "password"],
+                               rows_per_page=1000, max_rows=total)
+        db_table = db_object.open_table("bulktable")
+        gc.collect()
+        if uC:
+            start_time = time.ticks_ms()
+        else:
+            start_time = time.time()
+        db_table.insert(rows)
+        if uC:
+            end_time = time.ticks_diff(time.ticks_ms(), start_time)
+        else:
+            end_time = int((time.time() - start_time) * 1000)
+        print("Multi-inserting", total, "rows took", end_time, "ms to run",
+              "({0} rows/s).".format(total * 1000 // max(end_time, 1)))
+        if len(rows) != total or db_table.current_row != total:
+            return 'Error.'
+        if db_table.find_row(total // 2 + 1)["d"]["name"] != \
+                "bulk_{0}".format(total // 2):
+            return 'Error.'
+        # bulk insert on top of a partly filled page
+        db_table = db_object.open_table("bulktable")
+        db_table.truncate()
+        db_table.insert(rows[:5])
+        db_table.insert(rows[5:])
+        if db_table.find_row(6)["d"]["name"] != "bulk_5" or \
+                db_table.find_row(total)["d"]["name"] != \
+                "bulk_{0}".format(total - 1):
+            return 'Error.'
+    except Exception:
+        return 'Error.'
+    finally:
+        for file_name in mdb.os.listdir('testdb/bulktable'):
+            mdb.os.remove('testdb/bulktable/' + file_name)
+        mdb.os.rmdir('testdb/bulktable')
+    return 'Success.'
+
+
 def test_update_row_exception_row():
     try:
         db_object = mdb.Database.open("testdb")
@@ -369,6 +418,41 @@ def test_delete_exception():
         return 'Error.'
 
 
+def test_page_count_after_delete():
+    """
+    insert 7 rows in 5 row pages, delete rows 6 and 7 (leaving an empty
+    last page), insert one row and then two more
+    check Pages_Count matches the data page files, also after reopening
+    """
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("pagecount", {"ts": int, "name": str},
+                               rows_per_page=5)
+        db_table = db_object.open_table("pagecount")
+        db_table.insert([{"ts": i, "name": "row"} for i in range(7)])
+        if db_table.stats()['Pages_Count'] != 2:
+            return 'Error.'
+        db_table.delete_row(6)
+        db_table.delete_row(7)
+        db_table.insert({"ts": 7, "name": "row"})
+        db_table.insert([{"ts": i, "name": "row"} for i in range(8, 10)])
+        pages = [f for f in mdb.os.listdir('testdb/pagecount')
+                 if f[0:4] == 'data']
+        if len(pages) != 2 or db_table.stats()['Pages_Count'] != 2:
+            return 'Error.'
+        db_table.close()
+        db_table = db_object.open_table("pagecount")
+        if db_table.stats()['Pages_Count'] != 2:
+            return 'Error.'
+    except Exception:
+        return 'Error.'
+    finally:
+        for file_name in mdb.os.listdir('testdb/pagecount'):
+            mdb.os.remove('testdb/pagecount/' + file_name)
+        mdb.os.rmdir('testdb/pagecount')
+    return 'Success.'
+
+
 def test_find_row():
     try:
         db_object = mdb.Database.open("testdb")
@@ -500,6 +584,564 @@ def test_scan_with_query():
         return 'Error.'
 
 
+def test_first_row_since():
+    """
+    insert 25 rows with increasing "ts" in a catalogued table
+    check the catalog points at the right page before and after reopening
+    """
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("cattable", {"ts": int, "name": str},
+                               catalog_column="ts")
+        db_table = db_object.open_table("cattable")
+        for i in range(25):
+            db_table.insert({"ts": 1000 + i, "name": "row_{0}".format(i)})
+        if db_table.first_row_since(1012) != 11:
+            return 'Error.'
+        db_table = db_object.open_table("cattable")
+        if uC:
+            gc.collect()
+            before = gc.mem_free()
+            start_time = time.ticks_ms()
+        first_row = db_table.first_row_since(1023)
+        if uC:
+            gc.collect()
+            after = gc.mem_free()
+            end_time = time.ticks_diff(time.ticks_ms(), start_time)
+            print("Catalog lookup took", end_time, "ms to run.")
+            print("Catalog lookup took", before - after, "bytes.")
+        if first_row != 21 or db_table.first_row_since(2000) != 26 \
+                or db_table.first_row_since(0) != 1:
+            return 'Error.'
+    except Exception:
+        return 'Error.'
+    finally:
+        for file_name in mdb.os.listdir('testdb/cattable'):
+            mdb.os.remove('testdb/cattable/' + file_name)
+        mdb.os.rmdir('testdb/cattable')
+    return 'Success.'
+
+
+def test_typed_columns():
+    """
+    insert typed rows with nulls and an int in a float column
+    check the values read back with their types
+    """
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("typedtable", {"ts": float, "speed": float,
+                                              "oos": bool})
+        db_table = db_object.open_table("typedtable")
+        db_table.insert({"ts": 1000.5, "speed": 3, "oos": False})
+        db_table.insert({"ts": 1001.5, "speed": None, "oos": True})
+        db_table.insert([{"ts": 1002, "oos": False}])
+        first = db_table.find_row(1)['d']
+        second = db_table.find_row(2)['d']
+        third = db_table.find_row(3)['d']
+        if not isinstance(first['speed'], float) or first['speed'] != 3.0 \
+                or first['oos'] is not False:
+            return 'Error.'
+        if second['speed'] is not None or second['oos'] is not True:
+            return 'Error.'
+        if not isinstance(third['ts'], float) or third['speed'] is not None:
+            return 'Error.'
+        try:
+            db_table.insert({"ts": "1003", "speed": 1.0, "oos": False})
+            return 'Error.'
+        except Exception:
+            pass
+    except Exception:
+        return 'Error.'
+    finally:
+        for file_name in mdb.os.listdir('testdb/typedtable'):
+            mdb.os.remove('testdb/typedtable/' + file_name)
+        mdb.os.rmdir('testdb/typedtable')
+    return 'Success.'
+
+
+def test_ring_table():
+    """
+    insert 137 rows into a ring table of 5 pages of 10 rows
+    check only the newest pages are kept, row ids keep growing and readers
+    see the valid window, also after reopening
+    """
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("ringtable", {"ts": int, "name": str},
+                               rows_per_page=10, max_rows=50,
+                               catalog_column="ts", ring=True)
+        db_table = db_object.open_table("ringtable")
+        for i in range(1, 101):
+            db_table.insert({"ts": 1000 + i, "name": "row_{0}".format(i)})
+        if uC:
+            gc.collect()
+            before = gc.mem_free()
+            start_time = time.ticks_ms()
+        db_table.insert([{"ts": 1000 + i, "name": "row_{0}".format(i)}
+                         for i in range(101, 138)])
+        if uC:
+            gc.collect()
+            after = gc.mem_free()
+            end_time = time.ticks_diff(time.ticks_ms(), start_time)
+            print("Multi-inserting 37 rows into a ring took", end_time,
+                  "ms to run.")
+            print("Multi-inserting 37 rows into a ring took", before - after,
+                  "bytes.")
+        pages = [f for f in mdb.os.listdir('testdb/ringtable')
+                 if f[0:4] == 'data']
+        if len(pages) != 5 or db_table.first_row != 91 \
+                or db_table.current_row != 137:
+            return 'Error.'
+        rows = list(db_table.scan_reverse(show_row=True))
+        if len(rows) != 47 or rows[0]['_row'] != 137 or rows[-1]['_row'] != 91:
+            return 'Error.'
+        if db_table.first_row_since(0) != 91 or \
+                db_table.find_row(91)['d']['ts'] != 1091:
+            return 'Error.'
+        try:
+            db_table.find_row(90)
+            return 'Error.'
+        except Exception:
+            pass
+        db_table.close()
+        db_table = db_object.open_table("ringtable")
+        if db_table.first_row != 91 or db_table.current_row != 137:
+            return 'Error.'
+        db_table.insert({"ts": 1138, "name": "row_138"})
+        if db_table.stats()['Pages_Count'] != 5:
+            return 'Error.'
+    except Exception:
+        return 'Error.'
+    finally:
+        for file_name in mdb.os.listdir('testdb/ringtable'):
+            mdb.os.remove('testdb/ringtable/' + file_name)
+        mdb.os.rmdir('testdb/ringtable')
+    return 'Success.'
+
+
+def test_vacuum_step():
+    """
+    insert 40 rows in 10 row pages, delete rows 2, 3 and 15
+    vacuum one page per call, reopening the table halfway
+    check rows were renumbered and the table goes on after them
+    """
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("vacutable", {"ts": int, "name": str},
+                               catalog_column="ts")
+        db_table = db_object.open_table("vacutable")
+        db_table.insert([{"ts": 1000 + i, "name": "row_{0}".format(i + 1)}
+                         for i in range(40)])
+        db_table.first_row_since(0)
+        for row_id in (2, 3, 15):
+            db_table.delete_row(row_id)
+        calls = 1
+        if uC:
+            gc.collect()
+            before = gc.mem_free()
+            start_time = time.ticks_ms()
+        done = db_table.vacuum_step()
+        if uC:
+            gc.collect()
+            after = gc.mem_free()
+            end_time = time.ticks_diff(time.ticks_ms(), start_time)
+            print("Vacuuming one page took", end_time, "ms to run.")
+            print("Vacuuming one page took", before - after, "bytes.")
+        while not done:
+            if calls == 2:
+                db_table = db_object.open_table("vacutable")
+            done = db_table.vacuum_step()
+            calls += 1
+        if calls != 4 or db_table.current_row != 37:
+            return 'Error.'
+        if db_table.find_row(2)["d"]["name"] != "row_4" \
+                or db_table.find_row(37)["d"]["name"] != "row_40" \
+                or db_table.first_row_since(1039) != 31:
+            return 'Error.'
+        db_table.insert({"ts": 1040, "name": "row_41"})
+        if db_table.find_row(38)["d"]["name"] != "row_41" or \
+                [f for f in mdb.os.listdir('testdb/vacutable') if 'vac' in f]:
+            return 'Error.'
+    except Exception:
+        return 'Error.'
+    finally:
+        for file_name in mdb.os.listdir('testdb/vacutable'):
+            mdb.os.remove('testdb/vacutable/' + file_name)
+        mdb.os.rmdir('testdb/vacutable')
+    return 'Success.'
+
+
+def test_torn_tail():
+    """
+    insert 25 rows, append a torn row and reopen
+    check the torn line was cut and inserts go on
+    flip a byte in row 5 and check readers skip and count it
+    """
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("torntable", {"ts": int, "name": str})
+        db_table = db_object.open_table("torntable")
+        db_table.insert([{"ts": 1000 + i, "name": "row_{0}".format(i + 1)}
+                         for i in range(25)])
+        db_table.close()
+        with open('testdb/torntable/data21_30.dat', 'ab') as f:
+            f.write(b'{"r": 26, "d": {"ts": 10')
+        if uC:
+            gc.collect()
+            before = gc.mem_free()
+            start_time = time.ticks_ms()
+        db_table = db_object.open_table("torntable")
+        if uC:
+            gc.collect()
+            after = gc.mem_free()
+            end_time = time.ticks_diff(time.ticks_ms(), start_time)
+            print("Opening a table with a torn row took", end_time,
+                  "ms to run.")
+            print("Opening a table with a torn row took", before - after,
+                  "bytes.")
+        if db_table.current_row != 25 or \
+                db_table.stats()['Recovery']['torn_bytes'] != 24:
+            return 'Error.'
+        db_table.insert({"ts": 1025, "name": "row_26"})
+        if db_table.find_row(26)["d"]["name"] != "row_26":
+            return 'Error.'
+        with open('testdb/torntable/data1_10.dat', 'rb') as f:
+            page = f.read()
+        with open('testdb/torntable/data1_10.dat', 'wb') as f:
+            f.write(page.replace(b'"row_5"', b'"row_X"'))
+        rows = list(db_table.scan())
+        # Without binascii.crc32 rows aren't framed, the flip goes unseen.
+        if mdb.crc32 is not None and (
+                len(rows) != 25 or db_table.bad_rows != 1 or
+                len(db_table.query({"name": "row_X"})) != 0):
+            return 'Error.'
+    except Exception:
+        return 'Error.'
+    finally:
+        for file_name in mdb.os.listdir('testdb/torntable'):
+            mdb.os.remove('testdb/torntable/' + file_name)
+        mdb.os.rmdir('testdb/torntable')
+    return 'Success.'
+
+
+def test_drop_pages_before():
+    """
+    insert 35 rows with increasing "ts" in 10 row pages
+    drop the pages older than ts 1025, one page per call
+    check whole pages went, the tail page stays and readers start after
+    """
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("droptable", {"ts": int, "name": str},
+                               catalog_column="ts")
+        db_table = db_object.open_table("droptable")
+        db_table.insert([{"ts": 1000 + i, "name": "row_{0}".format(i + 1)}
+                         for i in range(35)])
+        freed = db_table.drop_pages_before(1025, max_pages=1)
+        if freed == 0 or db_table.first_row != 11:
+            return 'Error.'
+        if uC:
+            gc.collect()
+            before = gc.mem_free()
+            start_time = time.ticks_ms()
+        freed = db_table.drop_pages_before(1025)
+        if uC:
+            gc.collect()
+            after = gc.mem_free()
+            end_time = time.ticks_diff(time.ticks_ms(), start_time)
+            print("Dropping a page took", end_time, "ms to run.")
+            print("Dropping a page took", before - after, "bytes.")
+        if freed == 0 or db_table.first_row != 21 or \
+                db_table.drop_pages_before(1025) != 0:
+            return 'Error.'
+        db_table.drop_pages_before(5000)
+        db_table = db_object.open_table("droptable")
+        pages = [f for f in mdb.os.listdir('testdb/droptable')
+                 if f[0:4] == 'data']
+        rows = list(db_table.scan_reverse())
+        if pages != ['data31_40.dat'] or db_table.first_row != 31 or \
+                len(rows) != 5 or db_table.first_row_since(0) != 31:
+            return 'Error.'
+    except Exception:
+        return 'Error.'
+    finally:
+        for file_name in mdb.os.listdir('testdb/droptable'):
+            mdb.os.remove('testdb/droptable/' + file_name)
+        mdb.os.rmdir('testdb/droptable')
+    return 'Success.'
+
+
+def test_drop_pages_max_rows():
+    """
+    fill a 30 row table in 10 row pages, check it is full
+    drop its oldest page and check 10 more rows (single and multi-row
+    inserts) fit again, but not one more
+    """
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("fulltable", {"ts": int, "name": str},
+                               max_rows=30, catalog_column="ts")
+        db_table = db_object.open_table("fulltable")
+        db_table.insert([{"ts": i, "name": "row"} for i in range(30)])
+        try:
+            db_table.insert([{"ts": 30, "name": "row"}])
+            return 'Error.'
+        except Exception:
+            pass
+        db_table.drop_pages_before(10)
+        db_table = db_object.open_table("fulltable")
+        db_table.insert([{"ts": i, "name": "row"} for i in range(30, 39)])
+        if not db_table.insert({"ts": 39, "name": "row"}) or \
+                db_table.current_row != 40 or db_table.first_row != 11:
+            return 'Error.'
+        try:
+            db_table.insert([{"ts": 40, "name": "row"}])
+            return 'Error.'
+        except Exception:
+            pass
+        try:
+            db_table.insert({"ts": 40, "name": "row"})
+            return 'Error.'
+        except Exception:
+            pass
+        if db_table.current_row != 40:
+            return 'Error.'
+    except Exception:
+        return 'Error.'
+    finally:
+        for file_name in mdb.os.listdir('testdb/fulltable'):
+            mdb.os.remove('testdb/fulltable/' + file_name)
+        mdb.os.rmdir('testdb/fulltable')
+    return 'Success.'
+
+
+def test_secondary_index():
+    """
+    insert the same rows, a few of them with message "ina_missing", into a
+    table with a secondary index on "outofscale" and "message" and into one
+    without, and compare query()/find() timings and results
+    check the index follows updates, deletes, reopening and a rebuild
+    """
+    total = 1000 if uC else 20000
+    rows = [{"ts": i, "outofscale": i % 97 == 0,
+             "message": "ina_missing" if i % 1999 == 5 else None}
+            for i in range(total)]
+    columns = {"ts": int, "outofscale": bool, "message": str}
+
+    def timed_query(table, queries):
+        if uC:
+            start_time = time.ticks_ms()
+        else:
+            start_time = time.time()
+        result = table.query(queries, True)
+        if uC:
+            return result, time.ticks_diff(time.ticks_ms(), start_time)
+        return result, int((time.time() - start_time) * 1000)
+
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("indextable", columns, rows_per_page=100,
+                               max_rows=total,
+                               index_columns=["outofscale", "message"])
+        db_object.create_table("scantable", columns, rows_per_page=100,
+                               max_rows=total)
+        db_table = db_object.open_table("indextable")
+        scan_table = db_object.open_table("scantable")
+        db_table.insert(rows[:total // 2])
+        scan_table.insert(rows)
+        # first query indexes the pages written so far, inserts the rest
+        db_table.query({"message": "ina_missing"})
+        db_table.insert(rows[total // 2:])
+        scanned, scan_ms = timed_query(scan_table, {"message": "ina_missing"})
+        found, index_ms = timed_query(db_table, {"message": "ina_missing"})
+        pages = len(set([(row["_row"] - 1) // 100 for row in found]))
+        print("Query on an indexed column took", index_ms, "ms,",
+              scan_ms, "ms without the index (read", pages, "of",
+              total // 100, "pages).")
+        if found != scanned or len(found) != len(
+                [r for r in rows if r["message"] == "ina_missing"]):
+            return 'Error.'
+        if db_table.query({"outofscale": True}) != \
+                scan_table.query({"outofscale": True}) or \
+                db_table.find({"message": "ina_missing", "outofscale": False}) \
+                != scan_table.find({"message": "ina_missing",
+                                    "outofscale": False}):
+            return 'Error.'
+        # updates and deletes
+        row_id = found[0]["_row"]
+        db_table.update_row(row_id, {"message": "sd_error"})
+        db_table.delete_row(found[1]["_row"])
+        db_table = db_object.open_table("indextable")
+        if len(db_table.query({"message": "ina_missing"})) != \
+                len(found) - 2 or \
+                db_table.find({"message": "sd_error"})["ts"] != \
+                found[0]["ts"]:
+            return 'Error.'
+        db_table.rebuild_index(["message"])
+        if db_table.index_columns != ["message"] or \
+                len(db_table.query({"message": "ina_missing"})) != \
+                len(found) - 2 or \
+                db_object.open_table("indextable").index_columns != \
+                ["message"]:
+            return 'Error.'
+    except Exception:
+        return 'Error.'
+    finally:
+        for table in ("indextable", "scantable"):
+            for file_name in mdb.os.listdir('testdb/' + table):
+                mdb.os.remove('testdb/{}/{}'.format(table, file_name))
+            mdb.os.rmdir('testdb/' + table)
+    return 'Success.'
+
+
+def test_retyped_columns():
+    """
+    insert rows with string values, retype the columns to float/bool in
+    definition.json (like an old table being migrated), then insert typed
+    rows
+    check query()/find()/scan() match old and new pages alike, with typed
+    values and with the strings old rows were written with, and that
+    scan(), scan_reverse() and find_row() return typed values
+    """
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("retypetable", ["ts", "oos", "msg"])
+        db_table = db_object.open_table("retypetable")
+        db_table.insert([{"ts": str(i), "oos": str(i % 3 == 0), "msg": ""}
+                         for i in range(15)])
+        with open("testdb/retypetable/definition.json") as f:
+            definition = mdb.json.load(f)
+        definition["columns"]["ts"] = {"data_type": "float"}
+        definition["columns"]["oos"] = {"data_type": "bool"}
+        with open("testdb/retypetable/definition.json", "w") as f:
+            f.write(mdb.json.dumps(definition))
+        db_table = db_object.open_table("retypetable")
+        db_table.insert([{"ts": float(i), "oos": i % 3 == 0, "msg": None}
+                         for i in range(15, 30)])
+        found = db_table.query({"oos": True})
+        if len(found) != 10 or \
+                sorted([row["ts"] for row in found]) != \
+                [float(i) for i in range(0, 30, 3)]:
+            return 'Error.'
+        if db_table.query({"oos": "True"}) != found or \
+                db_table.find({"ts": 4.0})["oos"] is not False or \
+                db_table.find({"ts": "20"})["ts"] != 20.0 or \
+                len(list(db_table.scan({"oos": False}))) != 20:
+            return 'Error.'
+        # Readers without a query see typed values on old pages too.
+        plain = list(db_table.scan())
+        newest_first = list(db_table.scan_reverse())
+        if plain[3] != {"ts": 3.0, "oos": True, "msg": ""} or \
+                newest_first[-1]["ts"] != 0.0 or \
+                db_table.find_row(5)["d"]["oos"] is not False or \
+                [row for row in plain + newest_first
+                 if not isinstance(row["ts"], float) or
+                 not isinstance(row["oos"], bool)]:
+            return 'Error.'
+    except Exception:
+        return 'Error.'
+    finally:
+        for file_name in mdb.os.listdir('testdb/retypetable'):
+            mdb.os.remove('testdb/retypetable/' + file_name)
+        mdb.os.rmdir('testdb/retypetable')
+    return 'Success.'
+
+
+def test_index_retyped_columns():
+    """
+    index a table while "oos" is a str column, retype it to bool and insert
+    typed rows, so legacy and typed pages are mixed
+    check the stale index is rebuilt and indexed queries with True and
+    "True" find the rows of both, like a full scan
+    """
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("retypeindex", ["ts", "oos", "msg"],
+                               index_columns=["oos", "msg"])
+        db_table = db_object.open_table("retypeindex")
+        db_table.insert([{"ts": str(i), "oos": str(i % 3 == 0),
+                          "msg": "ina_missing" if i == 7 else ""}
+                         for i in range(25)])
+        if len(db_table.query({"oos": "True"})) != 9:
+            return 'Error.'
+        with open("testdb/retypeindex/definition.json") as f:
+            definition = mdb.json.load(f)
+        definition["columns"]["ts"] = {"data_type": "float"}
+        definition["columns"]["oos"] = {"data_type": "bool"}
+        with open("testdb/retypeindex/definition.json", "w") as f:
+            f.write(mdb.json.dumps(definition))
+        db_table = db_object.open_table("retypeindex")
+        db_table.insert([{"ts": float(i), "oos": i % 3 == 0,
+                          "msg": "ina_missing" if i == 33 else None}
+                         for i in range(25, 45)])
+        found = db_table.query({"oos": True})
+        if sorted([row["ts"] for row in found]) != \
+                [float(i) for i in range(0, 45, 3)]:
+            return 'Error.'
+        with open("testdb/retypeindex/index.jsonl") as f:
+            if '"\\"True\\""' in f.read():
+                return 'Error.'
+        if db_table.query({"oos": "True"}) != found or \
+                sorted([row["ts"] for row in
+                        db_table.query({"msg": "ina_missing"})]) != \
+                [7.0, 33.0]:
+            return 'Error.'
+        db_table.rebuild_index()
+        if db_table.query({"oos": True}) != found:
+            return 'Error.'
+    except Exception:
+        return 'Error.'
+    finally:
+        for file_name in mdb.os.listdir('testdb/retypeindex'):
+            mdb.os.remove('testdb/retypeindex/' + file_name)
+        mdb.os.rmdir('testdb/retypeindex')
+    return 'Success.'
+
+
+def test_repage():
+    """
+    insert 35 rows in 10 row pages, delete row 12
+    repage to 100 rows per page and check row ids were kept
+    """
+    try:
+        db_object = mdb.Database.open("testdb")
+        db_object.create_table("pagetable", ["name"])
+        db_table = db_object.open_table("pagetable")
+        db_table.insert([{"name": "row_{0}".format(i + 1)}
+                         for i in range(35)])
+        db_table.delete_row(12)
+        if uC:
+            gc.collect()
+            before = gc.mem_free()
+            start_time = time.ticks_ms()
+        db_table.repage(100)
+        if uC:
+            gc.collect()
+            after = gc.mem_free()
+            end_time = time.ticks_diff(time.ticks_ms(), start_time)
+            print("Repaging 35 rows took", end_time, "ms to run.")
+            print("Repaging 35 rows took", before - after, "bytes.")
+        db_table = db_object.open_table("pagetable")
+        pages = [f for f in mdb.os.listdir('testdb/pagetable')
+                 if f[0:4] == 'data']
+        if pages != ['data1_100.dat'] or db_table.rows_per_page != 100 \
+                or db_table.current_row != 35 \
+                or db_table.find_row(13)["d"]["name"] != "row_13":
+            return 'Error.'
+        try:
+            db_table.find_row(12)
+            return 'Error.'
+        except Exception:
+            pass
+    except Exception:
+        return 'Error.'
+    finally:
+        for file_name in mdb.os.listdir('testdb/pagetable'):
+            mdb.os.remove('testdb/pagetable/' + file_name)
+        mdb.os.rmdir('testdb/pagetable')
+    return 'Success.'
+
+
 # A test to be sure data row files were created correctly.
 def check_data_file_name():
     location = mdb.os.listdir('testdb/testtable')
@@ -656,6 +1298,7 @@ assert test_table_creation() == "Success.", "Error: Create table"
 assert test_table_open() == "Success.", "Error: Open table"
 assert test_insert_row() == "Success.", "Error: Insert row"
 assert test_insert_multiple_rows() == "Success.", "Error: Insert multiple rows"
+assert test_bulk_insert() == "Success.", "Error: Bulk insert"
 assert test_update_row_exception_row() == "Success.", \
     "Error: Update row that doesn't exist"
 assert test_update_row_exception_column() == "Success.", \
@@ -666,12 +1309,25 @@ assert test_update_exception() == "Success.", \
     "Error: Update with query that doesn't match"
 assert test_delete_row() == "Success.", "Error: Delete row"
 assert test_delete_row_exception() == "Success.", "Error: Delete row exception"
+assert test_page_count_after_delete() == "Success.", \
+    "Error: Page count after delete"
 assert test_find_row() == "Success.", "Error: Find row"
 assert test_find_row_exception() == "Success.", "Error: Find row exception"
 assert test_query() == "Success.", "Error: Query exception"
 assert test_find() == "Success.", "Error: Find exception"
 assert test_scan_no_query() == "Success.", "Error: Scan without query"
 assert test_scan_with_query() == "Success.", "Error: Scan with query"
+assert test_first_row_since() == "Success.", "Error: First row since"
+assert test_typed_columns() == "Success.", "Error: Typed columns"
+assert test_ring_table() == "Success.", "Error: Ring table"
+assert test_vacuum_step() == "Success.", "Error: Vacuum step"
+assert test_torn_tail() == "Success.", "Error: Torn tail"
+assert test_drop_pages_before() == "Success.", "Error: Drop pages before"
+assert test_drop_pages_max_rows() == "Success.", "Error: Drop pages max rows"
+assert test_secondary_index() == "Success.", "Error: Secondary index"
+assert test_retyped_columns() == "Success.", "Error: Retyped columns"
+assert test_index_retyped_columns() == "Success.", "Error: Index on retyped columns"
+assert test_repage() == "Success.", "Error: Repage"
 assert check_data_file_name() == "Success.", "Error: Data row files"
 assert test_truncate() == "Success.", "Error: Truncate"
 assert test_vacuum() == "Success.", "Error: Vacuum"
@@ -21,13 +21,65 @@ db_table.query({"name": "nate"})
 In case you need to get row_id with your data, pass second optional boolean parameter
 db_table.insert({"name": "nate", "password": "coolpassword"}, True)
 You'll get additional column '_row' with your data. Works with scan() find() and query()
+Newest rows first, stopping at the first row that matches a condition:
+db_table.scan_reverse(stop_predicate=lambda row: row['age'] < 18)
 Low-level operations using internal row_id:
 db_table.find_row(5)
 db_table.update_row(300, {'name': 'bob'})
 db_table.delete_row(445)
+Every closed data page gets a small binary offset index (ofsN_M.idx) next to
+it, so find_row() is a single seek and parse. Missing or stale index files
+are rebuilt lazily from the page itself.
+Tables created with a catalog column keep min/max of that column for every
+data page in catalog.jsonl, so range lookups can skip whole pages:
+db_object.create_table("log", {"ts": int, "msg": str}, catalog_column="ts")
+db_table.first_row_since(1700000000)
+Row count, page count and data size are kept in header.json, so opening a
+table doesn't list and sort every data page. Close tables to persist it:
+db_table.close()
+Rewrite a table into bigger (or smaller) data pages, keeping row ids:
+db_table.repage(1000)
+Compact a table in the background, one data page per call (or as many as
+fit in budget_ms), resuming where it stopped even after a reboot:
+while not db_table.vacuum_step(budget_ms=50):
+    do_other_work()
+Rows are stored with a CRC32 of their line ({"r": 5, "d": {...}, "c": crc}).
+Opening a table cuts a torn last line (power loss mid-write) off the tail
+page, reading only what was appended since header.json; lines that are
+torn or fail their CRC elsewhere are skipped by readers and counted in
+db_table.bad_rows. db_table.stats()['Recovery'] tells what opening cost.
+Ring tables keep at most max_rows // rows_per_page data pages: the oldest
+page is dropped when a new one starts, row ids keep growing and readers
+only see rows from db_table.first_row on:
+db_object.create_table("log", {"ts": int, "msg": str}, max_rows=86400, ring=True)
+Low-cardinality columns can get a secondary index (index.jsonl, row id runs
+per value per data page), so query()/find() on them skip the pages that
+don't hold the value:
+db_object.create_table("log", {"ts": int, "level": str}, index_columns=["level"])
+db_table.rebuild_index(["level"])
 """
 import json as json
 import os
+from array import array
+try:
+    from binascii import crc32
+except ImportError:
+    crc32 = None
+try:
+    from time import ticks_ms, ticks_diff
+except ImportError:
+    # CPython
+    from time import time as _time
+
+    def ticks_ms():
+        return int(_time() * 1000)
+
+    def ticks_diff(a, b):
+        return a - b
+
+
+# Marker for "no row at this position" in a page offset index.
+NO_ROW = 0xFFFFFFFF
 
 
 class OutOfMemoryError(Exception):
@@ -59,6 +111,91 @@ def dir_exists(path):
         return False
 
 
+def _row_line(row_id: int, data: dict) -> bytes:
+    """
+    A data page line: the row, framed with the CRC32 of the bytes before
+    the "c" field when the port has binascii.crc32.
+    """
+    body = '{{"r": {0}, "d": {1}'.format(row_id, json.dumps(data)).encode()
+    if crc32 is None:
+        return body + b'}\n'
+    return body + ', "c": {0}}}\n'.format(crc32(body) & 0xFFFFFFFF).encode()
+
+
+def _parse_row(line: bytes):
+    """
+    Parse a (non blank) data page line. None when it's torn, garbage or
+    fails its CRC. Lines written before CRCs were added aren't checked.
+    """
+    try:
+        row = json.loads(line)
+        row['r']
+        row['d']
+    except (ValueError, KeyError, TypeError):
+        return None
+    crc = row.get('c')
+    if crc is not None and crc32 is not None:
+        end = line.rfind(b', "c": ')
+        if end < 0 or crc32(line[:end]) & 0xFFFFFFFF != crc:
+            return None
+    return row
+
+
+def _coerce(data_type: str, value: str):
+    """
+    Typed value of a string stored before its column got a type (retyped
+    tables keep their old rows): "" is None for numbers, bools are true for
+    "1", "true", "t", "yes" and "y" in any case, unparsable numbers None.
+    """
+    if data_type == 'bool':
+        return value.strip().lower() in ('1', 'true', 't', 'yes', 'y')
+    if value == '':
+        return None
+    try:
+        return float(value) if data_type == 'float' else int(float(value))
+    except ValueError:
+        return None
+
+
+def _catalog_value(value):
+    """
+    Catalog values are whole numbers: ints, floats and numeric strings are
+    floored, anything else is not catalogued.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    try:
+        if isinstance(value, float):
+            return int(value // 1)
+        # Split instead of float() so epoch-sized values keep their
+        # precision on single precision float ports.
+        parts = str(value).strip().split('.', 1)
+        whole = int(parts[0]) if parts[0] not in ('', '-') else 0
+        if parts[0][0:1] == '-' and len(parts) > 1 and parts[1].strip('0'):
+            whole -= 1
+        return whole
+    except ValueError:
+        return None
+
+
+def _catalog_widen(entry, first_row: int, value):
+    """
+    Widen a catalog page entry [first_row, last_row, min, max] to include
+    value, creating the entry if needed.
+    """
+    if value is None:
+        return entry
+    if entry is None:
+        return [first_row, first_row, value, value]
+    if value < entry[2]:
+        entry[2] = value
+    if value > entry[3]:
+        entry[3] = value
+    return entry
+
+
 class Database:
     def __init__(self, database: str, rows_per_page: int, max_rows: int,
                  storage_format_version: int):
@@ -110,14 +247,19 @@ class Database:
 
     def create_table(self, table: str, columns: any,
                      rows_per_page: int = None,
-                     max_rows: int = None):
+                     max_rows: int = None,
+                     catalog_column: str = None,
+                     ring: bool = False,
+                     index_columns: list = None):
         # Convert all column names to lowercase
         # columns = [element.lower() for element in columns]  # logic moved to Table.create_table()
         if rows_per_page is None:
             rows_per_page = self.rows_per_page
         max_rows = max_rows if max_rows is not None else self.max_rows
         Table.create_table(self, table.lower(), columns, rows_per_page,
-                           max_rows=self.max_rows)
+                           max_rows=max_rows,
+                           catalog_column=catalog_column, ring=ring,
+                           index_columns=index_columns)
 
     def open_table(self, table_name: str):
         return Table.open_table(self, table_name)
@@ -140,24 +282,73 @@ class Database:
 class Table:
     def __init__(self, database: str, table: str,
                  columns: list, rows_per_page: int,
-                 max_rows: int):
+                 max_rows: int, catalog_column: str = None,
+                 ring: bool = False, index_columns: list = None):
         self.database = database
         self.name = table.lower()
         self.columns = columns
+        # (column, type) of the non str columns, whose rows written before
+        # a retype may hold strings (see __coerce_row()).
+        self._typed_columns = [(c, columns[c]['data_type']) for c in columns
+                               if columns[c].get('data_type') in
+                               ('int', 'float', 'bool')]
         self.rows_per_page = rows_per_page
         self.max_rows = max_rows
+        self.catalog_column = catalog_column.lower() if catalog_column \
+            else None
         self.path = '{}/{}'.format(database.path, table)
-        self.current_row = self.__calculate_current_row()
+        # Offset index cache: one slot for the page being appended to and one
+        # for the page last read, so inserts and lookups don't evict each other.
+        self._tail_page = None
+        self._tail_offsets = None
+        self._read_page = None
+        self._read_offsets = None
+        # Page catalog, loaded on first use (see __load_catalog()).
+        self._catalog_first_rows = None
+        self._catalog_max = None
+        self._catalog_tail = None
+        # Secondary index: first row of the page tracked in memory (None
+        # until index.jsonl is loaded, see __load_index()), its row runs
+        # per column and value, and the live/dead entries in index.jsonl.
+        self.index_columns = [c.lower() for c in index_columns] \
+            if index_columns else []
+        self._index_next = None
+        self._index_tail = None
+        self._index_live = 0
+        self._index_dead = 0
+        # Page count and data size, None until known (see __count_pages()).
+        self._pages = None
+        self._size = None
+        # Oldest row still stored; ring tables and drop_pages_before() drop
+        # rows from the front.
+        self.ring = bool(ring)
+        self.first_row = 1
+        # Torn or corrupt lines skipped by readers since the table was opened.
+        self.bad_rows = 0
+        # What opening the table took: bytes read, torn bytes cut, time.
+        self.recovery = {'read_bytes': 0, 'torn_bytes': 0, 'bad_rows': 0,
+                         'ms': 0}
+        start_time = ticks_ms()
+        self.current_row = self.__open_current_row()
+        self.recovery['ms'] = ticks_diff(ticks_ms(), start_time)
 
         # TODO: validate and self-heal to recover from data corruption
 
     @staticmethod
     def create_table(database, table: str, columns: any,
-                     rows_per_page: int = None, max_rows: int = None):
+                     rows_per_page: int = None, max_rows: int = None,
+                     catalog_column: str = None, ring: bool = False,
+                     index_columns: list = None):
         """
         Create a table in a database that already exists.
         Takes string input for table name and a comma seperated list
         for column names.
+        catalog_column names a numeric column (ints or numeric strings) to
+        keep per page min/max values for, used by first_row_since().
+        ring makes max_rows a capacity instead of a limit: the oldest data
+        page is dropped to make room for new rows.
+        index_columns names low-cardinality columns to keep a secondary
+        index for, used by query() and find().
         """
         # Inherit rows_per_page and max_rows from database metadata
         if rows_per_page is None:
@@ -179,6 +370,10 @@ class Table:
                 },
                 'columns': {}
             }
+            if catalog_column:
+                data['settings']['catalog_column'] = catalog_column.lower()
+            if ring:
+                data['settings']['ring'] = True
             
             # dictionary style columns declaration, all types default to str
             if(isinstance(columns, list)):
@@ -197,10 +392,18 @@ class Table:
                             columns[col].__name__, col))
             else:
                 raise Exception("Columns definition is incorrect")
+            if index_columns:
+                index_columns = [c.lower() for c in index_columns]
+                for col in index_columns:
+                    if col not in data['columns']:
+                        raise Exception("Column {} does not exist in {}".format(
+                            col, table))
+                data['settings']['index_columns'] = index_columns
             os.mkdir(table_folder)
             with open('{}/definition.json'.format(table_folder), 'w') as f:    
                 f.write(json.dumps(data))
-                return Table(database, table, columns, rows_per_page, max_rows)
+                return Table(database, table, data['columns'], rows_per_page,
+                             max_rows, catalog_column, ring, index_columns)
         else:
             raise Exception("Table {} already exists".format(table))
 
@@ -208,6 +411,10 @@ class Table:
     def open_table(database, table: str):
         path = '{}/{}'.format(database.path, table)
         if dir_exists(path):
+            # Finish (or roll back) an interrupted repage() first.
+            Table.__finish_repage(path)
+            Table.__finish_vacuum(path)
+            Table.__finish_cut(path)
             with open('{}/definition.json'.format(path)) as json_file:
                 definition = json.load(json_file)
             # Check to make sure there are not any temporary files left over
@@ -218,7 +425,10 @@ class Table:
                                     " in your table. Delete temp and vacu files manually")
             return Table(database, table, definition['columns'],
                          definition['settings']['rows_per_page'],
-                         definition['settings']['max_rows'])
+                         definition['settings']['max_rows'],
+                         definition['settings'].get('catalog_column'),
+                         definition['settings'].get('ring', False),
+                         definition['settings'].get('index_columns'))
         else:
             raise Exception("Table {} does not exist in {}".format(
                 table, database.path))
@@ -226,90 +436,96 @@ class Table:
     def stats(self) -> dict:
         with open("{}/definition.json".format(self.path)) as json_file:
             definition = json.load(json_file)
-            table_size = 0
-            for entry in os.ilistdir(self.path):
-                if not entry[0] == 'definition.json':
-                    table_size +=entry[3]
+        if self._pages is None or self._size is None:
+            self.__count_pages()
         return {
             'Settings': definition['settings'],
             'Columns': definition['columns'],
-            'Pages_Count': len(os.listdir(self.path)) - 1,
-            'Current_row': self.__calculate_current_row(),
-            'Data_Size' : table_size
+            'Pages_Count': self._pages,
+            'Current_row': self.current_row,
+            'First_row': self.first_row,
+            'Bad_rows': self.bad_rows,
+            'Recovery': self.recovery,
+            'Data_Size' : self._size
         }
 
+    def close(self) -> None:
+        """
+        Persist the table header, so the next open is cheap. Call it before
+        shutting down.
+        """
+        self.__write_header()
+
     def insert(self, data: any) -> bool:
         """
         Inserts new data in a table
         """
         # Check for multiple row insert and prepare for each
-        if isinstance(data, list) and isinstance(data[0], dict):
-            total = len(data) - 1
-            new_data = data
-
-            if isinstance(data[0], dict):
-                for x in range(len(new_data)):
-                    if self.__scrub_data(new_data[x]):
-                        pass
-                    else:
-                        raise Exception("Data element {} is not formatted correctly".format(x))
-
-            # while we still have data to insert
-            while total > 0:
-                current_line = self.__row_id_in_file(self.current_row)+1
-                # calculate how many lines we will insert on the first loop
-                insert_number = int(self.rows_per_page) - int(current_line)
-                if insert_number == 0:
-                    insert_number = int(self.rows_per_page)
-                # Check that we aren't at max rows:
-                if self.current_row + insert_number > self.max_rows:
-                    raise Exception("Table {} can not fit all those"
-                                    " rows".format(self.name))
-                # populate first_data based on how many total rows are being
-                # inserted and how much room is on data page
-                if insert_number < total:
-                    # grab how many we need to fill the current data page
-                    first_data = data[:insert_number]
-                    del data[:insert_number]
+        if isinstance(data, list) and data and isinstance(data[0], dict):
+            rows = []
+            for x in range(len(data)):
+                scrubbed = self.__scrub_data(data[x])
+                if scrubbed:
+                    rows.append(scrubbed)
                 else:
-                    first_data = data
-                # record how many rows we are inserting this time:
-                number_rows_to_insert = len(first_data)
-                # prepare data
-                first_data_string = ''
-                first_path = self.__data_file_for_row_id(
-                    int(self.current_row) + 1)
-                for x in range(len(first_data)):
-                    self.current_row += 1
-                    first_data_string = "{0}{{\"r\": {1}, \"d\": {2}}}\n" \
-                        .format(first_data_string,str(self.current_row),
-                            json.dumps(first_data[x]))
-                if not self.__multi_append_row(first_data_string, first_path):
+                    raise Exception("Data element {} is not formatted correctly".format(x))
+            # Check that we aren't at max rows (stored ones, pages dropped
+            # by drop_pages_before() make room again):
+            if not self.ring and self.current_row - self.first_row + 1 + \
+                    len(rows) > self.max_rows:
+                raise Exception("Table {} can not fit all those"
+                                " rows".format(self.name))
+            rows_per_page = int(self.rows_per_page)
+            done = 0
+            # while we still have data to insert
+            while done < len(rows):
+                first_row = self.current_row + 1
+                if self.ring and self.current_row % rows_per_page == 0:
+                    self.__ring_advance(first_row)
+                page = self.__data_file_for_row_id(first_row)
+                # fill up what is left of the data page the next row goes to
+                count = min(rows_per_page - self.current_row % rows_per_page,
+                            len(rows) - done)
+                lines = []
+                for x in range(count):
+                    lines.append(_row_line(first_row + x, rows[done + x]))
+                payload = b''.join(lines)
+                self.__count_new_page(page)
+                start = self.__tail_offsets(page)[-1]
+                if not self.__multi_append_row(payload, page):
                     raise Exception("There was a problem inserting "
                                     "multiple rows")
-                if not self.__is_multi_insert_success(first_data_string,
-                                                        first_path,
-                                                        number_rows_to_insert,
-                                                        current_line):
+                if not self.__is_multi_insert_success(payload, page, start):
+                    self.__forget_offsets(page)
                     raise Exception("There was a problem validating the "
                                     "write during multiple row insert")
-                total -= insert_number
+                for x in range(count):
+                    self.current_row += 1
+                    self.__index_appended_row(self.current_row, len(lines[x]))
+                    self.__catalog_add(self.current_row, rows[done + x])
+                    self.__index_add(self.current_row, rows[done + x])
+                done += count
             return True
         # If not multi-insert
         else:
             data = self.__scrub_data(data)
             if data:
+                if self.ring and \
+                        self.current_row % int(self.rows_per_page) == 0:
+                    self.__ring_advance(self.current_row + 1)
                 self.current_row += 1
                 row_id = self.current_row
                 path = self.__data_file_for_row_id(row_id)
-                # Check that we aren't at max rows:
-                if self.current_row < self.max_rows:
+                # Check that we aren't at max rows (stored ones):
+                if self.ring or \
+                        self.current_row - self.first_row + 1 <= self.max_rows:
                     if self.__insert_modify_data_file(path, data):
                         return True
                     else:
                         raise Exception("There was a problem inserting "
                                         "row at {}".format(row_id))
                 else:
+                    self.current_row -= 1
                     raise Exception("Table {} is full".format(self.name))
             else:
                 raise Exception("Data you tried to insert is invalid")
@@ -340,6 +556,13 @@ class Table:
         # match the column names in the table.
         data = self.__scrub_data(combined, False)
         path = self.__data_file_for_row_id(row_id)
+        if self.catalog_column is not None and \
+                self.catalog_column in [k.lower() for k in update_data]:
+            # Page bounds may change, rebuild the catalog when needed.
+            self.__remove_catalog()
+        if [k for k in update_data if k.lower() in self.index_columns]:
+            # Rebuilt from the data pages on the next indexed query.
+            self.__remove_index()
         if data:
             # Create a temp data file with the updated row data.
             if self.__modify_data_file(path, {row_id: data}, 'update'):
@@ -380,24 +603,36 @@ class Table:
         Nuke all data in the table.
         """
         for file_name in os.listdir(self.path):
-            if file_name[0:4] == 'data':
+            if file_name[0:4] == 'data' or file_name[-4:] == '.idx' or \
+                    (file_name[0:3] == 'vac' and file_name[-4:] in ('.new', 'json')):
                 os.remove('{}/{}'.format(self.path, file_name))
+        self.__forget_offsets()
+        self.__remove_catalog()
+        self.__remove_index()
         self.current_row = 0
+        self.first_row = 1
+        self._pages = 0
+        self._size = 0
+        self.__write_header()
 
     def find_row(self, row_id: int):
         """
         Find data based on row_id.
         """
-        # Calculate what line in the file the row_id will be found at
-        looking_for_line = self.__row_id_in_file(row_id)
-        # Prevous method of counting lines is not reliable
-        if looking_for_line is not None:
-            with open(self.__data_file_for_row_id(row_id), 'r') as f:
-                for current_line, line in enumerate(f):
-                    if current_line == looking_for_line:
-                        return json.loads(line)
-        else:
+        # Byte offset of the row comes from the page offset index, so this
+        # is one seek and one json.loads() regardless of the page size.
+        offset = self.__row_offset(row_id)
+        if offset is None:
             raise Exception("Could not find row_id {}".format(row_id))
+        with open(self.__data_file_for_row_id(row_id), 'rb') as f:
+            f.seek(offset)
+            row = _parse_row(f.readline())
+        if row is None:
+            self.bad_rows += 1
+            raise Exception("Row {} is corrupt".format(row_id))
+        row.pop('c', None)
+        self.__coerce_row(row['d'])
+        return row
 
     def query(self, queries: dict, show_row: bool = False):
         """
@@ -428,7 +663,7 @@ class Table:
         Iterate through the whole table and return data by line
         """
         if queries:
-            queries = self.__scrub_data(queries, False)
+            queries = self.__scrub_data(self.__coerce_query(queries), False)
         location = os.listdir(self.path)
         # Remove non-data files from our list of dirs.
         location = [element for element in location if 'data' in element]
@@ -437,10 +672,14 @@ class Table:
         location = sorted(location, key=lambda x:
                           int(x.split('.')[0].split('_')[1]))
         for f in location:
-            with open("{}/{}".format(self.path, f), 'r') as data:
+            with open("{}/{}".format(self.path, f), 'rb') as data:
                 for line in data:
-                    if line != "\n":    # empty lines fails to json.loads()
-                        current_data = json.loads(line)
+                    if len(line) > 1:    # empty lines fails to json.loads()
+                        current_data = _parse_row(line)
+                        if current_data is None:
+                            self.bad_rows += 1
+                            continue
+                        self.__coerce_row(current_data['d'])
                         # If we are not searching for anything
                         if not queries:
                             if show_row:
@@ -455,32 +694,257 @@ class Table:
                                 else:
                                     break
 
+    def first_row_since(self, value) -> int:
+        """
+        Binary search the page catalog for the first row that may hold a
+        catalog_column value >= value. All rows before it are smaller.
+        Returns current_row + 1 when no row can match.
+        """
+        if self.catalog_column is None:
+            raise Exception("Table {} has no catalog column".format(self.name))
+        self.__load_catalog()
+        value = _catalog_value(value)
+        first_rows = self._catalog_first_rows
+        running_max = self._catalog_max
+        # first page whose running maximum reaches the value
+        low = 0
+        high = len(first_rows)
+        while low < high:
+            middle = (low + high) // 2
+            if running_max[middle] < value:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(first_rows):
+            return max(first_rows[low], self.first_row)
+        tail = self._catalog_tail
+        if tail is not None and tail[3] >= value:
+            return max(tail[0], self.first_row)
+        return self.current_row + 1
+
+    def scan_reverse(self, start_row: int = None, stop_predicate=None,
+                     show_row: bool = False):
+        """
+        Iterate through the table newest row first (or from start_row
+        backwards) and return data by line. Every data page is opened once,
+        rows are read through the page offset index.
+        Iteration ends before the first row for which stop_predicate(data)
+        returns True.
+        """
+        row_id = self.current_row
+        if start_row is not None and int(start_row) < row_id:
+            row_id = int(start_row)
+        rows_per_page = int(self.rows_per_page)
+        while row_id >= self.first_row:
+            first_row = row_id - (row_id - 1) % rows_per_page
+            page = self.__data_file_for_row_id(row_id)
+            offsets = self.__page_offsets(page)
+            if offsets[-1]:
+                with open(page, 'rb') as data:
+                    for slot in range(row_id - first_row, -1, -1):
+                        if offsets[slot] == NO_ROW:
+                            continue
+                        data.seek(offsets[slot])
+                        current_data = _parse_row(data.readline())
+                        if current_data is None:
+                            self.bad_rows += 1
+                            continue
+                        self.__coerce_row(current_data['d'])
+                        if stop_predicate is not None and \
+                                stop_predicate(current_data['d']):
+                            return
+                        if show_row:
+                            current_data['d']['_row'] = current_data['r']
+                        yield current_data['d']
+            row_id = first_row - 1
+
+    def drop_pages_before(self, value, max_pages: int = None) -> int:
+        """
+        Remove the oldest data pages whose catalog_column values are all
+        smaller than value, at most max_pages per call. Whole pages go
+        (a stat and a remove each), the page rows are appended to stays.
+        first_row moves to the oldest row left; max_rows counts the rows
+        stored, so the freed rows can be inserted again.
+        Returns the number of bytes freed.
+        """
+        if self.catalog_column is None:
+            raise Exception("Table {} has no catalog column".format(self.name))
+        rows_per_page = int(self.rows_per_page)
+        first_row = self.first_row_since(value)
+        # Never the page rows are appended to.
+        if self.current_row:
+            first_row = min(first_row, self.current_row -
+                            (self.current_row - 1) % rows_per_page)
+        first_row -= (first_row - 1) % rows_per_page
+        if max_pages is not None:
+            first_row = min(first_row, self.first_row -
+                            (self.first_row - 1) % rows_per_page +
+                            int(max_pages) * rows_per_page)
+        if first_row <= self.first_row:
+            return 0
+        freed = self.__drop_pages(first_row)
+        # Reloaded (without the dropped pages) on next use.
+        self._catalog_first_rows = None
+        self._catalog_max = None
+        self._catalog_tail = None
+        self.__write_header()
+        return freed
+
+    def rebuild_index(self, columns: list = None) -> bool:
+        """
+        Rebuild the secondary index (index.jsonl) from the data pages, reading
+        each of them once. columns replaces the indexed columns (stored in the
+        table settings, [] drops the index).
+        """
+        if columns is not None:
+            columns = [c.lower() for c in columns]
+            for column in columns:
+                if column not in self.columns:
+                    raise Exception("Column {} does not exist in {}".format(
+                        column, self.name))
+            with open('{}/definition.json'.format(self.path)) as json_file:
+                definition = json.load(json_file)
+            if columns:
+                definition['settings']['index_columns'] = columns
+            else:
+                definition['settings'].pop('index_columns', None)
+            with open('{}/definition.json'.format(self.path), 'w') as f:
+                f.write(json.dumps(definition))
+            self.index_columns = columns
+        self.__remove_index()
+        if self.index_columns:
+            self.__load_index()
+        return True
+
     def vacuum(self) -> bool:
         """
         This will reorganize your data files- remove spaces after records has
         been deleted
         NOTE: this also change row ID of your data
+        Runs vacuum_step() passes to the end, including the tail page.
         """
+        if Table.__load_vacuum(self.path) is not None:
+            while not self.vacuum_step(budget_ms=1000):
+                pass
+        while not self.vacuum_step(budget_ms=1000, end_row=self.current_row):
+            pass
+        return True
+
+    def vacuum_step(self, budget_ms: int = 0, end_row: int = None) -> bool:
+        """
+        Incremental vacuum: renumber rows page by page to close the gaps
+        left by deleted rows, so they fill whole data pages again.
+        Every call handles at least one data page and goes on until
+        budget_ms is spent. A pass covers the pages up to end_row (default:
+        the last full page) when it starts; rows inserted meanwhile keep
+        their ids. Progress is kept in vacuum.json, so a pass resumes where
+        it stopped, also after a reboot. Every page is rebuilt next to the
+        old one (vacN_M.new) and swapped in through the journal, so
+        open_table() finishes an interrupted swap.
+        NOTE: this changes row ids of the compacted pages.
+        Returns True when the pass is done.
+        """
+        rows_per_page = int(self.rows_per_page)
+        state = Table.__load_vacuum(self.path)
+        if state is None:
+            if end_row is None:
+                end_row = self.current_row - self.current_row % rows_per_page
+            start = self.first_row - (self.first_row - 1) % rows_per_page
+            if end_row < start:
+                return True
+            state = {'end': int(end_row), 'next': start,
+                     'write': self.first_row, 'source': None, 'pages': []}
+        # A ring table may have dropped pages since the last call.
+        if state['write'] < self.first_row:
+            state['write'] = self.first_row
+            state['next'] = max(state['next'], self.first_row -
+                                (self.first_row - 1) % rows_per_page)
+        # Row ids of the compacted pages change.
+        self.__remove_index()
+        start_time = ticks_ms()
+        while state['next'] <= state['end']:
+            self.__vacuum_page(state)
+            if ticks_diff(ticks_ms(), start_time) >= budget_ms:
+                break
+        if state['next'] <= state['end']:
+            Table.__save_vacuum(self.path, state)
+            self.__write_header()
+            return False
+        if self.current_row == state['end']:
+            # Nothing was inserted since the pass started: carry on right
+            # after the last compacted row.
+            self.current_row = state['write'] - 1
+            self.__forget_offsets()
+            self.__remove_catalog()
+        self.__write_header()
+        for name in ('vacuum.json', 'vacuum.new'):
+            try:
+                os.remove('{}/{}'.format(self.path, name))
+            except OSError:
+                pass
+        return True
+
+    def repage(self, rows_per_page: int) -> bool:
+        """
+        Rewrite the table into data pages of rows_per_page rows, keeping
+        row ids. New pages are built next to the old ones (rpgN_M.new) and
+        swapped in through a repage.json journal, so an interrupted repage
+        is rolled back or finished by the next open_table().
+        """
+        rows_per_page = int(rows_per_page)
+        if rows_per_page == int(self.rows_per_page):
+            return False
+        if Table.__load_vacuum(self.path) is not None:
+            raise Exception("Finish vacuum_step() before repage()")
         location = os.listdir(self.path)
         # Remove non-data files from our list of dirs.
-        location = [element for element in location if 'data' in element]
+        location = [element for element in location
+                    if element[0:4] == 'data' and element[-4:] == '.dat']
         # Sort as integers so we get them in the right order.
         location = sorted(location,
-                          key=lambda x: int(x.split('.')[0].split('_')[1]),
-                          reverse=False)
-        for f in location:
-            os.rename('{}/{}'.format(self.path, f),
-                      '{}/{}.vacu'.format(self.path, f))
-        # Reset row id counter
-        self.current_row = 0
-        for f in location:
-            with open("{}/{}.vacu".format(self.path, f), 'r') as data:
-                for line in data:
-                    if line != '\n':
-                        current_data = json.loads(line)
-                        self.insert(current_data['d'])
-            # delete temporary files
-            os.remove('{}/{}.vacu'.format(self.path, f))
+                          key=lambda x: int(x.split('.')[0].split('_')[1]))
+        output = None
+        output_path = None
+        try:
+            for f in location:
+                with open('{}/{}'.format(self.path, f), 'rb') as data:
+                    for line in data:
+                        if len(line) <= 1:
+                            continue
+                        row = _parse_row(line)
+                        if row is None:
+                            self.bad_rows += 1
+                            continue
+                        row_id = int(row['r'])
+                        first_row = row_id - (row_id - 1) % rows_per_page
+                        path = '{}/rpg{}_{}.new'.format(
+                            self.path, first_row, first_row + rows_per_page - 1)
+                        if path != output_path:
+                            if output is not None:
+                                output.close()
+                            output = open(path, 'ab')
+                            output_path = path
+                        output.write(line if line[-1:] == b'\n'
+                                     else line + b'\n')
+        finally:
+            if output is not None:
+                output.close()
+        with open('{}/definition.json'.format(self.path)) as json_file:
+            definition = json.load(json_file)
+        definition['settings']['rows_per_page'] = rows_per_page
+        # Commit point: from here on the new pages win.
+        with open('{}/repage.json'.format(self.path), 'w') as f:
+            f.write(json.dumps(definition))
+        Table.__finish_repage(self.path)
+        self.rows_per_page = rows_per_page
+        self.__forget_offsets()
+        self._catalog_first_rows = None
+        self._catalog_max = None
+        self._catalog_tail = None
+        self.__remove_index()
+        self._pages = None
+        self._size = None
+        self.__write_header()
         return True
 
     def drop(self):
@@ -494,7 +958,7 @@ class Table:
         Helper function to process a query and return the result.
         """
         if queries:
-            queries = self.__scrub_data(queries, False)
+            queries = self.__scrub_data(self.__coerce_query(queries), False)
 
         for query in queries:
             if type(queries[query]) is not list:
@@ -502,6 +966,9 @@ class Table:
 
         # different handling logic must be performed if there are mutiple keys
         multiple_keys = True if len(list(queries.keys())) > 1 else False
+        # Pages the secondary index rules out are skipped, in the others
+        # only the rows it lists are read.
+        covered, candidates = self.__index_lookup(queries)
         result = []
         location = os.listdir(self.path)
         # Remove non-data files from our list of dirs.
@@ -512,12 +979,25 @@ class Table:
                           reverse=True)
         found = False
         for f in location:
-            with open("{}/{}".format(self.path, f), 'r') as data:
-                for line in data:
+            first_row = int(f.split('.')[0].split('_')[0][4:])
+            runs = None
+            if first_row in covered:
+                runs = candidates.get(first_row)
+                if runs is None:
+                    continue
+            page = "{}/{}".format(self.path, f)
+            with open(page, 'rb') as data:
+                lines = data if runs is None else \
+                    self.__index_lines(data, page, runs)
+                for line in lines:
                     # Make sure the line isn't blank (ex. if it was deleted).
-                    if line != '\n':
+                    if len(line) > 1:
                         found = False
-                        cur_data = json.loads(line)
+                        cur_data = _parse_row(line)
+                        if cur_data is None:
+                            self.bad_rows += 1
+                            continue
+                        self.__coerce_row(cur_data['d'])
                         for query in queries:
                             if query in cur_data['d'].keys() and \
                                     cur_data['d'][query] in queries[query]:
@@ -582,39 +1062,36 @@ class Table:
     #                 return True
     #     return False
 
-    def __is_multi_insert_success(self, data: dict, page: str,
-                                  rows_added: int, start_line: int) -> bool:
+    def __is_multi_insert_success(self, payload: bytes, page: str,
+                                  start: int) -> bool:
         """
-        Checks to make sure the previous insert was successful.
+        Checks to make sure the previous insert was successful: the page must
+        have grown by the payload size and the appended bytes must have the
+        payload CRC. Only the appended bytes are read back.
         """
-        line_counter = 1
-        # if we were at the end of a data page, then start at the first
-        # line of the file
-        if int(start_line) == int(self.rows_per_page):
-            start_line = 0
-        temp_data = ''
-        with open(page, 'r') as f:
-            for line in f:
-                # check if we are past the line we started the insert at in
-                # the data page
-                if line_counter > start_line:
-                    # If we are, then add the line to our temp_data so we
-                    # can compare it with the data insert
-                    temp_data = '{}{}'.format(temp_data, line)
-                line_counter += 1
-        if temp_data == data:
+        if os.stat(page)[6] != start + len(payload):
+            return False
+        if crc32 is None:
             return True
-        return False
+        crc = 0
+        with open(page, 'rb') as f:
+            f.seek(start)
+            left = len(payload)
+            while left > 0:
+                piece = f.read(min(left, 512))
+                if not piece:
+                    return False
+                crc = crc32(piece, crc)
+                left -= len(piece)
+        return crc == crc32(payload)
 
-    def __multi_append_row(self, data: dict, page: str) -> bool:
+    def __multi_append_row(self, payload: bytes, page: str) -> bool:
         """
         This function assumes the data has already been scrubbed!
         """
-        # Write the row to the data page file ('a' positions the stream at the
-        # end of the file).
-        # temp_current_row = self.current_row
-        with open(page, 'a+') as f:
-            f.write(data)
+        # One write call for the whole chunk of the data page.
+        with open(page, 'ab') as f:
+            f.write(payload)
         return True
 
     def __append_row(self, data: dict, page: str) -> bool:
@@ -622,10 +1099,15 @@ class Table:
         This function assumes the data has already been scrubbed!
         """
         # Write the row to the data page file ('a' positions the stream at the
-        # end of the file).
-        with open(page, 'a+') as f:
-            f.write(json.dumps({'r': self.current_row, 'd': data}))
-            f.write('\n')
+        # end of the file). Written as bytes so the offset index counts the
+        # same bytes that end up on disk on every platform.
+        line = _row_line(self.current_row, data)
+        self.__count_new_page(self.__data_file_for_row_id(self.current_row))
+        with open(page, 'ab') as f:
+            f.write(line)
+        self.__index_appended_row(self.current_row, len(line))
+        self.__catalog_add(self.current_row, data)
+        self.__index_add(self.current_row, data)
         return True
         # if self.__check_write_success_insert(new_data, page):
         #     return True
@@ -634,10 +1116,549 @@ class Table:
         #         self.current_row))
         #     return False
 
+    @staticmethod
+    def __finish_repage(path: str) -> None:
+        """
+        Complete a repage() whose journal (repage.json) was written, or
+        drop the half built pages of one that was interrupted before.
+        Safe to run again if it gets interrupted itself.
+        """
+        try:
+            with open('{}/repage.json'.format(path)) as json_file:
+                definition = json.load(json_file)
+        except (OSError, ValueError):
+            for file_name in os.listdir(path):
+                if file_name[0:3] == 'rpg' and file_name[-4:] == '.new':
+                    os.remove('{}/{}'.format(path, file_name))
+            return
+        rows_per_page = int(definition['settings']['rows_per_page'])
+        for file_name in os.listdir(path):
+            if file_name[0:4] == 'data' and file_name[-4:] == '.dat':
+                first_row, last_row = file_name[4:-4].split('_')
+                if int(last_row) - int(first_row) + 1 == rows_per_page:
+                    # Already swapped in by an interrupted run.
+                    continue
+            elif file_name[-4:] != '.idx' and file_name not in (
+                    'catalog.jsonl', 'index.jsonl', 'header.json',
+                    'header.new'):
+                continue
+            os.remove('{}/{}'.format(path, file_name))
+        for file_name in os.listdir(path):
+            if file_name[0:3] == 'rpg' and file_name[-4:] == '.new':
+                os.rename('{}/{}'.format(path, file_name),
+                          '{}/data{}.dat'.format(path, file_name[3:-4]))
+        with open('{}/definition.json'.format(path), 'w') as f:
+            f.write(json.dumps(definition))
+        os.remove('{}/repage.json'.format(path))
+
+    @staticmethod
+    def __load_vacuum(path: str):
+        """
+        State of the vacuum pass in progress (vacuum.json), None if none.
+        """
+        for name in ('vacuum.json', 'vacuum.new'):
+            try:
+                with open('{}/{}'.format(path, name), 'r') as f:
+                    return json.loads(f.read())
+            except (OSError, ValueError):
+                continue
+        return None
+
+    @staticmethod
+    def __save_vacuum(path: str, state: dict) -> None:
+        """
+        Atomically replace vacuum.json: write vacuum.new, then swap it in.
+        """
+        new_path = '{}/vacuum.new'.format(path)
+        with open(new_path, 'w') as f:
+            f.write(json.dumps(state))
+        try:
+            os.remove('{}/vacuum.json'.format(path))
+        except OSError:
+            pass
+        os.rename(new_path, '{}/vacuum.json'.format(path))
+
+    @staticmethod
+    def __swap_vacuum(path: str, state: dict) -> None:
+        """
+        Swap the pages of a journaled vacuum step in: drop the source page
+        and rename the rebuilt ones over their data pages. Safe to run
+        again if it gets interrupted itself.
+        """
+        pages = state['pages']
+        if state['source'] is not None and state['source'] not in pages:
+            try:
+                os.remove('{}/data{}.dat'.format(path, state['source']))
+            except OSError:
+                pass
+        for name in pages:
+            new_path = '{}/vac{}.new'.format(path, name)
+            if not file_exists(new_path):
+                continue
+            try:
+                os.remove('{}/data{}.dat'.format(path, name))
+            except OSError:
+                pass
+            os.rename(new_path, '{}/data{}.dat'.format(path, name))
+        for name in pages + [state['source']]:
+            if name is not None:
+                try:
+                    os.remove('{}/ofs{}.idx'.format(path, name))
+                except OSError:
+                    pass
+
+    @staticmethod
+    def __finish_vacuum(path: str) -> None:
+        """
+        Complete the page swap of a vacuum step that was interrupted, and
+        drop rebuilt pages that never made it into the journal. The pass
+        itself goes on with the next vacuum_step().
+        """
+        state = Table.__load_vacuum(path)
+        pages = state['pages'] if state is not None else []
+        for file_name in os.listdir(path):
+            if file_name[0:3] == 'vac' and file_name[-4:] == '.new' and \
+                    file_name[3:-4] not in pages:
+                os.remove('{}/{}'.format(path, file_name))
+        if not pages:
+            return
+        Table.__swap_vacuum(path, state)
+        # Catalog, index and header may describe the old pages.
+        for name in ('catalog.jsonl', 'index.jsonl', 'header.json',
+                     'header.new'):
+            try:
+                os.remove('{}/{}'.format(path, name))
+            except OSError:
+                pass
+        state['source'] = None
+        state['pages'] = []
+        Table.__save_vacuum(path, state)
+
+    def __vacuum_page(self, state: dict) -> None:
+        """
+        Compact the data page at the vacuum cursor (state['next']): its
+        rows get ids from state['write'] on. Pages that wouldn't change
+        are only read.
+        """
+        rows_per_page = int(self.rows_per_page)
+        source_row = state['next']
+        source = self.__data_file_for_row_id(source_row)
+        source_name = source.rsplit('/', 1)[-1][4:-4]
+        write = state['write']
+        # First pass: does the page already hold rows write, write + 1...
+        unchanged = True
+        count = 0
+        try:
+            with open(source, 'rb') as f:
+                for line in f:
+                    comma = line.find(b',')
+                    if line[:6] != b'{"r": ' or line[-2:] != b'}\n' or \
+                            comma < 0 or int(line[6:comma]) != write + count:
+                        unchanged = False
+                        break
+                    count += 1
+        except OSError:
+            unchanged = False
+        if unchanged:
+            state['next'] = source_row + rows_per_page
+            state['write'] = write + count
+            return
+        # Second pass: rebuild the destination pages as vacN_M.new.
+        pages = []
+        entries = {}
+        output = None
+        try:
+            with open(source, 'rb') as f:
+                for line in f:
+                    if len(line) <= 1:
+                        continue
+                    row = _parse_row(line)
+                    if row is None:
+                        self.bad_rows += 1
+                        continue
+                    data = row['d']
+                    page = self.__data_file_for_row_id(write)
+                    name = page.rsplit('/', 1)[-1][4:-4]
+                    if not pages or pages[-1] != name:
+                        if output is not None:
+                            output.close()
+                        output = open('{}/vac{}.new'.format(self.path, name),
+                                      'wb')
+                        pages.append(name)
+                        if name != source_name:
+                            # A page this pass already wrote rows to.
+                            self.__vacuum_copy(page, output, entries, name)
+                    output.write(_row_line(write, data))
+                    if self.catalog_column is not None:
+                        entries[name] = _catalog_widen(
+                            entries.get(name), write - (write - 1) % rows_per_page,
+                            _catalog_value(data.get(self.catalog_column)))
+                    write += 1
+        except OSError:
+            pass
+        finally:
+            if output is not None:
+                output.close()
+        names = pages + ([source_name] if source_name not in pages else [])
+        old_pages, old_size = self.__vacuum_sizes(names)
+        state['source'] = source_name
+        state['pages'] = pages
+        state['next'] = source_row + rows_per_page
+        state['write'] = write
+        # Commit point: from here on the rebuilt pages win.
+        Table.__save_vacuum(self.path, state)
+        Table.__swap_vacuum(self.path, state)
+        for name in names:
+            self.__forget_offsets('{}/data{}.dat'.format(self.path, name))
+        new_pages, new_size = self.__vacuum_sizes(names)
+        if self._pages is not None:
+            self._pages += new_pages - old_pages
+        if self._size is not None:
+            self._size += new_size - old_size
+        if self.catalog_column is not None:
+            self.__vacuum_catalog(names, entries)
+        state['source'] = None
+        state['pages'] = []
+        Table.__save_vacuum(self.path, state)
+
+    def __vacuum_copy(self, page: str, output, entries: dict, name: str) -> None:
+        """
+        Copy the rows of a destination page into its rebuilt file.
+        """
+        try:
+            with open(page, 'rb') as f:
+                for line in f:
+                    if len(line) <= 1:
+                        continue
+                    row = _parse_row(line)
+                    if row is None:
+                        self.bad_rows += 1
+                        continue
+                    output.write(line if line[-1:] == b'\n' else line + b'\n')
+                    if self.catalog_column is not None:
+                        entries[name] = _catalog_widen(
+                            entries.get(name), int(name.split('_')[0]),
+                            _catalog_value(row['d'].get(self.catalog_column)))
+        except OSError:
+            pass
+
+    def __vacuum_sizes(self, names: list):
+        """
+        Number and total size of the data pages that exist among names.
+        """
+        pages = 0
+        size = 0
+        for name in names:
+            try:
+                size += os.stat('{}/data{}.dat'.format(self.path, name))[6]
+                pages += 1
+            except OSError:
+                pass
+        return pages, size
+
+    def __vacuum_catalog(self, names: list, entries: dict) -> None:
+        """
+        Replace the catalog entries of the pages a vacuum step rewrote.
+        """
+        first_rows = [int(name.split('_')[0]) for name in names]
+        kept = []
+        covered = None
+        try:
+            with open('{}/catalog.jsonl'.format(self.path), 'r') as f:
+                for line in f:
+                    if len(line) > 1:
+                        entry = json.loads(line)
+                        covered = entry[0]
+                        if entry[0] not in first_rows:
+                            kept.append(entry)
+        except OSError:
+            # No catalog yet, it's built on first use.
+            return
+        except ValueError:
+            self.__remove_catalog()
+            return
+        rows_per_page = int(self.rows_per_page)
+        for name in entries:
+            entry = entries[name]
+            # Pages past the catalogued ones are catalogued on load.
+            if entry is not None and covered is not None and \
+                    entry[0] <= covered:
+                entry[1] = entry[0] + rows_per_page - 1
+                kept.append(entry)
+        kept.sort(key=lambda entry: entry[0])
+        self.__rewrite_catalog([json.dumps(entry) for entry in kept])
+        # Reloaded on next use.
+        self._catalog_first_rows = None
+        self._catalog_max = None
+        self._catalog_tail = None
+
+    def __open_current_row(self) -> int:
+        """
+        Current row from header.json, rolled forward over rows appended since
+        it was written. Only when it's missing or doesn't match the data
+        pages (crash, files changed behind our back) the slow scan is used.
+        """
+        header = None
+        for name in ('header.json', 'header.new'):
+            try:
+                with open('{}/{}'.format(self.path, name), 'r') as f:
+                    header = json.loads(f.read())
+                break
+            except (OSError, ValueError):
+                continue
+        if header is not None:
+            try:
+                self.first_row = int(header.get('first_row', 1))
+                return self.__roll_forward(header)
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+        self._pages = None
+        self._size = None
+        self.first_row = self.__calculate_first_row()
+        return self.__calculate_current_row()
+
+    def __roll_forward(self, header: dict) -> int:
+        """
+        Validate the header against the tail page and add whatever was
+        appended after it was written. Costs a stat of the tail page and
+        reading the bytes appended since (at most about a page, the header
+        is written whenever a page fills up), never a directory listing.
+        A torn last line is cut off the page.
+        """
+        rows_per_page = int(self.rows_per_page)
+        row = int(header['current_row'])
+        pages = header['pages']
+        size = header['size']
+        start = int(header['tail_size'])
+        while True:
+            new_page = row % rows_per_page == 0
+            if new_page:
+                # The next row starts a new page.
+                page = self.__data_file_for_row_id(row + 1)
+                start = 0
+                try:
+                    page_size = os.stat(page)[6]
+                except OSError:
+                    break
+                if pages is not None:
+                    pages += 1
+            else:
+                page = self.__data_file_for_row_id(row)
+                page_size = os.stat(page)[6]
+                if page_size < start:
+                    raise ValueError("Table header is ahead of data")
+            if page_size == start:
+                break
+            last_row, page_size = self.__recover_tail(page, start, page_size)
+            if page_size == 0 and new_page:
+                # Nothing but a torn line, the page is gone.
+                if pages is not None:
+                    pages -= 1
+            if size is not None:
+                size += page_size - start
+            if last_row is None or last_row == row:
+                break
+            row = last_row
+            start = page_size
+        self._pages = pages
+        self._size = size
+        return row
+
+    def __recover_tail(self, page: str, start: int, page_size: int):
+        """
+        Read the lines of a page from byte start on. Returns the last good
+        row id (None if there's none) and the page size, after cutting off
+        a torn last line.
+        """
+        last_row = None
+        torn = None
+        unterminated = False
+        position = start
+        with open(page, 'rb') as f:
+            f.seek(start)
+            for line in f:
+                end = position + len(line)
+                if len(line) > 1:
+                    row = _parse_row(line)
+                    if row is not None:
+                        last_row = int(row['r'])
+                        unterminated = line[-1:] != b'\n'
+                    elif end >= page_size:
+                        torn = position
+                    else:
+                        self.recovery['bad_rows'] += 1
+                position = end
+        self.recovery['read_bytes'] += position - start
+        if torn is not None:
+            self.recovery['torn_bytes'] += page_size - torn
+            self.__cut_page(page, torn)
+            page_size = torn
+        elif unterminated:
+            # Only the newline is missing, the next row would stick to it.
+            with open(page, 'ab') as f:
+                f.write(b'\n')
+            self.__remove_offsets(page)
+            page_size += 1
+        return last_row, page_size
+
+    def __cut_page(self, page: str, size: int) -> None:
+        """
+        Keep only the first size bytes of a data page. Without truncate()
+        (MicroPython) the kept part is copied to cutN_M.new and swapped in;
+        open_table() finishes an interrupted swap.
+        """
+        self.__remove_offsets(page)
+        if size == 0:
+            os.remove(page)
+            return
+        with open(page, 'r+b') as f:
+            if hasattr(f, 'truncate'):
+                f.truncate(size)
+                return
+        cut_path = '{}/cut{}.new'.format(self.path,
+                                         page.rsplit('/', 1)[-1][4:-4])
+        left = size
+        with open(page, 'rb') as in_file, open(cut_path, 'wb') as out_file:
+            while left > 0:
+                piece = in_file.read(min(left, 512))
+                if not piece:
+                    break
+                out_file.write(piece)
+                left -= len(piece)
+        os.remove(page)
+        os.rename(cut_path, page)
+
+    @staticmethod
+    def __finish_cut(path: str) -> None:
+        """
+        A cutN_M.new left by an interrupted __cut_page() is complete once
+        its page was removed; otherwise the page is still whole.
+        """
+        for file_name in os.listdir(path):
+            if file_name[0:3] == 'cut' and file_name[-4:] == '.new':
+                page = '{}/data{}.dat'.format(path, file_name[3:-4])
+                if file_exists(page):
+                    os.remove('{}/{}'.format(path, file_name))
+                else:
+                    os.rename('{}/{}'.format(path, file_name), page)
+
+    def __write_header(self) -> None:
+        """
+        Atomically replace header.json: write header.new, then swap it in.
+        """
+        if self._pages is None or self._size is None:
+            self.__count_pages()
+        tail_size = 0
+        if self.current_row:
+            page = self.__data_file_for_row_id(self.current_row)
+            if page == self._tail_page:
+                tail_size = self._tail_offsets[-1]
+            else:
+                try:
+                    tail_size = os.stat(page)[6]
+                except OSError:
+                    tail_size = 0
+        header = {
+            'current_row': self.current_row,
+            'first_row': self.first_row,
+            'pages': self._pages,
+            'size': self._size,
+            'tail_size': tail_size
+        }
+        path = '{}/header.json'.format(self.path)
+        new_path = '{}/header.new'.format(self.path)
+        try:
+            with open(new_path, 'w') as f:
+                f.write(json.dumps(header))
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            os.rename(new_path, path)
+        except OSError:
+            pass
+
+    def __count_pages(self) -> None:
+        """
+        Slow path: count data pages and their size from the directory.
+        """
+        pages = 0
+        size = 0
+        for file_name in os.listdir(self.path):
+            if file_name[0:4] == 'data' and file_name[-4:] == '.dat':
+                pages += 1
+                size += os.stat('{}/{}'.format(self.path, file_name))[6]
+        self._pages = pages
+        self._size = size
+
+    def __calculate_first_row(self) -> int:
+        """
+        Slow path: first row of the oldest data page left (ring tables and
+        drop_pages_before() remove pages from the front).
+        """
+        first_row = None
+        for file_name in os.listdir(self.path):
+            if file_name[0:4] == 'data' and file_name[-4:] == '.dat':
+                row = int(file_name[4:-4].split('_')[0])
+                if first_row is None or row < first_row:
+                    first_row = row
+        return first_row if first_row is not None else 1
+
+    def __ring_advance(self, row_id: int) -> None:
+        """
+        Ring tables: row_id is about to start a new data page, drop the
+        oldest pages so no more than max_rows // rows_per_page are kept.
+        Costs a stat and a remove per dropped page (normally one).
+        """
+        rows_per_page = int(self.rows_per_page)
+        slots = max(1, int(self.max_rows) // rows_per_page)
+        first_row = int(row_id) - (slots - 1) * rows_per_page
+        if first_row <= self.first_row:
+            return
+        self.__drop_pages(first_row)
+        if self._catalog_first_rows is not None and \
+                len(self._catalog_first_rows) >= 2 * slots:
+            # Dropped pages are compacted out of catalog.jsonl on next load.
+            self._catalog_first_rows = None
+            self._catalog_max = None
+            self._catalog_tail = None
+        self.__write_header()
+
+    def __drop_pages(self, first_row: int) -> int:
+        """
+        Remove the data pages (and offset indexes) before first_row, which
+        becomes the oldest row. Returns the number of bytes freed.
+        """
+        rows_per_page = int(self.rows_per_page)
+        freed = 0
+        page_row = self.first_row - (self.first_row - 1) % rows_per_page
+        while page_row < first_row:
+            page = self.__data_file_for_row_id(page_row)
+            try:
+                size = os.stat(page)[6]
+                os.remove(page)
+                freed += size
+                if self._pages is not None:
+                    self._pages -= 1
+                if self._size is not None:
+                    self._size -= size
+            except OSError:
+                pass
+            self.__remove_offsets(page)
+            page_row += rows_per_page
+            if self._index_next is not None:
+                self._index_live -= len(self.index_columns)
+                self._index_dead += len(self.index_columns)
+        self.first_row = first_row
+        if self._index_dead > max(self._index_live, 0):
+            self.__compact_index()
+        return freed
+
     def __calculate_current_row(self) -> int:
         """
         We don't want to write table metadata to disk every insert,
         so just find it when we open the table and keep it in memory.
+        Reads the newest non-empty data page, cutting off a torn last line.
         """
         # last_data_file = None
         location = os.listdir(self.path)
@@ -649,13 +1670,10 @@ class Table:
                           reverse=True)
         for f in location:
             if f[0:4] == 'data':
-                last_line = None
-                with open("{}/{}".format(self.path, f), 'r') as f:
-                    for line in f:
-                        if len(line) > 1:
-                            last_line = line
-                if last_line:
-                    return json.loads(last_line)['r']
+                page = "{}/{}".format(self.path, f)
+                last_row, _ = self.__recover_tail(page, 0, os.stat(page)[6])
+                if last_row is not None:
+                    return last_row
 
         return 0
 
@@ -710,13 +1728,18 @@ class Table:
         temp_path = "{}.temp".format(path)
         current_data = ''
         row_id = next(iter(update_data))
+        old_size = os.stat(path)[6]
         # Open the master data page file
-        with open(path, 'r') as input_file:
+        with open(path, 'rb') as input_file:
             # Create a temporary data page file
-            with open(temp_path, 'w') as output:
+            with open(temp_path, 'wb') as output:
                 for line_num, line in enumerate(input_file):
-                    if line != "\n":
-                        current_data = json.loads(line)
+                    if len(line) > 1:
+                        current_data = _parse_row(line)
+                        if current_data is None:
+                            # Torn or corrupt, leave it out.
+                            self.bad_rows += 1
+                            continue
                         # If this is our line
                         if current_data['r'] == row_id:
                             # Write the modified line to the file
@@ -727,8 +1750,8 @@ class Table:
                             else:
                                 if current_data['r'] == row_id:
                                     current_data['d'].update(update_data[row_id])
-                                    output.write(json.dumps(current_data))
-                                    output.write('\n')
+                                    output.write(_row_line(row_id,
+                                                           current_data['d']))
                                 else:
                                     raise Exception("Woah we thought {} was row_id"
                                                         " {} and almost stomped the "
@@ -740,6 +1763,10 @@ class Table:
         # imposible to check as we have ommited empty lines
         os.remove(path)
         os.rename(temp_path, path)
+        self.__remove_offsets(path)
+        if self._size is not None:
+            self._size += os.stat(path)[6] - old_size
+        self.__write_header()
         return True
 
 
@@ -760,20 +1787,519 @@ class Table:
         return '{}/data{}_{}.dat'.format(self.path, first_number,
                                          second_number)
 
-    def __row_id_in_file(self, row_id: int) -> int:
+    def __offsets_file_for_page(self, page: str) -> str:
         """
-        Calculates the line in a data page file that row will be found at.
+        Path of the offset index that belongs to a data page file
+        (data11_20.dat -> ofs11_20.idx).
         """
-        # if our table doesn't have any rows yet
-        if row_id == 0:
-            return 0
+        return '{}/ofs{}.idx'.format(self.path,
+                                     page.rsplit('/', 1)[-1][4:-4])
+
+    def __page_offsets(self, page: str):
+        """
+        Return the offset index of a data page: an array with the byte offset
+        of every row slot of the page (NO_ROW when the row is missing) and
+        the page size it describes in its last element.
+        """
+        if page == self._tail_page:
+            return self._tail_offsets
+        if page == self._read_page:
+            return self._read_offsets
+        offsets = self.__load_offsets(page)
+        if offsets is None:
+            offsets = self.__build_offsets(page)
+            # Only closed pages are persisted, the tail page still changes.
+            first_row = int(page.rsplit('/', 1)[-1][4:].split('_')[0])
+            if offsets[-1] and \
+                    first_row + int(self.rows_per_page) - 1 <= self.current_row:
+                self.__save_offsets(page, offsets)
+        self._read_page = page
+        self._read_offsets = offsets
+        return offsets
+
+    def __load_offsets(self, page: str):
+        """
+        Read a persisted offset index, None if it's missing or doesn't match
+        the current size of the page.
+        """
+        try:
+            with open(self.__offsets_file_for_page(page), 'rb') as f:
+                raw = f.read()
+            if len(raw) != 4 * (int(self.rows_per_page) + 1):
+                return None
+            offsets = array('I', raw)
+            if offsets[-1] != os.stat(page)[6]:
+                return None
+            return offsets
+        except OSError:
+            return None
+
+    def __build_offsets(self, page: str):
+        """
+        Rebuild the offset index of a page by reading it once.
+        """
+        offsets = array('I', [NO_ROW] * (int(self.rows_per_page) + 1))
+        first_row = int(page.rsplit('/', 1)[-1][4:].split('_')[0])
+        position = 0
+        try:
+            with open(page, 'rb') as f:
+                for line in f:
+                    if len(line) > 1:
+                        row = _parse_row(line)
+                        slot = int(row['r']) - first_row if row is not None \
+                            else -1
+                        if 0 <= slot < int(self.rows_per_page):
+                            offsets[slot] = position
+                    position += len(line)
+        except OSError:
+            pass
+        offsets[-1] = position
+        return offsets
+
+    def __save_offsets(self, page: str, offsets) -> None:
+        try:
+            with open(self.__offsets_file_for_page(page), 'wb') as f:
+                f.write(offsets)
+        except OSError:
+            pass
+
+    def __remove_offsets(self, page: str) -> None:
+        """
+        Drop the cached and persisted offset index of a rewritten page.
+        """
+        self.__forget_offsets(page)
+        try:
+            os.remove(self.__offsets_file_for_page(page))
+        except OSError:
+            pass
+
+    def __forget_offsets(self, page: str = None) -> None:
+        """
+        Drop cached offset indexes (of one page, or all of them).
+        """
+        if page is None or page == self._tail_page:
+            self._tail_page = None
+            self._tail_offsets = None
+        if page is None or page == self._read_page:
+            self._read_page = None
+            self._read_offsets = None
+
+    def __tail_offsets(self, page: str):
+        """
+        Offset index of the page rows are appended to. Must be fetched before
+        writing to the page, so a rebuild doesn't see the new rows.
+        """
+        if page != self._tail_page:
+            if page == self._read_page:
+                offsets = self._read_offsets
+                self._read_page = None
+                self._read_offsets = None
+            else:
+                # A brand new page (nothing to read) or the first insert
+                # after opening the table (one pass over the tail page).
+                offsets = self.__load_offsets(page)
+                if offsets is None:
+                    offsets = self.__build_offsets(page)
+            self._tail_page = page
+            self._tail_offsets = offsets
+        return self._tail_offsets
+
+    def __count_new_page(self, page: str) -> None:
+        """
+        Load the offset index of a data page rows are about to be appended
+        to, and count the page if its file doesn't exist yet. An empty page
+        can be an existing file (left by delete_row()), so only then it is
+        stat'ed.
+        """
+        if self.__tail_offsets(page)[-1] == 0 and self._pages is not None \
+                and not file_exists(page):
+            self._pages += 1
+
+    def __index_appended_row(self, row_id: int, length: int) -> None:
+        """
+        Record a row that was just appended to its data page.
+        """
+        page = self.__data_file_for_row_id(row_id)
+        offsets = self.__tail_offsets(page)
+        slot = (int(row_id) - 1) % int(self.rows_per_page)
+        if self._size is not None:
+            self._size += length
+        offsets[slot] = offsets[-1]
+        offsets[-1] += length
+        if slot == int(self.rows_per_page) - 1:
+            # Page is full, it won't change anymore.
+            self.__save_offsets(page, offsets)
+            self.__write_header()
+
+    def __row_offset(self, row_id: int):
+        """
+        Byte offset of a row in its data page, None if it doesn't exist.
+        """
+        if int(row_id) < self.first_row or int(row_id) < 1:
+            return None
+        offsets = self.__page_offsets(self.__data_file_for_row_id(row_id))
+        offset = offsets[(int(row_id) - 1) % int(self.rows_per_page)]
+        return None if offset == NO_ROW else offset
+
+    def __load_catalog(self) -> None:
+        """
+        Load catalog.jsonl into memory, cataloguing the pages that are
+        missing from it (legacy tables, or after a crash) and the tail page.
+        """
+        if self._catalog_first_rows is not None:
+            return
+        self._catalog_first_rows = array('I')
+        self._catalog_max = array('q')
+        self._catalog_tail = None
+        last_row = 0
+        # Entries of pages a ring table dropped are left out (and rewritten
+        # without them below).
+        kept = []
+        dropped = 0
+        try:
+            with open('{}/catalog.jsonl'.format(self.path), 'r') as f:
+                for line in f:
+                    if len(line) > 1:
+                        entry = json.loads(line)
+                        last_row = entry[1]
+                        if entry[1] < self.first_row:
+                            dropped += 1
+                            continue
+                        self.__catalog_remember(entry)
+                        kept.append(line)
+        except OSError:
+            pass
+        except ValueError:
+            # Torn line at the end, start over from the data pages.
+            self.__remove_catalog()
+            return self.__load_catalog()
+        if dropped:
+            self.__rewrite_catalog(kept)
+        del kept
+        rows_per_page = int(self.rows_per_page)
+        first_row = max(last_row + 1, self.first_row -
+                        (self.first_row - 1) % rows_per_page)
+        while first_row <= self.current_row:
+            entry = None
+            try:
+                with open(self.__data_file_for_row_id(first_row), 'rb') as f:
+                    for line in f:
+                        if len(line) > 1:
+                            row = _parse_row(line)
+                            if row is None:
+                                continue
+                            entry = _catalog_widen(
+                                entry, first_row, _catalog_value(
+                                    row['d'].get(self.catalog_column)))
+            except OSError:
+                pass
+            last_row = first_row + rows_per_page - 1
+            if last_row <= self.current_row:
+                if entry is not None:
+                    entry[1] = last_row
+                    self.__catalog_close_page(entry)
+            else:
+                if entry is not None:
+                    entry[1] = self.current_row
+                self._catalog_tail = entry
+            first_row = last_row + 1
+
+    def __rewrite_catalog(self, lines: list) -> None:
+        """
+        Atomically replace catalog.jsonl with the given lines.
+        """
+        path = '{}/catalog.jsonl'.format(self.path)
+        new_path = '{}/catalog.new'.format(self.path)
+        try:
+            with open(new_path, 'w') as f:
+                for line in lines:
+                    f.write(line if line[-1:] == '\n' else line + '\n')
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            os.rename(new_path, path)
+        except OSError:
+            pass
+
+    def __catalog_remember(self, entry: list) -> None:
+        """
+        Add a closed page entry to the in-memory catalog. Maximums are kept
+        as a running maximum so the catalog can be binary searched even when
+        the column isn't strictly increasing.
+        """
+        self._catalog_first_rows.append(entry[0])
+        if len(self._catalog_max) and self._catalog_max[-1] > entry[3]:
+            self._catalog_max.append(self._catalog_max[-1])
         else:
-            with open(self.__data_file_for_row_id(row_id), 'r') as f:
-                for line_num, line in enumerate(f):
-                    if line != "\n":
-                        if int(json.loads(line)['r']) == int(row_id):
-                            return line_num
-        return None
+            self._catalog_max.append(entry[3])
+
+    def __catalog_close_page(self, entry: list) -> None:
+        with open('{}/catalog.jsonl'.format(self.path), 'a') as f:
+            f.write('{}\n'.format(json.dumps(entry)))
+        self.__catalog_remember(entry)
+
+    def __catalog_add(self, row_id: int, data: dict) -> None:
+        """
+        Track a freshly inserted row in the tail page catalog entry, and
+        persist the entry once its page is full.
+        """
+        if self.catalog_column is None or self._catalog_first_rows is None:
+            # Not loaded yet, the tail page gets catalogued on load.
+            return
+        rows_per_page = int(self.rows_per_page)
+        first_row = int(row_id) - (int(row_id) - 1) % rows_per_page
+        entry = self._catalog_tail
+        if entry is not None and entry[0] != first_row:
+            # Previous page never got its last row, close it anyway.
+            entry[1] = entry[0] + rows_per_page - 1
+            self.__catalog_close_page(entry)
+            entry = None
+        entry = _catalog_widen(entry, first_row,
+                               _catalog_value(data.get(self.catalog_column)))
+        if entry is not None:
+            entry[1] = int(row_id)
+            if entry[1] == first_row + rows_per_page - 1:
+                self.__catalog_close_page(entry)
+                entry = None
+        self._catalog_tail = entry
+
+    def __remove_catalog(self) -> None:
+        self._catalog_first_rows = None
+        self._catalog_max = None
+        self._catalog_tail = None
+        try:
+            os.remove('{}/catalog.jsonl'.format(self.path))
+        except OSError:
+            pass
+
+    def __load_index(self) -> None:
+        """
+        Bring index.jsonl up to date with the full data pages (pages missing
+        from it after a crash, a rebuild or on legacy tables are read once)
+        and start tracking the tail page in memory; from then on insert()
+        keeps it up to date.
+        """
+        if self._index_next is not None:
+            return
+        rows_per_page = int(self.rows_per_page)
+        next_row = self.first_row - (self.first_row - 1) % rows_per_page
+        live = 0
+        dead = 0
+        typed = [column for column, _ in self._typed_columns]
+        stale = False
+        try:
+            with open('{}/index.jsonl'.format(self.path), 'r') as f:
+                for line in f:
+                    if len(line) > 1:
+                        entry = json.loads(line)
+                        if entry[2] in typed and \
+                                [k for k in entry[3] if k[:1] == '"']:
+                            # String keys of a column retyped since.
+                            stale = True
+                            break
+                        if entry[1] < self.first_row:
+                            dead += 1
+                            continue
+                        live += 1
+                        next_row = max(next_row, entry[0] + rows_per_page)
+        except OSError:
+            pass
+        except ValueError:
+            # Torn line at the end, start over from the data pages.
+            self.__remove_index()
+            return self.__load_index()
+        if stale or next_row - 1 > self.current_row:
+            # Describes rows that were cut off after a crash, or values
+            # as they were before a retype.
+            self.__remove_index()
+            return self.__load_index()
+        self._index_live = live
+        self._index_dead = dead
+        if dead > live:
+            self.__compact_index()
+        while next_row + rows_per_page - 1 <= self.current_row:
+            self.__index_close_page(next_row, self.__index_page(next_row))
+            next_row += rows_per_page
+        self._index_next = next_row
+        self._index_tail = self.__index_page(next_row)
+
+    def __index_page(self, first_row: int) -> dict:
+        """
+        Row runs per indexed column and value of one data page, read from
+        the page itself.
+        """
+        postings = {c: {} for c in self.index_columns}
+        if first_row > self.current_row:
+            return postings
+        try:
+            with open(self.__data_file_for_row_id(first_row), 'rb') as f:
+                for line in f:
+                    if len(line) > 1:
+                        row = _parse_row(line)
+                        if row is not None:
+                            # Keyed by typed values, also on retyped pages.
+                            self.__index_remember(postings, int(row['r']),
+                                                  self.__coerce_row(row['d']))
+        except OSError:
+            pass
+        return postings
+
+    def __index_remember(self, postings: dict, row_id: int,
+                         data: dict) -> None:
+        """
+        Add a row to the runs ([first row id, count]) of its values. Values
+        are keyed by their JSON text, so true, "true" and null differ.
+        """
+        for column in self.index_columns:
+            runs = postings[column].setdefault(json.dumps(data.get(column)),
+                                               [])
+            if runs and runs[-1][0] + runs[-1][1] == row_id:
+                runs[-1][1] += 1
+            else:
+                runs.append([row_id, 1])
+
+    def __index_close_page(self, first_row: int, postings: dict) -> None:
+        """
+        Append the entries of a full data page to index.jsonl, one line
+        [first_row, last_row, column, {value: runs}] per indexed column.
+        """
+        last_row = first_row + int(self.rows_per_page) - 1
+        with open('{}/index.jsonl'.format(self.path), 'a') as f:
+            for column in self.index_columns:
+                f.write('{}\n'.format(json.dumps(
+                    [first_row, last_row, column, postings[column]])))
+        self._index_live += len(self.index_columns)
+
+    def __index_add(self, row_id: int, data: dict) -> None:
+        """
+        Track a freshly inserted row in the tail page postings, and persist
+        them once its page is full.
+        """
+        if self._index_next is None:
+            # Not loaded yet, the pages get indexed on load.
+            return
+        rows_per_page = int(self.rows_per_page)
+        first_row = int(row_id) - (int(row_id) - 1) % rows_per_page
+        if first_row != self._index_next:
+            # Previous page never got its last row, close it anyway.
+            self.__index_close_page(self._index_next, self._index_tail)
+            self._index_next = first_row
+            self._index_tail = {c: {} for c in self.index_columns}
+        self.__index_remember(self._index_tail, int(row_id), data)
+        if int(row_id) == first_row + rows_per_page - 1:
+            self.__index_close_page(first_row, self._index_tail)
+            self._index_next = first_row + rows_per_page
+            self._index_tail = {c: {} for c in self.index_columns}
+
+    def __index_lookup(self, queries: dict):
+        """
+        Stream index.jsonl for the first queried column that is indexed.
+        Returns the first rows of the pages it covers and, per page, the
+        sorted row runs holding one of the queried values. Nothing is
+        covered if no queried column is indexed.
+        """
+        covered = set()
+        candidates = {}
+        column = None
+        for query in queries:
+            if query in self.index_columns:
+                column = query
+                break
+        if column is None:
+            return covered, candidates
+        self.__load_index()
+        keys = [json.dumps(value) for value in queries[column]]
+        try:
+            with open('{}/index.jsonl'.format(self.path), 'r') as f:
+                for line in f:
+                    if len(line) > 1:
+                        entry = json.loads(line)
+                        if entry[2] != column or entry[1] < self.first_row:
+                            continue
+                        covered.add(entry[0])
+                        for key in keys:
+                            runs = entry[3].get(key)
+                            if runs:
+                                candidates.setdefault(entry[0], []).extend(runs)
+        except (OSError, ValueError):
+            return set(), {}
+        for runs in candidates.values():
+            runs.sort()
+        return covered, candidates
+
+    def __index_lines(self, data, page: str, runs: list):
+        """
+        Lines of the rows in runs, from an open data page, seeking through
+        its offset index. Deleted rows are left out.
+        """
+        offsets = self.__page_offsets(page)
+        rows_per_page = int(self.rows_per_page)
+        for start, count in runs:
+            for row_id in range(start, start + count):
+                offset = offsets[(row_id - 1) % rows_per_page]
+                if offset != NO_ROW:
+                    data.seek(offset)
+                    yield data.readline()
+
+    def __compact_index(self) -> None:
+        """
+        Rewrite index.jsonl without the entries of dropped pages.
+        """
+        path = '{}/index.jsonl'.format(self.path)
+        new_path = '{}/index.new'.format(self.path)
+        try:
+            with open(path, 'r') as f:
+                with open(new_path, 'w') as output:
+                    for line in f:
+                        if len(line) > 1 and \
+                                json.loads(line)[1] >= self.first_row:
+                            output.write(line)
+            os.remove(path)
+            os.rename(new_path, path)
+            self._index_dead = 0
+        except (OSError, ValueError):
+            self.__remove_index()
+
+    def __remove_index(self) -> None:
+        self._index_next = None
+        self._index_tail = None
+        self._index_live = 0
+        self._index_dead = 0
+        for name in ('index.jsonl', 'index.new'):
+            try:
+                os.remove('{}/{}'.format(self.path, name))
+            except OSError:
+                pass
+
+    def __coerce_row(self, data: dict) -> dict:
+        """
+        Read shim for rows written before their columns were retyped from
+        str: string values of int/float/bool columns are converted in place
+        (see _coerce()). Every reader applies it, so old and new pages yield
+        the same types and match the same queries.
+        """
+        for column, data_type in self._typed_columns:
+            value = data.get(column)
+            if isinstance(value, str):
+                data[column] = _coerce(data_type, value)
+        return data
+
+    def __coerce_query(self, queries: dict) -> dict:
+        """
+        Queries with string values for int/float/bool columns (as stored
+        before a retype) converted like the rows they're matched against.
+        """
+        if not isinstance(queries, dict):
+            return queries
+        result = {}
+        for column, value in queries.items():
+            definition = self.columns.get(column.lower())
+            if isinstance(value, str) and definition is not None and \
+                    definition.get('data_type') in ('int', 'float', 'bool'):
+                value = _coerce(definition['data_type'], value)
+            result[column] = value
+        return result
 
     def __scrub_data(self, data: any, fill_missing: bool = True):
         """
@@ -782,6 +2308,7 @@ class Table:
         a) Validates column names actually exist in table
         b) Fills in null values for missing columns.
         c) Downcases column names.
+        d) Accepts None (null) in any column and int values in float columns.
         """
         all_columns = list(self.columns.keys())
         result = {}
@@ -798,8 +2325,10 @@ class Table:
             for column, value in data.items():
                 column = column.lower()
                 # column_definition = self.columns[column]
-                # validate type/length
-                if(self.columns[column]['data_type'] == "str" and isinstance(value, str)):
+                # validate type/length; None stores a null in any column
+                if value is None:
+                    pass
+                elif(self.columns[column]['data_type'] == "str" and isinstance(value, str)):
                     if(len(value)>self.columns[column]["max_length"]):
                         raise Exception("Max_length of {} exceeded for {} ".format(
                             self.columns[column]['max_length'], column))
@@ -807,6 +2336,9 @@ class Table:
                     pass
                 elif(self.columns[column]['data_type'] == "float" and isinstance(value, float)):
                     pass
+                elif(self.columns[column]['data_type'] == "float" and isinstance(value, int)
+                        and not isinstance(value, bool)):
+                    value = float(value)
                 elif(self.columns[column]['data_type'] == "bool" and isinstance(value, bool)):
                     pass
                 else:
@@ -0,0 +1,148 @@
+"""Anemometer acquisition on its own core (RP2040 `_thread`).
+
+`Acquisition` runs a `lib.wind_sampler.FastSampler` in a second thread,
+started with `_thread.start_new_thread`: the second core on the Pico, a
+plain thread on CPython (host tests). start() raises on ports without
+`_thread`, so the caller samples inline instead. Every one-second
+record goes through a `SampleRing`; storage, bot and web stay on the main
+thread and drain it with `get()`, so a slow Telegram/CSV/SD call no longer
+delays the reads.
+
+`SampleRing` is a single-producer/single-consumer queue over preallocated
+arrays: the producer only writes `head`, the consumer only writes `tail`,
+and `head` is published after the slot is written, so no lock is needed.
+When full, new records are dropped and counted in `overruns`.
+"""
+import time
+from array import array
+
+try:
+    import _thread
+except ImportError:
+    _thread = None
+
+_NAN = float('nan')
+
+
+def _nan(v):
+    return _NAN if v is None else v
+
+
+def _none(v):
+    return None if v != v else v
+
+
+class SampleRing:
+    """SPSC ring of per-second sampler records (capacity: power of two)."""
+
+    def __init__(self, capacity=64):
+        size = 1
+        while size < capacity:
+            size <<= 1
+        self.size = size
+        self.mask = size - 1
+        # Epoch seconds + milliseconds: float32 can't hold epoch time.
+        self.ts_s = array('I', [0] * size)
+        self.ts_ms = array('H', [0] * size)
+        self.mean = array('f', [0.0] * size)
+        self.min = array('f', [0.0] * size)
+        self.max = array('f', [0.0] * size)
+        self.std = array('f', [0.0] * size)
+        self.samples = array('H', [0] * size)
+        self.oos = array('B', [0] * size)
+        self.jitter_max_us = array('I', [0] * size)
+        self.jitter_mean_us = array('I', [0] * size)
+        # Free running counters; only the producer writes head, only the
+        # consumer writes tail.
+        self.head = 0
+        self.tail = 0
+        self.overruns = 0
+
+    def __len__(self):
+        return self.head - self.tail
+
+    def put(self, rec):
+        """Producer side. Returns False (record dropped) when full."""
+        if self.head - self.tail >= self.size:
+            self.overruns += 1
+            return False
+        i = self.head & self.mask
+        ts = rec['timestamp']
+        self.ts_s[i] = int(ts)
+        self.ts_ms[i] = int((ts - int(ts)) * 1000)
+        self.mean[i] = _nan(rec['mean'])
+        self.min[i] = _nan(rec['min'])
+        self.max[i] = _nan(rec['max'])
+        self.std[i] = _nan(rec['std'])
+        self.samples[i] = rec['samples']
+        self.oos[i] = 1 if rec['oos'] else 0
+        self.jitter_max_us[i] = rec['jitter_max_us']
+        self.jitter_mean_us[i] = rec['jitter_mean_us']
+        # Publish the slot last.
+        self.head += 1
+        return True
+
+    def get(self):
+        """Consumer side. Oldest record as a dict, None when empty."""
+        if self.tail == self.head:
+            return None
+        i = self.tail & self.mask
+        rec = {
+            'timestamp': self.ts_s[i] + self.ts_ms[i] / 1000,
+            'mean': _none(self.mean[i]),
+            'min': _none(self.min[i]),
+            'max': _none(self.max[i]),
+            'std': _none(self.std[i]),
+            'samples': self.samples[i],
+            'oos': bool(self.oos[i]),
+            'jitter_max_us': self.jitter_max_us[i],
+            'jitter_mean_us': self.jitter_mean_us[i],
+        }
+        self.tail += 1
+        return rec
+
+
+class Acquisition:
+    """Runs `sampler.sample_second()` in a background thread into a ring."""
+
+    def __init__(self, sampler, capacity=64):
+        self.sampler = sampler
+        self.ring = SampleRing(capacity)
+        self.running = False
+        self.stopped = True
+        self.errors = 0
+
+    @property
+    def max_gap_us(self):
+        """Longest time between two sensor reads since start."""
+        return self.sampler.max_gap_us
+
+    def start(self):
+        if self.running:
+            return
+        if _thread is None:
+            raise RuntimeError('_thread is not available')
+        self.running = True
+        self.stopped = False
+        _thread.start_new_thread(self._run, ())
+
+    def _run(self):
+        try:
+            while self.running:
+                try:
+                    self.ring.put(self.sampler.sample_second())
+                except Exception:
+                    self.errors += 1
+        finally:
+            self.stopped = True
+
+    def stop(self, timeout_s=3):
+        """Ask the thread to stop and wait (up to timeout_s) for it."""
+        self.running = False
+        deadline = time.time() + timeout_s
+        while not self.stopped and time.time() < deadline:
+            time.sleep(0.05)
+        return self.stopped
+
+    def get(self):
+        return self.ring.get()
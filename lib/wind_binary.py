@@ -0,0 +1,240 @@
+"""Fixed-width binary storage for wind readings.
+
+Every reading is one 11 byte record (struct `RECORD_FORMAT`):
+
+    uint32  epoch seconds
+    float32 wind speed (NaN when missing)
+    uint8   flags (FLAG_OUT_OF_SCALE)
+    uint16  message index (0 = no message)
+
+Messages are few and repetitive, so they are stored once in a side file
+(`<name>.msg`, one per line, index = line number + 1). A JSON line of the
+micro_py_database table takes about 110 bytes for the same reading.
+
+Readers fill a preallocated buffer with readinto() and decode with
+struct.unpack_from, yielding plain tuples; scan_reverse() checks its stop
+predicate against one reused dict and builds the record dicts used by
+lib.wind_db only for the rows it returns. A partially written record at the
+end of the file (power loss) is ignored.
+
+Records without a timestamp are not stored; epoch 0 rows (written for them
+by older versions) are skipped by scan_reverse(), so they can't end a time
+bounded scan early.
+"""
+import os
+import struct
+from lib import path as libpath
+
+RECORD_FORMAT = '<IfBH'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+FLAG_OUT_OF_SCALE = 0x01
+MAX_MESSAGES = 0xFFFF
+# Records decoded per readinto() call.
+BLOCK_RECORDS = 64
+
+_NAN = float('nan')
+
+
+def _epoch(value):
+    """Epoch seconds of a timestamp, None when it's missing."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    return int(float(value))
+
+
+def _speed(value):
+    if value is None or value == '':
+        return _NAN
+    try:
+        return float(value)
+    except Exception:
+        return _NAN
+
+
+def _flag(value):
+    if isinstance(value, bool):
+        return value
+    if value is None:
+        return False
+    return str(value).strip().lower() in ('1', 'true', 't', 'yes', 'y')
+
+
+class BinaryTable:
+    """Append-only table of fixed-width wind records."""
+
+    def __init__(self, path, name='readings'):
+        self.path = path
+        self.name = name
+        self.filepath = libpath.join(path, name + '.bin')
+        self.message_path = libpath.join(path, name + '.msg')
+        # Column definitions (lowercase names), as on a Table.
+        self.columns = {
+            'timestamp': {'data_type': 'int'},
+            'windspeed': {'data_type': 'float'},
+            'outofscale': {'data_type': 'bool'},
+            'message': {'data_type': 'str', 'max_length': 10000},
+        }
+        self._messages = None
+        self._message_ids = None
+        libpath.makedirs(path)
+
+    @property
+    def current_row(self):
+        """Number of complete records stored."""
+        try:
+            return os.stat(self.filepath)[6] // RECORD_SIZE
+        except OSError:
+            return 0
+
+    def __load_messages(self):
+        if self._messages is not None:
+            return
+        self._messages = []
+        self._message_ids = {}
+        try:
+            with open(self.message_path, 'r') as f:
+                for line in f:
+                    msg = line.rstrip('\n')
+                    self._messages.append(msg)
+                    self._message_ids[msg] = len(self._messages)
+        except OSError:
+            pass
+
+    def __message_id(self, message, new_messages):
+        if not message:
+            return 0
+        message = str(message).replace('\n', ' ')
+        idx = self._message_ids.get(message)
+        if idx is None:
+            if len(self._messages) >= MAX_MESSAGES:
+                return 0
+            self._messages.append(message)
+            idx = len(self._messages)
+            self._message_ids[message] = idx
+            new_messages.append(message)
+        return idx
+
+    def message(self, idx):
+        """Message text of a message index ('' for 0 or unknown)."""
+        self.__load_messages()
+        if 0 < idx <= len(self._messages):
+            return self._messages[idx - 1]
+        return ''
+
+    def insert(self, data):
+        """Append a record dict, or a list of them, with one write.
+
+        Records without a timestamp are skipped (readers bound their scans
+        by time). Returns False if nothing was left to write.
+        """
+        records = data if isinstance(data, list) else [data]
+        self.__load_messages()
+        new_messages = []
+        payload = bytearray(len(records) * RECORD_SIZE)
+        pos = 0
+        for rec in records:
+            epoch = _epoch(rec.get('timestamp'))
+            if epoch is None:
+                continue
+            flags = FLAG_OUT_OF_SCALE if _flag(rec.get('outofscale')) else 0
+            struct.pack_into(RECORD_FORMAT, payload, pos,
+                             epoch, _speed(rec.get('windspeed')),
+                             flags, self.__message_id(rec.get('message'), new_messages))
+            pos += RECORD_SIZE
+        if pos == 0:
+            return False
+        if pos < len(payload):
+            payload = payload[:pos]
+        if new_messages:
+            # Messages first, so no record points at a missing message.
+            with open(self.message_path, 'a') as f:
+                f.write(''.join(m + '\n' for m in new_messages))
+        size = self.current_row * RECORD_SIZE
+        try:
+            if os.stat(self.filepath)[6] != size:
+                # Drop a torn record left by an interrupted write.
+                self.__truncate_to(size)
+        except OSError:
+            pass
+        with open(self.filepath, 'ab') as f:
+            f.write(payload)
+        return True
+
+    def __truncate_to(self, size):
+        tmp = self.filepath + '.tmp'
+        with open(self.filepath, 'rb') as src, open(tmp, 'wb') as dst:
+            left = size
+            while left > 0:
+                chunk = src.read(min(left, 4096))
+                if not chunk:
+                    break
+                dst.write(chunk)
+                left -= len(chunk)
+        os.remove(self.filepath)
+        os.rename(tmp, self.filepath)
+
+    def iter_reverse(self, start_row=None):
+        """Yield (epoch, speed, flags, message_index) tuples newest first.
+
+        Rows are numbered from 1; start_row defaults to the newest row.
+        """
+        last = self.current_row
+        if start_row is not None and start_row < last:
+            last = start_row
+        if last <= 0:
+            return
+        # One buffer per scan, reused for every block.
+        buf = bytearray(BLOCK_RECORDS * RECORD_SIZE)
+        view = memoryview(buf)
+        with open(self.filepath, 'rb') as f:
+            end = last
+            while end > 0:
+                count = BLOCK_RECORDS if end >= BLOCK_RECORDS else end
+                f.seek((end - count) * RECORD_SIZE)
+                got = f.readinto(view[:count * RECORD_SIZE])
+                count = (got or 0) // RECORD_SIZE
+                if count <= 0:
+                    return
+                pos = (count - 1) * RECORD_SIZE
+                while pos >= 0:
+                    yield struct.unpack_from(RECORD_FORMAT, buf, pos)
+                    pos -= RECORD_SIZE
+                end -= count
+
+    def to_dict(self, rec, data=None):
+        """Record dict (lib.wind_db shape) of a decoded tuple; fills and
+        returns `data` when given instead of a new dict."""
+        if data is None:
+            data = {}
+        speed = rec[1]
+        data['timestamp'] = rec[0]
+        # float32 holds ~7 digits; drop the binary noise.
+        data['windspeed'] = None if speed != speed else round(speed, 4)
+        data['outofscale'] = bool(rec[2] & FLAG_OUT_OF_SCALE)
+        data['message'] = self.message(rec[3])
+        return data
+
+    def scan_reverse(self, start_row=None, stop_predicate=None, show_row=False):
+        """Yield record dicts newest first; stop before the first record
+        for which stop_predicate(record) is True. The predicate gets one
+        reused dict (don't keep it); only yielded rows get their own.
+        With show_row the row number is added as '_row', like on Table."""
+        row = self.current_row if start_row is None else min(start_row, self.current_row)
+        probe = {}
+        for rec in self.iter_reverse(start_row):
+            if rec[0] == 0:
+                # No timestamp (older versions stored those as epoch 0).
+                row -= 1
+                continue
+            if stop_predicate is not None and stop_predicate(self.to_dict(rec, probe)):
+                return
+            data = self.to_dict(rec)
+            if show_row:
+                data['_row'] = row
+            yield data
+            row -= 1
+
+    def close(self):
+        pass
@@ -1,13 +1,67 @@
 import os
 import json
+import time
 from lib import path as libpath
+from lib.wind_stats import WindStats
+from lib.wind_values import to_float, to_bool
+
+
+# Rows per data page for wind tables: at 1 Hz about 17 minutes per file
+# (the micro_py_database default of 10 rows makes a new file every 10 s).
+# Page offset indexes are 4 bytes per row, keep this RAM friendly.
+WIND_ROWS_PER_PAGE = 1000
+WIND_COLUMNS = {'timestamp': float, 'windSpeed': float, 'outOfScale': bool, 'message': str,
+                'windMin': float, 'windMax': float, 'windStd': float}
+# Column types of the readings table; older tables stored these as str.
+WIND_COLUMN_TYPES = {'timestamp': 'float', 'windspeed': 'float', 'outofscale': 'bool'}
+# Low-cardinality columns of the readings table with a secondary index, so
+# fault queries (out of scale, ina_missing, ...) skip the pages without them.
+WIND_INDEX_COLUMNS = ['outofscale', 'message']
+# Row limit of one day partition (86400 readings at 1 Hz, with headroom).
+WIND_PARTITION_MAX_ROWS = 100000
+# Capacity of the readings ring table: a week at 1 Hz, then the oldest
+# page is overwritten (micro_py_database ring mode).
+WIND_RING_MAX_ROWS = 7 * 86400
+# Row limit of tables stored next to the readings (rollups, metrics).
+WIND_SIDE_TABLE_MAX_ROWS = 1000000
+# Chunk size of the FileTable backwards reader (about 4 JSON lines).
+FILE_TABLE_BLOCK = 512
+# FileTable segment size (~2.5 h at 1 Hz); segments also roll over daily.
+FILE_TABLE_SEGMENT_BYTES = 1024 * 1024
 
 
 class FileTable:
-    """Fallback table that appends JSON lines to a file."""
+    """Fallback table that appends JSON lines to a file.
+
+    `filepath` is the active segment. Once it reaches `segment_bytes`, or
+    (with `segment_by_day`) a record belongs to another local day than the
+    segment's first one, it's renamed to `<stem>.<n>.jsonl` and listed in
+    `<stem>.manifest.json` with its first/last timestamp and size. Readers
+    walk the active segment and then older ones newest first, so a time
+    window query stops without opening older segments; old segments can be
+    pruned or moved (e.g. to SD) without touching the active one.
+
+    By default every insert opens and closes the file. With `sync_interval_s`
+    the active segment is kept open: writes are flushed (and the filesystem
+    synced) at most every `sync_interval_s` seconds, before reads and on
+    close(), which saves a flash metadata commit per reading.
+    """
 
-    def __init__(self, filepath):
+    def __init__(self, filepath, segment_bytes=None, segment_by_day=True, sync_interval_s=None):
         self.filepath = filepath
+        self.segment_bytes = FILE_TABLE_SEGMENT_BYTES if segment_bytes is None else int(segment_bytes)
+        self.segment_by_day = segment_by_day
+        stem = filepath[:-6] if filepath.endswith('.jsonl') else filepath
+        self.stem = stem
+        self.manifest_path = stem + '.manifest.json'
+        # Active segment state, loaded on first insert.
+        self._size = None
+        self._first_ts = None
+        self._last_ts = None
+        self._manifest = None
+        self.sync_interval_s = sync_interval_s
+        self._file = None
+        self._synced_at = 0
         # ensure directory exists
         parent = libpath.dirname(filepath)
         if parent and not libpath.exists(parent):
@@ -17,13 +71,342 @@ class FileTable:
                 pass
 
     def insert(self, record):
+        """Append one record, or a list of records with a single open()
+        per segment."""
+        records = record if isinstance(record, list) else [record]
         try:
-            with open(self.filepath, 'a') as f:
-                f.write(json.dumps(record) + '\n')
+            self.__load_state()
+            lines = []
+            for r in records:
+                ts = _parse_epoch_seconds(r.get('timestamp')) if isinstance(r, dict) else None
+                if self.__needs_rollover(ts):
+                    self.__write(lines)
+                    lines = []
+                    self.rollover()
+                line = json.dumps(r) + '\n'
+                lines.append(line)
+                self._size += len(line)
+                if ts is not None:
+                    if self._first_ts is None:
+                        self._first_ts = ts
+                    self._last_ts = ts
+            self.__write(lines)
             return True
         except Exception as e:
             print('FileTable insert error:', e)
+            # Sizes/timestamps may be off now: reload them next time.
+            self._size = None
+            try:
+                self.close()
+            except Exception:
+                self._file = None
+            return False
+
+    def __write(self, lines):
+        if not lines:
+            return
+        if self.sync_interval_s is None:
+            with open(self.filepath, 'a') as f:
+                f.write(''.join(lines))
+            return
+        if self._file is None:
+            self._file = open(self.filepath, 'a')
+            self._synced_at = time.time()
+        self._file.write(''.join(lines))
+        if time.time() - self._synced_at >= self.sync_interval_s:
+            self.sync()
+
+    def sync(self):
+        """Flush the open active segment to storage."""
+        if self._file is None:
+            return
+        self._file.flush()
+        if hasattr(os, 'sync'):
+            os.sync()
+        self._synced_at = time.time()
+
+    def close(self):
+        """Flush and close the active segment (persistent handle mode)."""
+        if self._file is None:
+            return
+        try:
+            self.sync()
+        finally:
+            self._file.close()
+            self._file = None
+
+    def __needs_rollover(self, ts):
+        if not self._size:
             return False
+        if self._size >= self.segment_bytes:
+            return True
+        if self.segment_by_day and ts is not None and self._first_ts is not None:
+            return time.localtime(int(ts))[:3] != time.localtime(int(self._first_ts))[:3]
+        return False
+
+    def __load_state(self):
+        if self._size is not None:
+            return
+        self.__load_manifest()
+        try:
+            size = os.stat(self.filepath)[6]
+        except OSError:
+            size = 0
+        first_ts = None
+        last_ts = None
+        if size:
+            with open(self.filepath, 'r') as f:
+                rec = self.__decode(f.readline())
+            if rec is not None:
+                first_ts = _parse_epoch_seconds(rec.get('timestamp'))
+            for rec in self.__scan_file(self.filepath, None):
+                last_ts = _parse_epoch_seconds(rec.get('timestamp'))
+                break
+        self._size = size
+        self._first_ts = first_ts
+        self._last_ts = last_ts
+
+    def __load_manifest(self):
+        if self._manifest is not None:
+            return
+        try:
+            with open(self.manifest_path, 'r') as f:
+                self._manifest = json.loads(f.read())
+        except Exception:
+            self._manifest = {'next': 1, 'segments': []}
+
+    def __save_manifest(self):
+        # Replace atomically: a crash leaves either the old or the new one.
+        tmp = self.manifest_path + '.new'
+        with open(tmp, 'w') as f:
+            f.write(json.dumps(self._manifest))
+        try:
+            os.remove(self.manifest_path)
+        except OSError:
+            pass
+        os.rename(tmp, self.manifest_path)
+
+    def segments(self):
+        """Closed segments, oldest first: [path, first_ts, last_ts, size]."""
+        self.__load_manifest()
+        return list(self._manifest['segments'])
+
+    def rollover(self):
+        """Close the active segment (if it has data) and start a new one."""
+        self.__load_state()
+        if not self._size:
+            return False
+        self.close()
+        n = self._manifest['next']
+        path = '{}.{}.jsonl'.format(self.stem, n)
+        os.rename(self.filepath, path)
+        self._manifest['next'] = n + 1
+        self._manifest['segments'].append([path, self._first_ts, self._last_ts, self._size])
+        self.__save_manifest()
+        self._size = 0
+        self._first_ts = None
+        self._last_ts = None
+        return True
+
+    def prune_segments_before(self, since_epoch):
+        """Remove closed segments whose newest record is older than
+        since_epoch. Returns the number of bytes freed."""
+        self.__load_manifest()
+        freed = 0
+        keep = []
+        for seg in self._manifest['segments']:
+            if seg[2] is not None and seg[2] < since_epoch:
+                try:
+                    os.remove(seg[0])
+                except OSError:
+                    pass
+                freed += seg[3]
+            else:
+                keep.append(seg)
+        if freed or len(keep) != len(self._manifest['segments']):
+            self._manifest['segments'] = keep
+            self.__save_manifest()
+        return freed
+
+    def move_segments(self, dest_dir):
+        """Copy closed segments to dest_dir (e.g. on SD) and remove the
+        local copies. Returns the number of segments moved."""
+        self.__load_manifest()
+        libpath.makedirs(dest_dir)
+        moved = 0
+        for seg in self._manifest['segments']:
+            src = seg[0]
+            dest = dest_dir.rstrip('/') + '/' + src.replace('\\', '/').rsplit('/', 1)[-1]
+            if libpath.dirname(src) == libpath.dirname(dest):
+                continue
+            with open(src, 'rb') as fin, open(dest, 'wb') as fout:
+                while True:
+                    chunk = fin.read(FILE_TABLE_BLOCK)
+                    if not chunk:
+                        break
+                    fout.write(chunk)
+            seg[0] = dest
+            # Point at the copy before removing the original.
+            self.__save_manifest()
+            os.remove(src)
+            moved += 1
+        return moved
+
+    def scan_reverse(self, start_row=None, stop_predicate=None, show_row=False):
+        """Yield records newest first: the active segment, then closed
+        segments from the newest one. Every file is read backwards in
+        FILE_TABLE_BLOCK byte chunks, so the cost depends on the rows read
+        and not on the file size. Stops before the first record for which
+        stop_predicate(record) is True; unreadable lines are skipped.
+
+        start_row and show_row are accepted for Table compatibility; lines
+        have no row ids, so start_row must be None.
+        """
+        if start_row is not None:
+            raise Exception('start_row is not supported on FileTable')
+        if self._file is not None:
+            self._file.flush()
+        stopped = [False]
+
+        def _stop(rec):
+            if stop_predicate is not None and stop_predicate(rec):
+                stopped[0] = True
+                return True
+            return False
+
+        for rec in self.__scan_file(self.filepath, _stop):
+            yield rec
+        segments = self.segments()
+        for i in range(len(segments) - 1, -1, -1):
+            if stopped[0]:
+                return
+            for rec in self.__scan_file(segments[i][0], _stop):
+                yield rec
+
+    def __scan_file(self, path, stop_predicate):
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return
+        try:
+            pos = f.seek(0, 2)
+            tail = b''
+            while pos > 0:
+                n = FILE_TABLE_BLOCK if pos >= FILE_TABLE_BLOCK else pos
+                pos -= n
+                f.seek(pos)
+                lines = (f.read(n) + tail).split(b'\n')
+                # The first piece may be the end of a line in the previous block.
+                tail = lines[0]
+                for i in range(len(lines) - 1, 0, -1):
+                    rec = self.__decode(lines[i])
+                    if rec is None:
+                        continue
+                    if stop_predicate is not None and stop_predicate(rec):
+                        return
+                    yield rec
+            rec = self.__decode(tail)
+            if rec is not None and not (stop_predicate is not None and stop_predicate(rec)):
+                yield rec
+        finally:
+            f.close()
+
+    @staticmethod
+    def __decode(line):
+        if not line.strip():
+            return None
+        try:
+            rec = json.loads(line)
+        except Exception:
+            return None
+        return rec if isinstance(rec, dict) else None
+
+
+class BufferedTable:
+    """Write-behind buffer in front of a table.
+
+    Records are kept in RAM and written with one multi-row insert() once
+    `batch_size` records are pending or the oldest pending one is
+    `max_delay_s` seconds old. The queue is bounded: while the table keeps
+    failing (raising, or returning False like FileTable), at most
+    `max_pending` records are kept and the oldest ones are dropped (counted
+    in `dropped`). When a multi-page insert fails part way,
+    the rows it already wrote (by `current_row`, on tables that have it)
+    are not queued again.
+
+    Everything else is forwarded to the wrapped table. The readers in this
+    module flush pending records first, so queries always see them; call
+    close() before shutting down.
+    """
+
+    def __init__(self, table, batch_size=10, max_delay_s=10, max_pending=60):
+        self.table = table
+        self.batch_size = int(batch_size)
+        self.max_delay_s = max_delay_s
+        self.max_pending = int(max_pending)
+        self.dropped = 0
+        self._pending = []
+        self._oldest_ts = None
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+    def insert(self, record):
+        if len(self._pending) >= self.max_pending:
+            self._pending.pop(0)
+            self.dropped += 1
+        self._pending.append(record)
+        now = time.time()
+        if self._oldest_ts is None:
+            self._oldest_ts = now
+        if len(self._pending) >= self.batch_size or now - self._oldest_ts >= self.max_delay_s:
+            self.flush()
+        return True
+
+    def pending(self):
+        return len(self._pending)
+
+    def flush(self):
+        """Write pending records. Returns False (keeping them) on failure."""
+        if not self._pending:
+            return True
+        before = _current_row(self.table)
+        try:
+            # FileTable reports storage errors by returning False.
+            ok = self.table.insert(self._pending) is not False
+        except Exception as e:
+            print('BufferedTable flush error:', e)
+            ok = False
+        if not ok:
+            written = _current_row(self.table)
+            if before is not None and written is not None and written > before:
+                # Retry only the rows the failed insert didn't write.
+                del self._pending[:written - before]
+            return False
+        self._pending = []
+        self._oldest_ts = None
+        return True
+
+    def close(self):
+        """Flush pending records and close the wrapped table (if it can)."""
+        flushed = self.flush()
+        if hasattr(self.table, 'close'):
+            self.table.close()
+        return flushed
+
+
+def _current_row(tbl):
+    """Rows written so far by tables that count them, else None."""
+    try:
+        return int(tbl.current_row)
+    except Exception:
+        return None
+
+
+def _flush_pending(tbl):
+    """Make buffered records visible to readers."""
+    if isinstance(tbl, BufferedTable):
+        tbl.flush()
 
 
 def _ensure_table_columns(db_path: str, table_name: str, columns: dict) -> bool:
@@ -58,15 +441,129 @@ def _ensure_table_columns(db_path: str, table_name: str, columns: dict) -> bool:
         return False
 
 
-def init_db(db_path='data/wind', table_name='readings'):
+def _ensure_column_types(db_path: str, table_name: str, types: dict) -> bool:
+    """Best-effort migration: retype str columns in definition.json.
+
+    Rows already stored keep their string values; readers go through
+    `normalize_record`, and Table.query()/find()/scan() convert them the
+    same way, so old and new pages can be read and queried in the same scan.
+    Returns True if any change was made.
+    """
+    table_name = (table_name or '').lower()
+    definition_path = libpath.join(db_path, table_name, 'definition.json')
+    try:
+        with open(definition_path, 'r') as f:
+            definition = json.loads(f.read() or '{}')
+        definition_columns = definition.get('columns') or {}
+
+        changed = False
+        for col_name, data_type in types.items():
+            col_def = definition_columns.get(col_name)
+            if col_def is not None and col_def.get('data_type') == 'str':
+                definition_columns[col_name] = {'data_type': data_type}
+                changed = True
+
+        if not changed:
+            return False
+
+        definition['columns'] = definition_columns
+        with open(definition_path, 'w') as f:
+            f.write(json.dumps(definition))
+        return True
+    except Exception:
+        return False
+
+
+def _ensure_table_settings(db_path: str, table_name: str, settings: dict) -> bool:
+    """Best-effort migration: ensure settings are present in definition.json.
+
+    Like `_ensure_table_columns`, existing values are never overwritten.
+    Returns True if any change was made.
+    """
+    table_name = (table_name or '').lower()
+    definition_path = libpath.join(db_path, table_name, 'definition.json')
+    try:
+        with open(definition_path, 'r') as f:
+            definition = json.loads(f.read() or '{}')
+        definition_settings = definition.get('settings') or {}
+
+        changed = False
+        for key, value in settings.items():
+            if key not in definition_settings:
+                definition_settings[key] = value
+                changed = True
+
+        if not changed:
+            return False
+
+        definition['settings'] = definition_settings
+        with open(definition_path, 'w') as f:
+            f.write(json.dumps(definition))
+        return True
+    except Exception:
+        return False
+
+
+def _ensure_ring_table(db_path: str, table_name: str, max_rows: int) -> bool:
+    """Best-effort migration: turn a table into a ring of `max_rows` rows.
+
+    Tables that hit their max_rows limit start taking rows again; the
+    oldest pages go on the next page change. Returns True if changed.
+    """
+    table_name = (table_name or '').lower()
+    definition_path = libpath.join(db_path, table_name, 'definition.json')
+    try:
+        with open(definition_path, 'r') as f:
+            definition = json.loads(f.read() or '{}')
+        settings = definition.get('settings') or {}
+        if settings.get('ring') and settings.get('max_rows') == max_rows:
+            return False
+        settings['ring'] = True
+        settings['max_rows'] = max_rows
+        definition['settings'] = settings
+        with open(definition_path, 'w') as f:
+            f.write(json.dumps(definition))
+        return True
+    except Exception:
+        return False
+
+
+def init_db(db_path='data/wind', table_name='readings', partitioned=False, engine='table',
+            file_sync_s=None, ring_rows=WIND_RING_MAX_ROWS):
     """Try to initialize micro_py_database; if it fails, return a FileTable fallback.
 
     `path` for micro_py_database is a folder; for FileTable it's a file path
     `data/wind.jsonl`.
+
+    With `partitioned=True` readings go to one table per day under
+    `<db_path>/<table_name>/YYYY/MM/DD/` (see lib.wind_partitions).
+
+    With `engine='binary'` readings are stored as fixed-width binary records
+    in `<db_path>/<table_name>.bin` (see lib.wind_binary).
+
+    `file_sync_s` keeps the FileTable fallback file open, flushing it at most
+    every `file_sync_s` seconds (None: open/close per insert).
+
+    `ring_rows` makes the readings table a ring of that many rows: the
+    oldest page is dropped instead of the table getting full (None: keep
+    the micro_py_database max_rows limit).
     """
+    if engine == 'binary':
+        try:
+            from lib.wind_binary import BinaryTable
+            return BinaryTable(db_path, table_name)
+        except Exception as e:
+            print('Binary table unavailable:', e)
+            return FileTable(libpath.join('data', table_name + '.jsonl'), sync_interval_s=file_sync_s)
+
     try:
         from lib.micro_py_database.micropydatabase import Database
 
+        if partitioned:
+            from lib.wind_partitions import PartitionedTable
+            return PartitionedTable(libpath.join(db_path, table_name), WIND_COLUMNS,
+                                    WIND_ROWS_PER_PAGE, WIND_PARTITION_MAX_ROWS)
+
         # Ensure parent directory exists (Database.create will make the DB folder)
         parent = libpath.dirname(db_path)
         if parent and not libpath.exists(parent):
@@ -76,7 +573,7 @@ def init_db(db_path='data/wind', table_name='readings'):
                 pass
 
         if not Database.exist(db_path):
-            Database.create(db_path)
+            Database.create(db_path, rows_per_page=WIND_ROWS_PER_PAGE)
         db = Database.open(db_path)
 
         # Defensive check: Database.open should return an object with expected
@@ -88,7 +585,10 @@ def init_db(db_path='data/wind', table_name='readings'):
 
         # Ensure table exists
         try:
-            db.create_table(table_name, ['timestamp', 'windSpeed', 'outOfScale', 'message'])
+            db.create_table(table_name, WIND_COLUMNS,
+                            rows_per_page=WIND_ROWS_PER_PAGE, catalog_column='timestamp',
+                            max_rows=ring_rows, ring=ring_rows is not None,
+                            index_columns=WIND_INDEX_COLUMNS)
         except Exception:
             # Table likely exists
             pass
@@ -100,11 +600,25 @@ def init_db(db_path='data/wind', table_name='readings'):
             table_name,
             {
                 'message': {'data_type': 'str', 'max_length': 10000},
+                # Per-second spread when sampling faster than 1 Hz.
+                'windmin': {'data_type': 'float'},
+                'windmax': {'data_type': 'float'},
+                'windstd': {'data_type': 'float'},
             },
         )
+        _ensure_column_types(db_path, table_name, WIND_COLUMN_TYPES)
+        # Per-page timestamp catalog (catalog.jsonl) for time-window queries.
+        # Secondary index (index.jsonl), built on the first indexed query.
+        _ensure_table_settings(db_path, table_name, {'catalog_column': 'timestamp',
+                                                     'index_columns': WIND_INDEX_COLUMNS})
+        if ring_rows is not None:
+            _ensure_ring_table(db_path, table_name, ring_rows)
 
         table = db.open_table(table_name)
 
+        # Tables created before WIND_ROWS_PER_PAGE use tiny pages: migrate once.
+        migrate_page_size(table, WIND_ROWS_PER_PAGE)
+
         # Basic sanity check: table should have insert()
         if hasattr(table, 'insert'):
             return table
@@ -115,137 +629,165 @@ def init_db(db_path='data/wind', table_name='readings'):
         print('micro_py_database unavailable or failed:', e)
         # Fallback: use a simple JSONL file table
         jsonl_path = libpath.join('data', table_name + '.jsonl')
-        return FileTable(jsonl_path)
+        return FileTable(jsonl_path, sync_interval_s=file_sync_s)
+
+
+def open_side_table(db_path, name, columns, catalog_column=None,
+                    rows_per_page=WIND_ROWS_PER_PAGE, max_rows=WIND_SIDE_TABLE_MAX_ROWS):
+    """Open (or create) a micro_py_database table `name` in the db_path
+    folder, for data stored next to the readings (rollups, metrics).
+
+    Falls back to a JSONL FileTable `data/<name>.jsonl` if that fails.
+    """
+    name = name.lower()
+    try:
+        from lib.micro_py_database.micropydatabase import Database, Table
+
+        libpath.makedirs(db_path)
+        db = Database(db_path, rows_per_page, max_rows, 1)
+        if libpath.isdir('{}/{}'.format(db_path, name)):
+            return Table.open_table(db, name)
+        return Table.create_table(db, name, columns, rows_per_page, max_rows,
+                                  catalog_column=catalog_column)
+    except Exception as e:
+        print('Table {} unavailable, using JSONL:'.format(name), e)
+        return FileTable(libpath.join('data', name + '.jsonl'))
 
 
-def insert_record(tbl, timestamp, wind_speed, out_of_scale, message=None):
+def migrate_page_size(tbl, rows_per_page=WIND_ROWS_PER_PAGE):
+    """Rewrite a micro_py_database table with smaller pages into pages of
+    `rows_per_page` rows. Row ids are kept; an interrupted migration is
+    finished (or rolled back) the next time the table is opened.
+
+    Returns True if the table was migrated.
+    """
+    if not hasattr(tbl, 'repage'):
+        return False
+    try:
+        if int(tbl.rows_per_page) >= int(rows_per_page):
+            return False
+        print('Migrating table {} to {} rows per page...'.format(tbl.name, rows_per_page))
+        tbl.repage(rows_per_page)
+        print('Migration done')
+        return True
+    except Exception as e:
+        print('Page size migration failed:', e)
+        return False
+
+
+def insert_record(tbl, timestamp, wind_speed, out_of_scale, message=None,
+                  wind_min=None, wind_max=None, wind_std=None):
+    """Store one reading. wind_min/wind_max/wind_std describe the samples
+    `wind_speed` is the mean of (lib.wind_sampler); they're left out when
+    None, and dropped on tables without those columns."""
     if tbl is None:
         return
 
     try:
-        # Normalize field names to lowercase (micro_py_database stores columns lowercased)
-        # and avoid inserting None for typed columns by converting to string when needed.
+        # Field names are lowercase (micro_py_database stores columns lowercased).
+        # Values are typed; missing readings are stored as null.
         record = {
-            'timestamp': str(timestamp) if timestamp is not None else '',
-            'windspeed': '' if wind_speed is None else str(wind_speed),
-            'outofscale': str(bool(out_of_scale)),
-            'message': '' if message is None else str(message),
+            'timestamp': None if timestamp is None else float(timestamp),
+            'windspeed': None if wind_speed is None else float(wind_speed),
+            'outofscale': bool(out_of_scale),
+            'message': None if message is None else str(message),
         }
+        if wind_min is not None:
+            record['windmin'] = float(wind_min)
+        if wind_max is not None:
+            record['windmax'] = float(wind_max)
+        if wind_std is not None:
+            record['windstd'] = float(wind_std)
 
         # micro_py_database validates columns strictly; if the table is missing
-        # newer columns, drop them to avoid failing the whole insert.
+        # newer columns, drop them to avoid failing the whole insert. Tables
+        # that still have str columns get stringified values (None stays null).
         if hasattr(tbl, 'columns') and isinstance(getattr(tbl, 'columns'), dict):
-            allowed = set(k.lower() for k in tbl.columns.keys())
-            record = {k: v for k, v in record.items() if k.lower() in allowed}
+            columns = {}
+            for k, v in tbl.columns.items():
+                columns[k.lower()] = v
+            typed = {}
+            for k, v in record.items():
+                col = columns.get(k)
+                if col is None:
+                    continue
+                if col.get('data_type') == 'str' and v is not None and \
+                        not isinstance(v, str):
+                    v = str(v)
+                typed[k] = v
+            record = typed
 
         tbl.insert(record)
     except Exception as e:
         print('Failed to insert record:', e)
 
 
+def normalize_record(rec):
+    """Convert a record stored with string values (older pages) to typed
+    values in place: float timestamp and windspeed (None when empty), bool
+    outofscale. Typed records are returned unchanged.
+    """
+    if not isinstance(rec, dict):
+        return rec
+    ts = rec.get('timestamp')
+    if isinstance(ts, str):
+        rec['timestamp'] = _parse_epoch_seconds(ts) if ts else None
+    ws = rec.get('windspeed')
+    if isinstance(ws, str):
+        rec['windspeed'] = to_float(ws) if ws else None
+    oos = rec.get('outofscale')
+    if isinstance(oos, str):
+        rec['outofscale'] = to_bool(oos)
+    return rec
+
+
 def get_latest_record(tbl):
     """Return the latest record dict or None.
 
-    Supports micro_py_database Table and the FileTable fallback.
+    Supports micro_py_database Table, the FileTable fallback and the
+    partitioned/binary tables.
     """
     if tbl is None:
         return None
+    _flush_pending(tbl)
 
-    # micro_py_database Table
-    if hasattr(tbl, 'current_row') and hasattr(tbl, 'find_row'):
+    # Any table with a newest-first scan (micro_py_database, FileTable, ...)
+    if hasattr(tbl, 'scan_reverse'):
         try:
-            row_id = int(getattr(tbl, 'current_row', 0) or 0)
-            if row_id <= 0:
-                return None
-            return tbl.find_row(row_id).get('d')
-        except Exception:
+            for rec in tbl.scan_reverse():
+                return normalize_record(rec)
             return None
-
-    # FileTable fallback (JSONL)
-    if hasattr(tbl, 'filepath'):
-        try:
-            last = None
-            with open(tbl.filepath, 'r') as f:
-                for line in f:
-                    if line and line.strip():
-                        last = line
-            if not last:
-                return None
-            return json.loads(last)
         except Exception:
             return None
 
     return None
 
 
-def iter_last_records(tbl, n=5):
-    """Yield up to the last n records (oldest->newest)."""
-    if tbl is None:
-        return
-    if n is None or n <= 0:
+def iter_newest_records(tbl, n=5):
+    """Yield up to the last n records, newest first, without buffering them."""
+    if tbl is None or n is None or n <= 0:
         return
+    _flush_pending(tbl)
 
-    # micro_py_database Table
-    if hasattr(tbl, 'current_row') and hasattr(tbl, 'find_row'):
+    # Any table with a newest-first scan (micro_py_database, FileTable, ...)
+    if hasattr(tbl, 'scan_reverse'):
+        left = int(n)
         try:
-            current_row = int(getattr(tbl, 'current_row', 0) or 0)
-            start_row = current_row - int(n) + 1
-            if start_row < 1:
-                start_row = 1
-            for row_id in range(start_row, current_row + 1):
-                try:
-                    rec = tbl.find_row(row_id).get('d')
-                    if rec is not None:
-                        yield rec
-                except Exception:
-                    continue
-            return
+            for rec in tbl.scan_reverse():
+                yield normalize_record(rec)
+                left -= 1
+                if left <= 0:
+                    return
         except Exception:
             return
 
-    # FileTable fallback (JSONL)
-    if hasattr(tbl, 'filepath'):
-        try:
-            # Keep only last n lines with a small ring buffer.
-            buf = [None] * int(n)
-            idx = 0
-            count = 0
-            with open(tbl.filepath, 'r') as f:
-                for line in f:
-                    if not line or not line.strip():
-                        continue
-                    buf[idx] = line
-                    idx = (idx + 1) % int(n)
-                    count += 1
-            if count == 0:
-                return
-            take = int(n) if count >= int(n) else count
-            start = idx if count >= int(n) else 0
-            for i in range(take):
-                line = buf[(start + i) % int(n)]
-                if line:
-                    try:
-                        yield json.loads(line)
-                    except Exception:
-                        pass
-        except Exception:
-            return
-
-
-def _to_float(v):
-    try:
-        return float(v)
-    except Exception:
-        return None
 
-
-def _to_bool(v):
-    if isinstance(v, bool):
-        return v
-    if v is None:
-        return False
-    s = str(v).strip().lower()
-    return s in ('1', 'true', 't', 'yes', 'y')
+def iter_last_records(tbl, n=5):
+    """Yield up to the last n records (oldest->newest)."""
+    recs = list(iter_newest_records(tbl, n))
+    recs.reverse()
+    for rec in recs:
+        yield rec
 
 
 def format_timestamp(ts):
@@ -281,45 +823,27 @@ def format_timestamp(ts):
 
 
 def summarize_records(records):
-    """Return a compact human-readable summary for Telegram."""
-    if not records:
+    """Return a compact human-readable summary for Telegram.
+
+    `records` can be any iterable (e.g. a reader generator); it's consumed
+    in one pass with constant memory (see lib.wind_stats.WindStats).
+    """
+    stats = WindStats().add_records(records)
+    if not stats.count:
         return 'no data'
 
-    count = 0
-    count_speed = 0
-    count_oos = 0
-    min_ws = None
-    max_ws = None
-    sum_ws = 0.0
-    last_ts = None
-
-    for r in records:
-        if not isinstance(r, dict):
-            continue
-        count += 1
-        last_ts = r.get('timestamp', last_ts)
-        ws = _to_float(r.get('windspeed'))
-        if ws is not None:
-            count_speed += 1
-            sum_ws += ws
-            if min_ws is None or ws < min_ws:
-                min_ws = ws
-            if max_ws is None or ws > max_ws:
-                max_ws = ws
-        if _to_bool(r.get('outofscale')):
-            count_oos += 1
-
-    avg_ws = (sum_ws / count_speed) if count_speed else None
-    parts = [f'n={count}']
-    if avg_ws is not None:
-        parts.append(f'avg={avg_ws:.2f}')
-    if min_ws is not None:
-        parts.append(f'min={min_ws:.2f}')
-    if max_ws is not None:
-        parts.append(f'max={max_ws:.2f}')
-    parts.append(f'oos={count_oos}')
-    if last_ts is not None:
-        parts.append('last_ts={}'.format(format_timestamp(last_ts)))
+    parts = [f'n={stats.count}']
+    if stats.n:
+        parts.append(f'avg={stats.mean:.2f}')
+        parts.append(f'min={stats.min:.2f}')
+        parts.append(f'max={stats.max:.2f}')
+        parts.append(f'std={stats.stddev():.2f}')
+        parts.append(f'p90={stats.percentile(90):.2f}')
+    parts.append(f'oos={stats.oos}')
+    if stats.gaps:
+        parts.append(f'gaps={stats.gaps}')
+    if stats.last_ts is not None:
+        parts.append('last_ts={}'.format(format_timestamp(stats.last_ts)))
     return ' '.join(parts)
 
 
@@ -347,69 +871,16 @@ def get_records_since(tbl, since_epoch, max_scan=5000):
     """
     if tbl is None:
         return []
+    _flush_pending(tbl)
 
     since_epoch = float(since_epoch)
 
-    # micro_py_database Table
-    if hasattr(tbl, 'current_row') and hasattr(tbl, 'find_row'):
-        try:
-            current_row = int(getattr(tbl, 'current_row', 0) or 0)
-        except Exception:
-            current_row = 0
-        out = []
-        scanned = 0
-        row_id = current_row
-        while row_id >= 1 and scanned < int(max_scan):
-            scanned += 1
-            try:
-                rec = tbl.find_row(row_id).get('d')
-            except Exception:
-                row_id -= 1
-                continue
-            ts = _parse_epoch_seconds(rec.get('timestamp')) if isinstance(rec, dict) else None
-            if ts is not None and ts < since_epoch:
-                break
-            if isinstance(rec, dict):
-                out.append(rec)
-            row_id -= 1
+    # Any table with a newest-first scan (micro_py_database, FileTable, ...)
+    if hasattr(tbl, 'scan_reverse'):
+        out = list(iter_records_since_newest(tbl, since_epoch, max_scan))
         out.reverse()
         return out
 
-    # FileTable fallback (JSONL)
-    if hasattr(tbl, 'filepath'):
-        try:
-            # Read last max_scan lines into a buffer.
-            buf = [None] * int(max_scan)
-            idx = 0
-            count = 0
-            with open(tbl.filepath, 'r') as f:
-                for line in f:
-                    if not line or not line.strip():
-                        continue
-                    buf[idx] = line
-                    idx = (idx + 1) % int(max_scan)
-                    count += 1
-
-            take = int(max_scan) if count >= int(max_scan) else count
-            start = idx if count >= int(max_scan) else 0
-            out = []
-            for i in range(take):
-                line = buf[(start + i) % int(max_scan)]
-                if not line:
-                    continue
-                try:
-                    rec = json.loads(line)
-                except Exception:
-                    continue
-                ts = _parse_epoch_seconds(rec.get('timestamp')) if isinstance(rec, dict) else None
-                if ts is None or ts < since_epoch:
-                    continue
-                out.append(rec)
-            # Already oldest->newest because we iterated forward.
-            return out
-        except Exception:
-            return []
-
     return []
 
 
@@ -421,63 +892,43 @@ def iter_records_since_newest(tbl, since_epoch, max_scan=5000):
     """
     if tbl is None:
         return
+    _flush_pending(tbl)
 
     since_epoch = float(since_epoch)
 
-    # micro_py_database Table
-    if hasattr(tbl, 'current_row') and hasattr(tbl, 'find_row'):
-        try:
-            current_row = int(getattr(tbl, 'current_row', 0) or 0)
-        except Exception:
-            current_row = 0
-        scanned = 0
-        row_id = current_row
-        while row_id >= 1 and scanned < int(max_scan):
-            scanned += 1
+    # Any table with a newest-first scan (micro_py_database, FileTable, ...)
+    if hasattr(tbl, 'scan_reverse'):
+        # With a timestamp catalog, rows before first_row are all older than
+        # the cutoff: read at most the rows from there on, and skip (instead
+        # of stopping at) out of order timestamps, e.g. after an RTC reset.
+        first_row = None
+        if getattr(tbl, 'catalog_column', None) == 'timestamp':
             try:
-                rec = tbl.find_row(row_id).get('d')
+                first_row = tbl.first_row_since(since_epoch)
             except Exception:
-                row_id -= 1
-                continue
+                first_row = None
+        budget = [int(max_scan)]
+        if first_row is not None:
+            budget[0] = min(budget[0], int(tbl.current_row) - first_row + 1)
+
+        def _stop(rec):
+            # Stop at the cutoff, or once the row budget has been read.
+            budget[0] -= 1
+            if budget[0] < 0:
+                return True
+            if first_row is not None:
+                return False
             ts = _parse_epoch_seconds(rec.get('timestamp')) if isinstance(rec, dict) else None
-            if ts is not None and ts < since_epoch:
-                break
-            if isinstance(rec, dict):
-                yield rec
-            row_id -= 1
-        return
+            return ts is not None and ts < since_epoch
 
-    # FileTable fallback (JSONL)
-    if hasattr(tbl, 'filepath'):
         try:
-            # Keep only last max_scan lines (ring buffer), then yield reverse.
-            buf = [None] * int(max_scan)
-            idx = 0
-            count = 0
-            with open(tbl.filepath, 'r') as f:
-                for line in f:
-                    if not line or not line.strip():
-                        continue
-                    buf[idx] = line
-                    idx = (idx + 1) % int(max_scan)
-                    count += 1
-
-            take = int(max_scan) if count >= int(max_scan) else count
-            start = idx if count >= int(max_scan) else 0
-            # Iterate newest->oldest
-            for j in range(take - 1, -1, -1):
-                line = buf[(start + j) % int(max_scan)]
-                if not line:
-                    continue
-                try:
-                    rec = json.loads(line)
-                except Exception:
+            for rec in tbl.scan_reverse(stop_predicate=_stop):
+                if not isinstance(rec, dict):
                     continue
-                ts = _parse_epoch_seconds(rec.get('timestamp')) if isinstance(rec, dict) else None
-                if ts is not None and ts < since_epoch:
-                    break
-                if isinstance(rec, dict):
-                    yield rec
+                if first_row is not None:
+                    ts = _parse_epoch_seconds(rec.get('timestamp'))
+                    if ts is not None and ts < since_epoch:
+                        continue
+                yield normalize_record(rec)
         except Exception:
             return
-
@@ -0,0 +1,133 @@
+"""Streaming time-bucketed downsampling of wind readings for charts.
+
+`Downsampler(since, until, width)` splits the window in `width` equal time
+buckets and keeps, per bucket, count/sum/min/max plus the first, last,
+minimum and maximum samples. Samples can be added in any order (the
+readers in lib.wind_db go newest first) in one pass, and memory depends
+only on `width`:
+
+    ds = Downsampler(now - 6 * 3600, now, 48)
+    for rec in iter_records_since_newest(tbl, now - 6 * 3600):
+        ds.add_record(rec)
+    ds.means()   # one mean (or None) per bucket, oldest first
+    ds.lttb()    # [(ts, value)], one shape preserving point per bucket
+
+lttb() applies the Largest-Triangle-Three-Buckets selection to the kept
+candidate samples of every bucket, which keeps peaks and gusts that plain
+decimation (or averaging) loses.
+"""
+from array import array
+
+from lib.wind_values import to_float
+
+# Per bucket candidate sample slots (timestamp, value).
+_FIRST, _LAST, _LOW, _HIGH = range(4)
+
+
+class Downsampler:
+    """Constant memory min/max/mean (and LTTB) buckets over a time window."""
+
+    def __init__(self, since, until, width=48):
+        self.since = float(since)
+        self.until = float(until)
+        self.width = max(1, int(width))
+        span = self.until - self.since
+        self.step = span / self.width if span > 0 else 1.0
+        self.count = array('I', [0] * self.width)
+        self.total = 0
+        self.sum = [0.0] * self.width
+        self.min = [None] * self.width
+        self.max = [None] * self.width
+        # 4 candidate samples per bucket: [ts, value] pairs, flattened.
+        self._cand = [None] * (self.width * 8)
+
+    def add(self, ts, value):
+        """Add one sample; samples outside the window or without a value
+        are ignored. Returns True if the sample was used."""
+        if ts is None or value is None:
+            return False
+        if ts < self.since or ts > self.until:
+            return False
+        i = int((ts - self.since) / self.step)
+        if i >= self.width:
+            i = self.width - 1
+        self.count[i] += 1
+        self.total += 1
+        self.sum[i] += value
+        c = self._cand
+        base = i * 8
+        if self.min[i] is None or value < self.min[i]:
+            self.min[i] = value
+            c[base + _LOW * 2] = ts
+            c[base + _LOW * 2 + 1] = value
+        if self.max[i] is None or value > self.max[i]:
+            self.max[i] = value
+            c[base + _HIGH * 2] = ts
+            c[base + _HIGH * 2 + 1] = value
+        if c[base + _FIRST * 2] is None or ts < c[base + _FIRST * 2]:
+            c[base + _FIRST * 2] = ts
+            c[base + _FIRST * 2 + 1] = value
+        if c[base + _LAST * 2] is None or ts >= c[base + _LAST * 2]:
+            c[base + _LAST * 2] = ts
+            c[base + _LAST * 2 + 1] = value
+        return True
+
+    def add_record(self, rec, field='windspeed'):
+        """Add a record dict as returned by the lib.wind_db readers."""
+        if not isinstance(rec, dict):
+            return False
+        return self.add(to_float(rec.get('timestamp')), to_float(rec.get(field)))
+
+    def means(self):
+        """Mean per bucket, oldest first (None for empty buckets)."""
+        return [self.sum[i] / self.count[i] if self.count[i] else None for i in range(self.width)]
+
+    def mins(self):
+        return list(self.min)
+
+    def maxs(self):
+        return list(self.max)
+
+    def summary(self):
+        """(count, min, mean, max) over every sample added."""
+        if not self.total:
+            return (0, None, None, None)
+        mn = min(v for v in self.min if v is not None)
+        mx = max(v for v in self.max if v is not None)
+        return (self.total, mn, sum(self.sum) / self.total, mx)
+
+    def lttb(self):
+        """One (ts, value) per non-empty bucket, oldest first, chosen with
+        Largest-Triangle-Three-Buckets among the bucket's first, last,
+        minimum and maximum samples."""
+        filled = [i for i in range(self.width) if self.count[i]]
+        if not filled:
+            return []
+        c = self._cand
+        out = []
+        prev = None
+        for k in range(len(filled)):
+            i = filled[k]
+            base = i * 8
+            if prev is None or k == len(filled) - 1:
+                # Keep the first and the last sample of the window.
+                slot = _FIRST if prev is None else _LAST
+                prev = (c[base + slot * 2], c[base + slot * 2 + 1])
+                out.append(prev)
+                continue
+            j = filled[k + 1]
+            # Next bucket's centroid.
+            nx = self.since + (j + 0.5) * self.step
+            ny = self.sum[j] / self.count[j]
+            best = None
+            best_area = -1.0
+            for slot in (_FIRST, _LAST, _LOW, _HIGH):
+                ts = c[base + slot * 2]
+                v = c[base + slot * 2 + 1]
+                area = abs((prev[0] - nx) * (v - prev[1]) - (prev[0] - ts) * (ny - prev[1]))
+                if area > best_area:
+                    best_area = area
+                    best = (ts, v)
+            prev = best
+            out.append(best)
+        return out
@@ -0,0 +1,155 @@
+"""WMO-style wind metrics computed in the acquisition loop.
+
+`WindMetrics` keeps the last 10 minutes of wind speed samples in a
+preallocated ring buffer (NaN = missing sample) and, once per `period_s`,
+returns a metrics record:
+
+    timestamp   end of the period (epoch seconds)
+    gust        highest 3 s running mean of the last 10 minutes (WMO gust)
+    avg2m       2 minute mean (sustained wind)
+    avg10m      10 minute mean
+    std10m      10 minute standard deviation
+    ti10m       turbulence intensity, std10m / avg10m
+    n10m        samples used for the 10 minute values
+
+Averages are kept with running sums (recomputed from the ring once per
+wrap, so float32 rounding on MicroPython can't accumulate), the gust with
+one maximum per period; nothing is read back from storage. Records are
+stored in the `<table>_metrics` table next to the readings
+(`open_metrics_table`).
+"""
+from array import array
+
+METRICS_COLUMNS = {'timestamp': float, 'gust': float, 'avg2m': float, 'avg10m': float,
+                   'std10m': float, 'ti10m': float, 'n10m': int}
+GUST_SECONDS = 3
+SUSTAINED_SECONDS = 120
+WINDOW_SECONDS = 600
+
+_NAN = float('nan')
+
+
+class _Window:
+    """Running count/sum/sum of squares over the newest `size` ring slots."""
+
+    def __init__(self, size):
+        self.size = size
+        self.n = 0
+        self.sum = 0.0
+        self.sumsq = 0.0
+
+    def add(self, v):
+        if v == v:
+            self.n += 1
+            self.sum += v
+            self.sumsq += v * v
+
+    def remove(self, v):
+        if v == v:
+            self.n -= 1
+            self.sum -= v
+            self.sumsq -= v * v
+
+    def mean(self):
+        return self.sum / self.n if self.n else None
+
+    def stddev(self):
+        if not self.n:
+            return None
+        mean = self.sum / self.n
+        var = self.sumsq / self.n - mean * mean
+        return var ** 0.5 if var > 0 else 0.0
+
+
+class WindMetrics:
+    """Fixed memory gust / sustained wind / turbulence aggregator."""
+
+    def __init__(self, sample_period_s=1, period_s=60):
+        self.sample_period_s = sample_period_s
+        self.period_s = period_s
+        self.size = max(1, int(WINDOW_SECONDS / sample_period_s))
+        self.ring = array('f', [_NAN] * self.size)
+        self.pos = 0
+        self.filled = 0
+        self.gust_win = _Window(max(1, int(round(GUST_SECONDS / sample_period_s))))
+        self.sustained = _Window(max(1, int(SUSTAINED_SECONDS / sample_period_s)))
+        self.full = _Window(self.size)
+        # Highest 3 s mean per period, for the last 10 minutes of periods.
+        self.period_gusts = [None] * max(1, int(WINDOW_SECONDS / period_s))
+        self.period_index = 0
+        self._period_start = None
+        self.latest = None
+
+    def __slot_back(self, k):
+        """Value k samples before the newest one (0 = newest)."""
+        return self.ring[(self.pos - 1 - k) % self.size]
+
+    def add(self, ts, speed):
+        """Add one sample (speed None = missing). Returns the metrics record
+        when a period ends, else None."""
+        result = None
+        if self._period_start is None:
+            self._period_start = ts
+        elif ts - self._period_start >= self.period_s:
+            result = self.__close_period(ts)
+
+        v = _NAN if speed is None else float(speed)
+        # Samples leaving each window.
+        if self.filled >= self.gust_win.size:
+            self.gust_win.remove(self.__slot_back(self.gust_win.size - 1))
+        if self.filled >= self.sustained.size:
+            self.sustained.remove(self.__slot_back(self.sustained.size - 1))
+        if self.filled >= self.size:
+            self.full.remove(self.ring[self.pos])
+        self.ring[self.pos] = v
+        self.pos = (self.pos + 1) % self.size
+        if self.filled < self.size:
+            self.filled += 1
+        self.gust_win.add(v)
+        self.sustained.add(v)
+        self.full.add(v)
+        if self.pos == 0:
+            self.__resum()
+
+        if self.gust_win.n == self.gust_win.size:
+            gust = self.gust_win.mean()
+            cur = self.period_gusts[self.period_index]
+            if cur is None or gust > cur:
+                self.period_gusts[self.period_index] = gust
+        return result
+
+    def __resum(self):
+        """Recompute the running sums from the ring."""
+        for w in (self.gust_win, self.sustained, self.full):
+            w.n = 0
+            w.sum = 0.0
+            w.sumsq = 0.0
+            for k in range(min(w.size, self.filled)):
+                w.add(self.__slot_back(k))
+
+    def __close_period(self, ts):
+        gusts = [g for g in self.period_gusts if g is not None]
+        avg10 = self.full.mean()
+        std10 = self.full.stddev()
+        rec = {
+            'timestamp': float(ts),
+            'gust': max(gusts) if gusts else None,
+            'avg2m': self.sustained.mean(),
+            'avg10m': avg10,
+            'std10m': std10,
+            'ti10m': std10 / avg10 if avg10 else None,
+            'n10m': self.full.n,
+        }
+        self.period_index = (self.period_index + 1) % len(self.period_gusts)
+        self.period_gusts[self.period_index] = None
+        self._period_start = ts
+        self.latest = rec
+        return rec
+
+
+def open_metrics_table(db_path, table_name='readings'):
+    """`<table_name>_metrics` table next to the readings table."""
+    from lib.wind_db import open_side_table
+
+    return open_side_table(db_path, '{}_metrics'.format(table_name), METRICS_COLUMNS,
+                           catalog_column='timestamp')
@@ -0,0 +1,214 @@
+"""Time-partitioned storage for wind readings.
+
+Records go to one micro_py_database table per day, laid out as
+`<root>/YYYY/MM/DD/` (the day directory is the table, the month directory
+plays the database). Newest-first readers only open the days they reach,
+and retention removes whole day directories instead of deleting rows.
+
+The class mirrors the parts of the Table API used by lib.wind_db
+(insert, scan_reverse, columns, close), so get_latest_record,
+iter_last_records, get_records_since and iter_records_since_newest work
+unchanged on it.
+"""
+import os
+import time
+from lib import path as libpath
+
+
+def _epoch(ts):
+    """Whole epoch seconds from a stored timestamp, None if not numeric."""
+    if ts is None or isinstance(ts, bool):
+        return None
+    if isinstance(ts, (int, float)):
+        return int(ts)
+    try:
+        return int(str(ts).strip().split('.')[0])
+    except Exception:
+        return None
+
+
+def _dir_size(path):
+    """Total size of the files in a directory tree."""
+    size = 0
+    for name in os.listdir(path):
+        child = path + '/' + name
+        if libpath.isdir(child):
+            size += _dir_size(child)
+        else:
+            try:
+                size += os.stat(child)[6]
+            except OSError:
+                pass
+    return size
+
+
+def _remove_tree(path):
+    for name in os.listdir(path):
+        child = path + '/' + name
+        if libpath.isdir(child):
+            _remove_tree(child)
+        else:
+            os.remove(child)
+    os.rmdir(path)
+
+
+def _sorted_numeric_dirs(path):
+    """Numeric sub directory names of path, sorted ascending."""
+    try:
+        names = os.listdir(path)
+    except OSError:
+        return []
+    names = [n for n in names if n.isdigit() and libpath.isdir(path + '/' + n)]
+    return sorted(names, key=int)
+
+
+class PartitionedTable:
+    """Wind readings split in one micro_py_database table per day."""
+
+    def __init__(self, root, columns, rows_per_page, max_rows, catalog_column='timestamp'):
+        self.path = root.rstrip('/')
+        self.name = self.path.rsplit('/', 1)[-1]
+        self.rows_per_page = rows_per_page
+        self.max_rows = max_rows
+        # Kept private: row ids restart per partition, so wind_db readers
+        # must not use Table.first_row_since on this object.
+        self._catalog_column = catalog_column
+        self._columns = columns
+        # Column definitions (lowercase names), as on a Table.
+        self.columns = {}
+        for col in columns:
+            data_type = columns[col].__name__ if isinstance(columns, dict) else 'str'
+            if data_type == 'str':
+                self.columns[col.lower()] = {'data_type': 'str', 'max_length': 10000}
+            else:
+                self.columns[col.lower()] = {'data_type': data_type}
+        self._current_key = None
+        self._current = None
+        libpath.makedirs(self.path)
+
+    @staticmethod
+    def partition_key(ts):
+        """(year, month, day) in local time for a stored timestamp."""
+        epoch = _epoch(ts)
+        if epoch is None:
+            epoch = int(time.time())
+        lt = time.localtime(epoch)
+        return (lt[0], lt[1], lt[2])
+
+    def partitions(self):
+        """All (year, month, day) partitions, oldest first."""
+        out = []
+        for y in _sorted_numeric_dirs(self.path):
+            for m in _sorted_numeric_dirs(self.path + '/' + y):
+                for d in _sorted_numeric_dirs('{}/{}/{}'.format(self.path, y, m)):
+                    out.append((int(y), int(m), int(d)))
+        return out
+
+    def _partition_path(self, key):
+        return '{}/{:04d}/{:02d}/{:02d}'.format(self.path, key[0], key[1], key[2])
+
+    def open_partition(self, key, create=False):
+        """Table of a day partition, None if missing (unless create)."""
+        if key == self._current_key and self._current is not None:
+            return self._current
+        from lib.micro_py_database.micropydatabase import Database, Table
+
+        month_path = '{}/{:04d}/{:02d}'.format(self.path, key[0], key[1])
+        day = '{:02d}'.format(key[2])
+        if not libpath.isdir(month_path + '/' + day):
+            if not create:
+                return None
+            libpath.makedirs(month_path)
+            db = Database(month_path, self.rows_per_page, self.max_rows, 1)
+            return Table.create_table(db, day, self._columns, self.rows_per_page,
+                                      self.max_rows, catalog_column=self._catalog_column)
+        db = Database(month_path, self.rows_per_page, self.max_rows, 1)
+        return Table.open_table(db, day)
+
+    def _writer_for(self, key):
+        if key != self._current_key or self._current is None:
+            if self._current is not None:
+                try:
+                    self._current.close()
+                except Exception:
+                    pass
+            self._current = None
+            self._current = self.open_partition(key, create=True)
+            self._current_key = key
+        return self._current
+
+    def insert(self, data):
+        """Insert a record, or a list of records (split by day)."""
+        records = data if isinstance(data, list) else [data]
+        batch = []
+        batch_key = None
+        for rec in records:
+            key = self.partition_key(rec.get('timestamp') if isinstance(rec, dict) else None)
+            if batch and key != batch_key:
+                self._writer_for(batch_key).insert(batch)
+                batch = []
+            batch_key = key
+            batch.append(rec)
+        if batch:
+            self._writer_for(batch_key).insert(batch)
+        return True
+
+    def scan_reverse(self, start_row=None, stop_predicate=None, show_row=False):
+        """Yield records newest first across day partitions.
+
+        Stops before the first record for which stop_predicate(record) is
+        True; older partitions are not opened then. start_row is not
+        supported (row ids restart in every partition) and must be None.
+        """
+        if start_row is not None:
+            raise Exception('start_row is not supported on partitioned tables')
+        stopped = [False]
+
+        def _stop(rec):
+            if stop_predicate is not None and stop_predicate(rec):
+                stopped[0] = True
+                return True
+            return False
+
+        keys = self.partitions()
+        for i in range(len(keys) - 1, -1, -1):
+            tbl = self.open_partition(keys[i])
+            if tbl is None:
+                continue
+            for rec in tbl.scan_reverse(stop_predicate=_stop, show_row=show_row):
+                yield rec
+            if stopped[0]:
+                return
+
+    def drop_partitions_before(self, since_epoch):
+        """Remove whole day partitions older than the day of since_epoch.
+
+        Returns the number of bytes freed.
+        """
+        limit = self.partition_key(since_epoch)
+        freed = 0
+        for key in self.partitions():
+            if key >= limit:
+                break
+            path = self._partition_path(key)
+            if key == self._current_key:
+                self._current = None
+                self._current_key = None
+            try:
+                freed += _dir_size(path)
+                _remove_tree(path)
+            except OSError as e:
+                print('Partition remove error:', e)
+                continue
+            # Drop month/year directories left empty.
+            for parent in (libpath.dirname(path), libpath.dirname(libpath.dirname(path))):
+                try:
+                    if not os.listdir(parent):
+                        os.rmdir(parent)
+                except OSError:
+                    pass
+        return freed
+
+    def close(self):
+        if self._current is not None:
+            self._current.close()
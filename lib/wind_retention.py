@@ -0,0 +1,130 @@
+"""Age based retention of the wind tables.
+
+`Retention` keeps a list of tiers, each a table and how many days of rows
+it keeps, e.g.:
+
+    raw readings     7 days
+    1-min rollups    90 days
+    10-min rollups   365 days
+    hourly rollups   forever (None)
+
+`step()` is meant to be called from the main loop every minute or so. Per
+tier it drops at most `max_pages` whole micro_py_database pages
+(`Table.drop_pages_before`), or the day partitions (PartitionedTable) /
+closed JSONL segments (FileTable) older than the tier's cutoff, and returns
+the bytes freed. Nothing is rewritten, so a step costs a few stats and
+removes. BinaryTable files can't be cut from the front and are skipped.
+
+When the filesystem at `statvfs_path` has less than `min_free` of its space
+left and a step found nothing more to drop, the kept ages are halved (down
+to `min_keep_days`); once there is `2 * min_free` free again they go back
+to the configured ones.
+"""
+import os
+import time
+
+DAY_SECONDS = 86400
+RETENTION_DAYS = {'raw': 7, '1m': 90, '10m': 365, '1h': None, 'metrics': 90}
+MIN_FREE_RATIO = 0.1
+MIN_KEEP_DAYS = 1
+
+
+def free_ratio(path):
+    """Free fraction of the filesystem holding path, None if unknown."""
+    try:
+        st = os.statvfs(path)
+    except (OSError, AttributeError):
+        return None
+    # (f_bsize, f_frsize, f_blocks, f_bfree, f_bavail, ...)
+    if not st[2]:
+        return None
+    return st[4] / st[2]
+
+
+def _base_table(tbl):
+    """Table behind wrappers (BufferedTable, RollupTable)."""
+    while getattr(tbl, 'table', None) is not None:
+        tbl = tbl.table
+    return tbl
+
+
+def drop_before(tbl, cutoff, max_pages=None):
+    """Drop whole pages/partitions/segments of tbl older than cutoff (epoch
+    seconds). Returns the bytes freed."""
+    tbl = _base_table(tbl)
+    if hasattr(tbl, 'drop_pages_before') and getattr(tbl, 'catalog_column', None):
+        return tbl.drop_pages_before(cutoff, max_pages)
+    if hasattr(tbl, 'drop_partitions_before'):
+        return tbl.drop_partitions_before(cutoff)
+    if hasattr(tbl, 'prune_segments_before'):
+        return tbl.prune_segments_before(cutoff)
+    return 0
+
+
+class Retention:
+    """Per tier retention, run incrementally with step()."""
+
+    def __init__(self, statvfs_path=None, min_free=MIN_FREE_RATIO,
+                 min_keep_days=MIN_KEEP_DAYS, max_pages=1):
+        self.statvfs_path = statvfs_path
+        self.min_free = min_free
+        self.min_keep_s = min_keep_days * DAY_SECONDS
+        self.max_pages = max_pages
+        self.tiers = []
+        # Kept ages are multiplied by this while space is short.
+        self.scale = 1.0
+        self.free = None
+        self.freed = {}
+
+    def add_tier(self, name, table, keep_days):
+        """Keep keep_days of rows in table (None: keep everything)."""
+        if table is None:
+            return
+        keep_s = None if keep_days is None else keep_days * DAY_SECONDS
+        self.tiers.append((name, table, keep_s))
+        self.freed.setdefault(name, 0)
+
+    def __short_of_space(self):
+        if self.statvfs_path is None:
+            return False
+        self.free = free_ratio(self.statvfs_path)
+        if self.free is None:
+            return False
+        if self.free >= 2 * self.min_free:
+            self.scale = 1.0
+        return self.free < self.min_free
+
+    def keep_seconds(self, keep_s):
+        """Age kept for a tier right now (tightened while space is short)."""
+        if keep_s is None:
+            return None
+        return max(self.min_keep_s, keep_s * self.scale)
+
+    def step(self, now=None):
+        """Drop what's expired, a little per tier. Returns the bytes freed."""
+        if now is None:
+            now = time.time()
+        short = self.__short_of_space()
+        freed = 0
+        for name, table, keep_s in self.tiers:
+            keep = self.keep_seconds(keep_s)
+            if keep is None:
+                continue
+            try:
+                n = drop_before(table, now - keep, self.max_pages)
+            except Exception as e:
+                print('Retention error ({}):'.format(name), e)
+                continue
+            self.freed[name] += n
+            freed += n
+        if short and not freed:
+            # Nothing left to drop at these ages: keep less.
+            self.scale /= 2
+        return freed
+
+    def status(self):
+        return {
+            'free': self.free,
+            'scale': self.scale,
+            'freed': dict(self.freed),
+        }
@@ -0,0 +1,282 @@
+"""Pre-aggregated wind readings (rollups) per minute, 10 minutes and hour.
+
+Every reading inserted through `RollupTable` is added to the open bucket of
+each level. When a bucket closes it's written as one row to the level table
+(`<table>_1m`, `<table>_10m`, `<table>_1h`) with columns:
+
+    ts     bucket start (epoch seconds)
+    count  readings
+    n      readings with a wind speed
+    sum, sumsq, min, max   of the wind speed (min/max are null when n == 0)
+    oos    out of scale readings
+
+A 24 h chart reads 144 10-minute rows instead of 86400 readings, and
+`Rollup.window()` combines a time window from the coarsest buckets that fit
+in it. Open buckets live in RAM and are written on close(); a bucket can
+then appear twice (before and after a restart), which readers simply add up.
+"""
+import time
+
+from lib.wind_values import to_float, to_bool
+
+# (bucket seconds, table name suffix), finest first.
+ROLLUP_LEVELS = ((60, '1m'), (600, '10m'), (3600, '1h'))
+ROLLUP_COLUMNS = {'ts': int, 'count': int, 'n': int, 'sum': float, 'sumsq': float,
+                  'min': float, 'max': float, 'oos': int}
+ROLLUP_ROWS_PER_PAGE = 1000
+ROLLUP_MAX_ROWS = 1000000
+
+# Bucket list slots.
+_TS, _COUNT, _N, _SUM, _SUMSQ, _MIN, _MAX, _OOS = range(8)
+
+
+def _new_bucket(start):
+    return [start, 0, 0, 0.0, 0.0, None, None, 0]
+
+
+def _bucket_row(b):
+    return {'ts': b[_TS], 'count': b[_COUNT], 'n': b[_N], 'sum': b[_SUM], 'sumsq': b[_SUMSQ],
+            'min': b[_MIN], 'max': b[_MAX], 'oos': b[_OOS]}
+
+
+def empty_aggregate():
+    """Aggregate with nothing in it (same keys as a rollup row, no ts)."""
+    return {'count': 0, 'n': 0, 'sum': 0.0, 'sumsq': 0.0, 'min': None, 'max': None, 'oos': 0}
+
+
+def merge_aggregate(agg, row):
+    """Add a rollup row (or another aggregate) into agg, in place."""
+    agg['count'] += row.get('count') or 0
+    agg['n'] += row.get('n') or 0
+    agg['sum'] += row.get('sum') or 0.0
+    agg['sumsq'] += row.get('sumsq') or 0.0
+    mn = row.get('min')
+    if mn is not None and (agg['min'] is None or mn < agg['min']):
+        agg['min'] = mn
+    mx = row.get('max')
+    if mx is not None and (agg['max'] is None or mx > agg['max']):
+        agg['max'] = mx
+    agg['oos'] += row.get('oos') or 0
+    return agg
+
+
+def aggregate_mean(agg):
+    return agg['sum'] / agg['n'] if agg.get('n') else None
+
+
+def aggregate_stddev(agg):
+    n = agg.get('n')
+    if not n:
+        return None
+    mean = agg['sum'] / n
+    var = agg['sumsq'] / n - mean * mean
+    return var ** 0.5 if var > 0 else 0.0
+
+
+def summarize_aggregate(agg):
+    """Compact text like summarize_records() for an aggregate."""
+    if not agg or not agg.get('count'):
+        return 'no data'
+    parts = ['n={}'.format(agg['count'])]
+    mean = aggregate_mean(agg)
+    if mean is not None:
+        parts.append('avg={:.2f}'.format(mean))
+        parts.append('min={:.2f}'.format(agg['min']))
+        parts.append('max={:.2f}'.format(agg['max']))
+        parts.append('std={:.2f}'.format(aggregate_stddev(agg)))
+    parts.append('oos={}'.format(agg['oos']))
+    return ' '.join(parts)
+
+
+class Rollup:
+    """Running 1-min/10-min/hourly aggregates backed by one table per level.
+
+    `tables` maps bucket seconds to a table with insert() and scan_reverse()
+    (micro_py_database Table or FileTable).
+    """
+
+    def __init__(self, tables):
+        self.tables = tables
+        self.levels = sorted(tables.keys())
+        self._open = {}
+
+    def add(self, ts, speed, out_of_scale):
+        """Add one reading; closed buckets are written to their table."""
+        if ts is None:
+            return
+        ts = int(ts)
+        for res in self.levels:
+            start = ts - ts % res
+            b = self._open.get(res)
+            if b is None or b[_TS] != start:
+                if b is not None and b[_COUNT]:
+                    self.__write(res, b)
+                b = _new_bucket(start)
+                self._open[res] = b
+            b[_COUNT] += 1
+            if speed is not None:
+                b[_N] += 1
+                b[_SUM] += speed
+                b[_SUMSQ] += speed * speed
+                if b[_MIN] is None or speed < b[_MIN]:
+                    b[_MIN] = speed
+                if b[_MAX] is None or speed > b[_MAX]:
+                    b[_MAX] = speed
+            if out_of_scale:
+                b[_OOS] += 1
+
+    def add_record(self, rec):
+        """Add a record dict as stored by lib.wind_db.insert_record."""
+        if not isinstance(rec, dict):
+            return
+        ts = to_float(rec.get('timestamp'))
+        self.add(ts, to_float(rec.get('windspeed')), to_bool(rec.get('outofscale')))
+
+    def __write(self, res, b):
+        try:
+            self.tables[res].insert(_bucket_row(b))
+        except Exception as e:
+            print('Rollup write error:', e)
+
+    def iter_buckets(self, res, start, end):
+        """Yield rows of level `res` with start <= ts < end, newest first,
+        the open (in RAM) bucket included."""
+        b = self._open.get(res)
+        if b is not None and b[_COUNT] and start <= b[_TS] < end:
+            yield _bucket_row(b)
+
+        def _stop(row):
+            ts = row.get('ts') if isinstance(row, dict) else None
+            return ts is not None and ts < start
+
+        for row in self.tables[res].scan_reverse(stop_predicate=_stop):
+            ts = row.get('ts') if isinstance(row, dict) else None
+            if ts is not None and ts < end:
+                yield row
+
+    def series(self, res, since, until=None):
+        """Rows of level `res` from since to until (default: now), oldest
+        first; rows written twice for the same bucket are merged."""
+        if until is None:
+            until = time.time()
+        start = int(since) - int(since) % res
+        out = []
+        for row in self.iter_buckets(res, start, until):
+            if out and out[-1]['ts'] == row['ts']:
+                merge_aggregate(out[-1], row)
+            else:
+                out.append(merge_aggregate({'ts': row['ts'], 'count': 0, 'n': 0, 'sum': 0.0,
+                                            'sumsq': 0.0, 'min': None, 'max': None, 'oos': 0}, row))
+        out.reverse()
+        return out
+
+    def window(self, since, until=None):
+        """Aggregate of the readings from since to until (default: now),
+        at one minute resolution: full hours come from hourly rows, the
+        rest from 10-minute and then 1-minute rows."""
+        if until is None:
+            until = time.time()
+        finest = self.levels[0]
+        lo = int(since) - int(since) % finest
+        agg = empty_aggregate()
+        self.__cover(agg, lo, until, len(self.levels) - 1)
+        return agg
+
+    def __cover(self, agg, lo, hi, level):
+        if lo >= hi:
+            return
+        res = self.levels[level]
+        if level == 0:
+            for row in self.iter_buckets(res, lo, hi):
+                merge_aggregate(agg, row)
+            return
+        a = lo + (-lo) % res
+        b = int(hi) - int(hi) % res
+        if a < b:
+            for row in self.iter_buckets(res, a, b):
+                merge_aggregate(agg, row)
+            self.__cover(agg, lo, a, level - 1)
+            self.__cover(agg, b, hi, level - 1)
+        else:
+            self.__cover(agg, lo, hi, level - 1)
+
+    def close(self):
+        """Write the open buckets and close the tables."""
+        for res in self.levels:
+            b = self._open.get(res)
+            if b is not None and b[_COUNT]:
+                self.__write(res, b)
+        self._open = {}
+        for res in self.levels:
+            if hasattr(self.tables[res], 'close'):
+                self.tables[res].close()
+
+
+class RollupTable:
+    """Table wrapper that feeds every inserted record to a Rollup.
+
+    Everything else is forwarded to the wrapped table; `rollup` is reachable
+    through outer wrappers (e.g. BufferedTable) as `tbl.rollup`.
+    """
+
+    def __init__(self, table, rollup):
+        self.table = table
+        self.rollup = rollup
+
+    def __getattr__(self, name):
+        return getattr(self.table, name)
+
+    def insert(self, record):
+        records = record if isinstance(record, list) else [record]
+        before = getattr(self.table, 'current_row', None)
+        try:
+            result = self.table.insert(record)
+        except Exception:
+            self.__add_written(records, before)
+            raise
+        if result is False:
+            # Nothing written as far as the table can tell (FileTable).
+            self.__add_written(records, before)
+            return result
+        for rec in records:
+            self.rollup.add_record(rec)
+        return result
+
+    def __add_written(self, records, before):
+        """Count the rows a failed insert did write (by current_row); the
+        caller (BufferedTable) only retries the others."""
+        after = getattr(self.table, 'current_row', None)
+        if before is not None and after is not None:
+            for rec in records[:max(0, after - before)]:
+                self.rollup.add_record(rec)
+
+    def close(self):
+        self.rollup.close()
+        if hasattr(self.table, 'close'):
+            self.table.close()
+
+
+def get_rollup(tbl):
+    """Rollup behind a (possibly wrapped) table, None if it has none.
+
+    Pending buffered records are flushed first, so their buckets count.
+    """
+    rollup = getattr(tbl, 'rollup', None)
+    if rollup is None:
+        return None
+    if hasattr(tbl, 'pending') and hasattr(tbl, 'flush'):
+        tbl.flush()
+    return rollup
+
+
+def open_rollup(db_path, table_name='readings'):
+    """Rollup with one table per level (`<table_name>_1m`, ...) next to the
+    readings table; see lib.wind_db.open_side_table."""
+    from lib.wind_db import open_side_table
+
+    tables = {}
+    for res, suffix in ROLLUP_LEVELS:
+        tables[res] = open_side_table(db_path, '{}_{}'.format(table_name, suffix), ROLLUP_COLUMNS,
+                                      catalog_column='ts', rows_per_page=ROLLUP_ROWS_PER_PAGE,
+                                      max_rows=ROLLUP_MAX_ROWS)
+    return Rollup(tables)
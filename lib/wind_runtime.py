@@ -0,0 +1,220 @@
+"""Cooperative asyncio (uasyncio) runtime for the wind station.
+
+One scheduler, one task per job:
+
+- acquisition: per-second records from the second core (`Acquisition`,
+  drained every `poll_s`) or sampled inline with
+  `FastSampler.sample_second_async()`, which yields to the other tasks
+  between reads; each record goes to `on_record(rec)`. Without a sampler,
+  `on_idle()` is called once per second (e.g. sensor missing / retry).
+- flush: writes buffered readings (`db.flush()`) every `flush_s`
+- telegram: `telegram_bot.poll()` every `telegram_s`
+- ntp: `ntp_sync()` every `ntp_s`
+- retention: `retention.step()` every `retention_s` (see wind_retention)
+- http: a small JSON server on `http_port` with the latest record, metrics
+  and sampling figures from `state`, and `/chart?hours=N`: the last N hours
+  of `db` downsampled (lib.wind_downsample) to min/mean/max per bucket,
+  LTTB points and a summary
+
+Tasks sleep when they have nothing to do, so idle time is spent in the
+scheduler. Blocking calls (socket/TLS, SD writes) still block, but the
+sampling no longer waits for them when the acquisition thread is used.
+
+Runs on CPython with stub hardware too (see test/run_runtime_host.py).
+"""
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+import json
+import time
+
+from lib.wind_db import iter_records_since_newest
+from lib.wind_downsample import Downsampler
+
+# /chart: buckets per window, and readings read at most.
+CHART_WIDTH = 48
+CHART_MAX_SCAN = 20000
+
+
+class WindRuntime:
+    def __init__(self, state, on_record=None, sampler=None, acquisition=None, on_idle=None,
+                 db=None, telegram_bot=None, ntp_sync=None, http_port=None, retention=None,
+                 poll_s=0.2, flush_s=10, telegram_s=0.5, ntp_s=6 * 3600, retention_s=60):
+        self.state = state
+        self.on_record = on_record
+        self.sampler = sampler
+        self.acquisition = acquisition
+        self.on_idle = on_idle
+        self.db = db
+        self.telegram_bot = telegram_bot
+        self.ntp_sync = ntp_sync
+        self.http_port = http_port
+        self.retention = retention
+        self.poll_s = poll_s
+        self.flush_s = flush_s
+        self.telegram_s = telegram_s
+        self.ntp_s = ntp_s
+        self.retention_s = retention_s
+        self.running = False
+        self.errors = {}
+        self._server = None
+
+    def _error(self, task, e):
+        self.errors[task] = self.errors.get(task, 0) + 1
+        print('{} task error:'.format(task), e)
+
+    async def acquisition_task(self):
+        while self.running:
+            try:
+                if self.acquisition is not None:
+                    rec = self.acquisition.get()
+                    while rec is not None:
+                        self.on_record(rec)
+                        rec = self.acquisition.get()
+                    await asyncio.sleep(self.poll_s)
+                elif self.sampler is not None:
+                    rec = await self.sampler.sample_second_async(asyncio)
+                    self.on_record(rec)
+                else:
+                    if self.on_idle is not None:
+                        self.on_idle()
+                    await asyncio.sleep(1)
+            except Exception as e:
+                self._error('acquisition', e)
+                await asyncio.sleep(1)
+
+    async def flush_task(self):
+        while self.running:
+            await asyncio.sleep(self.flush_s)
+            try:
+                if self.db is not None and hasattr(self.db, 'flush'):
+                    self.db.flush()
+            except Exception as e:
+                self._error('flush', e)
+
+    async def telegram_task(self):
+        while self.running:
+            try:
+                self.telegram_bot.poll()
+            except Exception as e:
+                self._error('telegram', e)
+            await asyncio.sleep(self.telegram_s)
+
+    async def ntp_task(self):
+        while self.running:
+            await asyncio.sleep(self.ntp_s)
+            try:
+                self.ntp_sync()
+            except Exception as e:
+                self._error('ntp', e)
+
+    async def retention_task(self):
+        while self.running:
+            await asyncio.sleep(self.retention_s)
+            try:
+                freed = self.retention.step()
+                if freed:
+                    print('Retention: freed {} bytes'.format(freed))
+            except Exception as e:
+                self._error('retention', e)
+
+    def status(self):
+        """JSON-able snapshot served over HTTP."""
+        state = self.state if isinstance(self.state, dict) else {}
+        return {
+            'latest_record': state.get('latest_record'),
+            'latest_metrics': state.get('latest_metrics'),
+            'sampling': state.get('sampling'),
+            'retention': self.retention.status() if self.retention is not None else None,
+            'errors': self.errors,
+        }
+
+    def chart(self, hours=6, width=CHART_WIDTH):
+        """JSON-able chart of the last `hours` hours of `db`, one pass over
+        the readings in constant memory."""
+        now = time.time()
+        since = now - hours * 3600
+        ds = Downsampler(since, now, width)
+        if self.db is not None:
+            for rec in iter_records_since_newest(self.db, since_epoch=since,
+                                                 max_scan=CHART_MAX_SCAN):
+                ds.add_record(rec)
+        count, mn, av, mx = ds.summary()
+        return {
+            'since': since,
+            'step': ds.step,
+            'mean': ds.means(),
+            'min': ds.mins(),
+            'max': ds.maxs(),
+            'lttb': [[ts, v] for ts, v in ds.lttb()],
+            'summary': {'count': count, 'min': mn, 'mean': av, 'max': mx},
+        }
+
+    async def _http_client(self, reader, writer):
+        try:
+            line = await reader.readline()
+            # Skip the headers.
+            while True:
+                h = await reader.readline()
+                if not h or h in (b'\r\n', b'\n'):
+                    break
+            parts = line.decode().split()
+            path = parts[1] if len(parts) > 1 else '/'
+            path, _, query = path.partition('?')
+            if path in ('/', '/status', '/data'):
+                body = json.dumps(self.status())
+                head = 'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+            elif path == '/chart':
+                hours = 6
+                for arg in query.split('&'):
+                    if arg.startswith('hours=') and arg[6:].isdigit():
+                        hours = max(1, min(24, int(arg[6:])))
+                body = json.dumps(self.chart(hours))
+                head = 'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n'
+            else:
+                body = '404 Not Found'
+                head = 'HTTP/1.1 404 Not Found\r\nContent-Type: text/plain\r\n'
+            writer.write((head + 'Connection: close\r\n\r\n' + body).encode())
+            await writer.drain()
+        except Exception as e:
+            self._error('http', e)
+        finally:
+            try:
+                writer.close()
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    async def run(self, duration_s=None):
+        """Run every configured task; forever, or for duration_s seconds."""
+        self.running = True
+        tasks = [asyncio.create_task(self.acquisition_task())]
+        if self.db is not None:
+            tasks.append(asyncio.create_task(self.flush_task()))
+        if self.telegram_bot is not None:
+            tasks.append(asyncio.create_task(self.telegram_task()))
+        if self.ntp_sync is not None:
+            tasks.append(asyncio.create_task(self.ntp_task()))
+        if self.retention is not None:
+            tasks.append(asyncio.create_task(self.retention_task()))
+        if self.http_port is not None:
+            self._server = await asyncio.start_server(self._http_client, '0.0.0.0', self.http_port)
+        try:
+            if duration_s is None:
+                while self.running:
+                    await asyncio.sleep(1)
+            else:
+                await asyncio.sleep(duration_s)
+        finally:
+            self.running = False
+            for t in tasks:
+                t.cancel()
+            if self._server is not None:
+                self._server.close()
+                await self._server.wait_closed()
+                self._server = None
+
+    def stop(self):
+        self.running = False
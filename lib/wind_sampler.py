@@ -0,0 +1,164 @@
+"""Anemometer sampling faster than the storage rate.
+
+`FastSampler.sample_second()` reads the sensor `rate_hz` times over one
+second on a ticks_us schedule (a tight loop that sleeps until each slot,
+no Timer IRQ, so I2C reads never run in interrupt context) and returns
+one record per second:
+
+    timestamp   time.time() at the end of the second
+    mean, min, max, std    of the valid wind speed samples (None if none)
+    oos         True if any sample was out of scale or missing
+    samples     valid samples
+    jitter_max_us, jitter_mean_us   how late the reads were vs. schedule
+
+`max_gap_us` is the longest time seen between two consecutive reads, also
+across calls: it shows how long other work kept the sampler from running.
+
+So the stored data rate stays at one record per second while gusts and
+turbulence are no longer aliased by a single read.
+"""
+import time
+
+try:
+    _ticks_us = time.ticks_us
+    _ticks_diff = time.ticks_diff
+    _ticks_add = time.ticks_add
+    _sleep_us = time.sleep_us
+except AttributeError:
+    # CPython (host tests)
+    def _ticks_us():
+        return int(time.perf_counter() * 1000000)
+
+    def _ticks_diff(a, b):
+        return a - b
+
+    def _ticks_add(a, b):
+        return a + b
+
+    def _sleep_us(us):
+        time.sleep(us / 1000000)
+
+
+class SecondStats:
+    """Running mean/min/max/std of the samples of one second (Welford)."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.oos = False
+
+    def add(self, speed, out_of_scale):
+        if out_of_scale:
+            self.oos = True
+        if speed is None:
+            self.oos = True
+            return
+        self.n += 1
+        delta = speed - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (speed - self.mean)
+        if self.min is None or speed < self.min:
+            self.min = speed
+        if self.max is None or speed > self.max:
+            self.max = speed
+
+    def std(self):
+        return (self.m2 / self.n) ** 0.5 if self.n else None
+
+
+class FastSampler:
+    """Reads `read_speed()` -> (speed, out_of_scale) at `rate_hz`."""
+
+    def __init__(self, read_speed, rate_hz=20):
+        self.read_speed = read_speed
+        self.rate_hz = max(1, int(rate_hz))
+        self.period_us = 1000000 // self.rate_hz
+        self.stats = SecondStats()
+        self.jitter_max_us = 0
+        self.max_gap_us = 0
+        self._last_read_us = None
+        self._jitter_max = 0
+        self._jitter_sum = 0
+        self._slot = 0
+        self.last = None
+
+    def sample_second(self):
+        """Sample for one second and return its record (see module doc)."""
+        due = self._begin_second()
+        for _ in range(self.rate_hz):
+            wait = _ticks_diff(due, _ticks_us())
+            if wait > 0:
+                _sleep_us(wait)
+            due = self._read_slot(due)
+        # Let the second end on schedule.
+        wait = _ticks_diff(due, _ticks_us())
+        if wait > 0:
+            _sleep_us(wait)
+        return self._end_second()
+
+    async def sample_second_async(self, asyncio):
+        """sample_second() for an asyncio/uasyncio scheduler: waits between
+        reads with asyncio.sleep_ms (or sleep), letting other tasks run."""
+        sleep_ms = getattr(asyncio, 'sleep_ms', None)
+        due = self._begin_second()
+        for _ in range(self.rate_hz + 1):
+            wait = _ticks_diff(due, _ticks_us())
+            if wait > 0:
+                if sleep_ms is not None:
+                    await sleep_ms(wait // 1000)
+                else:
+                    await asyncio.sleep(wait / 1000000)
+            if self._slot == self.rate_hz:
+                break
+            due = self._read_slot(due)
+        return self._end_second()
+
+    def _begin_second(self):
+        self.stats.reset()
+        self._jitter_max = 0
+        self._jitter_sum = 0
+        self._slot = 0
+        return _ticks_us()
+
+    def _read_slot(self, due):
+        """Read the sensor for the slot due at `due`; returns the next due."""
+        late = _ticks_diff(_ticks_us(), due)
+        if late > self._jitter_max:
+            self._jitter_max = late
+        self._jitter_sum += late if late > 0 else 0
+        now = _ticks_us()
+        if self._last_read_us is not None:
+            gap = _ticks_diff(now, self._last_read_us)
+            if gap > self.max_gap_us:
+                self.max_gap_us = gap
+        self._last_read_us = now
+        try:
+            speed, out_of_scale = self.read_speed()
+        except Exception:
+            speed, out_of_scale = None, True
+        self.stats.add(speed, out_of_scale)
+        self._slot += 1
+        return _ticks_add(due, self.period_us)
+
+    def _end_second(self):
+        st = self.stats
+        if self._jitter_max > self.jitter_max_us:
+            self.jitter_max_us = self._jitter_max
+        self.last = {
+            'timestamp': time.time(),
+            'mean': st.mean if st.n else None,
+            'min': st.min,
+            'max': st.max,
+            'std': st.std(),
+            'oos': st.oos,
+            'samples': st.n,
+            'jitter_max_us': self._jitter_max,
+            'jitter_mean_us': self._jitter_sum // self.rate_hz,
+        }
+        return self.last
@@ -0,0 +1,150 @@
+"""One-pass wind statistics with constant memory.
+
+`WindStats` is fed from any record iterator (order doesn't matter) and
+keeps:
+
+- count of records, of wind speed samples and of out of scale records
+- mean/variance (Welford), min/max of the wind speed
+- a fixed-bin histogram (HIST_BIN_WIDTH m/s bins up to HIST_MAX) for
+  percentiles
+- first/last timestamp and the number of gaps longer than `gap_s` seconds
+  between consecutive records (in the order they were added)
+
+Accumulators of different ranges or partitions can be merged, and saved
+with to_dict()/from_dict() (plain JSON types).
+"""
+from array import array
+
+from lib.wind_values import to_float, to_bool
+
+HIST_BIN_WIDTH = 0.5
+HIST_MAX = 40.0
+HIST_BINS = int(HIST_MAX / HIST_BIN_WIDTH) + 1  # last bin: >= HIST_MAX
+# Readings are 1 s apart; a longer silence counts as a gap.
+GAP_SECONDS = 5
+
+
+class WindStats:
+    """Streaming, mergeable wind speed statistics."""
+
+    def __init__(self, gap_s=GAP_SECONDS):
+        self.gap_s = gap_s
+        self.count = 0
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+        self.oos = 0
+        self.gaps = 0
+        self.first_ts = None
+        self.last_ts = None
+        self._prev_ts = None
+        self.hist = array('I', [0] * HIST_BINS)
+
+    def add(self, ts, speed, out_of_scale=False):
+        self.count += 1
+        if out_of_scale:
+            self.oos += 1
+        if ts is not None:
+            if self._prev_ts is not None and abs(ts - self._prev_ts) > self.gap_s:
+                self.gaps += 1
+            self._prev_ts = ts
+            if self.first_ts is None or ts < self.first_ts:
+                self.first_ts = ts
+            if self.last_ts is None or ts > self.last_ts:
+                self.last_ts = ts
+        if speed is None:
+            return
+        self.n += 1
+        delta = speed - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (speed - self.mean)
+        if self.min is None or speed < self.min:
+            self.min = speed
+        if self.max is None or speed > self.max:
+            self.max = speed
+        i = int(speed / HIST_BIN_WIDTH) if speed > 0 else 0
+        self.hist[i if i < HIST_BINS else HIST_BINS - 1] += 1
+
+    def add_record(self, rec):
+        """Add a record dict as returned by the lib.wind_db readers."""
+        if not isinstance(rec, dict):
+            return
+        self.add(to_float(rec.get('timestamp')), to_float(rec.get('windspeed')),
+                 to_bool(rec.get('outofscale')))
+
+    def add_records(self, records):
+        for rec in records:
+            self.add_record(rec)
+        return self
+
+    def variance(self):
+        return self.m2 / self.n if self.n else None
+
+    def stddev(self):
+        return (self.m2 / self.n) ** 0.5 if self.n else None
+
+    def oos_ratio(self):
+        return self.oos / self.count if self.count else None
+
+    def percentile(self, p):
+        """Approximate p-th percentile (0-100) of the wind speed, linear
+        inside the histogram bin and clamped to min/max."""
+        if not self.n:
+            return None
+        target = self.n * p / 100.0
+        seen = 0
+        for i in range(HIST_BINS):
+            c = self.hist[i]
+            if c and seen + c >= target:
+                value = (i + (target - seen) / c) * HIST_BIN_WIDTH
+                if value < self.min:
+                    return self.min
+                if value > self.max:
+                    return self.max
+                return value
+            seen += c
+        return self.max
+
+    def merge(self, other):
+        """Add another accumulator (e.g. of another partition) into this one.
+        Gaps between the two ranges aren't counted."""
+        if other.n:
+            n = self.n + other.n
+            delta = other.mean - self.mean
+            self.mean += delta * other.n / n
+            self.m2 += other.m2 + delta * delta * self.n * other.n / n
+            self.n = n
+            if self.min is None or other.min < self.min:
+                self.min = other.min
+            if self.max is None or other.max > self.max:
+                self.max = other.max
+            for i in range(HIST_BINS):
+                self.hist[i] += other.hist[i]
+        self.count += other.count
+        self.oos += other.oos
+        self.gaps += other.gaps
+        if other.first_ts is not None and (self.first_ts is None or other.first_ts < self.first_ts):
+            self.first_ts = other.first_ts
+        if other.last_ts is not None and (self.last_ts is None or other.last_ts > self.last_ts):
+            self.last_ts = other.last_ts
+        return self
+
+    def to_dict(self):
+        return {
+            'count': self.count, 'n': self.n, 'mean': self.mean, 'm2': self.m2,
+            'min': self.min, 'max': self.max, 'oos': self.oos, 'gaps': self.gaps,
+            'first_ts': self.first_ts, 'last_ts': self.last_ts, 'gap_s': self.gap_s,
+            'hist': list(self.hist),
+        }
+
+    @staticmethod
+    def from_dict(data):
+        stats = WindStats(data.get('gap_s', GAP_SECONDS))
+        for key in ('count', 'n', 'mean', 'm2', 'min', 'max', 'oos', 'gaps', 'first_ts', 'last_ts'):
+            setattr(stats, key, data[key])
+        hist = data.get('hist') or []
+        for i in range(min(len(hist), HIST_BINS)):
+            stats.hist[i] = hist[i]
+        return stats
@@ -8,12 +8,15 @@ Commands:
 - /status              -> current/latest reading
 - /last [n]            -> last n readings (default 5, max 20)
 - /stats [n]           -> min/avg/max over last n readings (default 60, max 1000)
+- /stats <h>h          -> min/avg/max/std over the last h hours (from rollups)
 
 The bot reads from the DB table passed in (micro_py_database Table) or the
 FileTable fallback (JSONL) provided by lib.wind_db.
 """
 
-from lib.wind_db import get_latest_record, iter_last_records, summarize_records, format_timestamp, iter_records_since_newest
+from lib.wind_db import get_latest_record, iter_last_records, iter_newest_records, summarize_records, format_timestamp, iter_records_since_newest
+from lib.wind_downsample import Downsampler
+from lib.wind_rollup import get_rollup, merge_aggregate, empty_aggregate, aggregate_mean, summarize_aggregate
 from lib.get_ntp_time import getTimeNTP, ntp_utc_to_europe_rome
 
 
@@ -88,10 +91,22 @@ def _record_key_for_display(rec):
     ts = format_timestamp(ts_raw) if ts_raw != '' else ''
     ws = rec.get('windspeed', '')
     oos = rec.get('outofscale', '')
-    msg = rec.get('message', '')
+    # Missing messages are null (older rows: '').
+    msg = rec.get('message') or ''
     return (ts, str(ws), str(oos), str(msg))
 
 
+def _format_metrics(m):
+    """One line with gust / sustained wind / turbulence (wind_metrics)."""
+    parts = []
+    for key, label in (('gust', 'raffica'), ('avg2m', 'media 2m'), ('avg10m', 'media 10m'),
+                       ('std10m', 'std 10m'), ('ti10m', 'TI')):
+        v = m.get(key)
+        if v is not None:
+            parts.append('{}={:.2f}'.format(label, v))
+    return ' '.join(parts) if parts else 'metriche: n/d'
+
+
 def _parse_int(s, default):
     try:
         return int(s)
@@ -114,13 +129,6 @@ def _urlquote(s):
     return ''.join(out)
 
 
-def _to_float(v):
-    try:
-        return float(v)
-    except Exception:
-        return None
-
-
 def _csv_escape(v):
     try:
         s = '' if v is None else str(v)
@@ -132,22 +140,48 @@ def _csv_escape(v):
     return s
 
 
-def _build_quickchart_url(values, width=600, height=300):
+def _round_series(values):
+    # Two decimals are plenty for a chart and keep the URL short.
+    return [None if v is None else round(v, 2) for v in values]
+
+
+def _build_quickchart_url(values, width=600, height=300, low=None, high=None):
     # values: list of numbers or None
+    # low/high: optional per point min/max, drawn as a band around the line
     # Chart.js v2 config (QuickChart default)
+    datasets = [
+        {
+            'label': 'Wind (m/s)',
+            'data': _round_series(values),
+            'fill': False,
+            'spanGaps': False,
+            'lineTension': 0,
+            'pointRadius': 0,
+        }
+    ]
+    if low is not None and high is not None:
+        datasets.append({
+            'label': 'min',
+            'data': _round_series(low),
+            'fill': False,
+            'lineTension': 0,
+            'pointRadius': 0,
+            'borderWidth': 0,
+        })
+        datasets.append({
+            'label': 'max',
+            'data': _round_series(high),
+            # Fill down to the min dataset right before it.
+            'fill': '-1',
+            'lineTension': 0,
+            'pointRadius': 0,
+            'borderWidth': 0,
+            'backgroundColor': 'rgba(54,162,235,0.25)',
+        })
     cfg = {
         'type': 'line',
         'data': {
-            'datasets': [
-                {
-                    'label': 'Wind (m/s)',
-                    'data': values,
-                    'fill': False,
-                    'spanGaps': False,
-                    'lineTension': 0,
-                    'pointRadius': 0,
-                }
-            ]
+            'datasets': datasets
         },
         'options': {
             'legend': {'display': False},
@@ -227,7 +261,9 @@ class WindTelegramBot:
             return 'no data'
         ts_raw = rec.get('timestamp', '')
         ts = format_timestamp(ts_raw) if ts_raw != '' else ''
-        ws = rec.get('windspeed', '')
+        ws = rec.get('windspeed')
+        if ws is None:
+            ws = ''
         oos = rec.get('outofscale', '')
         if oos == '':
             oos = rec.get('outofscale', '')
@@ -247,7 +283,9 @@ class WindTelegramBot:
             return 'no data'
         ts_raw = rec.get('timestamp', '')
         ts = format_timestamp(ts_raw) if ts_raw != '' else ''
-        ws = rec.get('windspeed', '')
+        ws = rec.get('windspeed')
+        if ws is None:
+            ws = ''
         oos = rec.get('outofscale', '')
         msg = rec.get('message', '')
 
@@ -269,7 +307,7 @@ class WindTelegramBot:
             return
 
         if text.startswith('/start') or text.startswith('/help'):
-            self._reply(chat_id, 'Comandi: /status, /last [n], /stats [n], /chart6, /chart24, /csv6, /csv24, /rtc, /sync_rtc, /chatid')
+            self._reply(chat_id, 'Comandi: /status, /last [n], /stats [n|<h>h], /chart6, /chart24, /csv6, /csv24, /rtc, /sync_rtc, /chatid')
             return
 
         if text.startswith('/chatid'):
@@ -287,7 +325,16 @@ class WindTelegramBot:
                 rec = None
             if not rec:
                 rec = get_latest_record(self.db_table)
-            self._reply(chat_id, self._format_record(rec))
+            text = self._format_record(rec)
+            metrics = self.state.get('latest_metrics') if isinstance(self.state, dict) else None
+            if metrics:
+                text += '\n' + _format_metrics(metrics)
+            sampling = self.state.get('sampling') if isinstance(self.state, dict) else None
+            if sampling:
+                text += '\ncampionamento {} Hz ({} letture), jitter max={}us medio={}us, buco max={}ms'.format(
+                    sampling['rate_hz'], sampling['samples'], sampling['jitter_max_us'], sampling['jitter_mean_us'],
+                    sampling.get('max_gap_us', 0) // 1000)
+            self._reply(chat_id, text)
             return
 
         if text.startswith('/last'):
@@ -334,16 +381,32 @@ class WindTelegramBot:
 
         if text.startswith('/stats'):
             parts = text.split()
+            if len(parts) > 1 and parts[1].endswith('h'):
+                # Time window from the pre-aggregated buckets.
+                hours = _parse_int(parts[1][:-1], 24)
+                if hours < 1:
+                    hours = 1
+                rollup = get_rollup(self.db_table)
+                if rollup is None:
+                    self._reply(chat_id, 'stats per ore non disponibili (rollup disattivati)')
+                    return
+                try:
+                    import time
+                except Exception:
+                    import utime as time
+                try:
+                    agg = rollup.window(time.time() - hours * 3600)
+                    self._reply(chat_id, 'ultime {}h: {}'.format(hours, summarize_aggregate(agg)))
+                except Exception as e:
+                    self._reply(chat_id, 'stats error: {}'.format(e))
+                return
             n = _parse_int(parts[1], 60) if len(parts) > 1 else 60
             if n < 1:
                 n = 1
             if n > 1000:
                 n = 1000
-            recs = list(iter_last_records(self.db_table, n))
-            if not recs:
-                self._reply(chat_id, 'no data')
-                return
-            summary = summarize_records(recs)
+            # Streamed: no list of up to 1000 records in RAM.
+            summary = summarize_records(iter_newest_records(self.db_table, n))
             self._reply(chat_id, summary)
             return
 
@@ -390,6 +453,8 @@ class WindTelegramBot:
                 max_rows = 1000
                 wrote = 0
                 truncated = False
+                # min/avg/max of the exported rows for the caption
+                ds = Downsampler(since, now, 1)
                 try:
                     f = open(file_path, 'w')
                     f.write('epoch,timestamp,windspeed,outofscale,message\n')
@@ -409,6 +474,7 @@ class WindTelegramBot:
                             _csv_escape(msg),
                         )
                         f.write(line)
+                        ds.add_record(r)
                         wrote += 1
                         if wrote % 200 == 0:
                             try:
@@ -432,6 +498,9 @@ class WindTelegramBot:
                 caption = 'CSV wind ultime {}h (righe={})'.format(hours, wrote)
                 if truncated:
                     caption += ' [TRONCATO]'
+                count, mn, av, mx = ds.summary()
+                if count:
+                    caption += '\nmin={:.2f} avg={:.2f} max={:.2f}'.format(mn, av, mx)
 
                 try:
                     self._bot.send_document_file(chat_id, file_path, filename=fname, mime_type='text/csv', caption=caption)
@@ -461,19 +530,43 @@ class WindTelegramBot:
                 if text.startswith('/chart6'):
                     hours = 6
                 since = now - (hours * 60 * 60)
-                # Stream records to keep memory low.
-                points = []
+                rollup = get_rollup(self.db_table) if hours == 24 else None
+                if rollup is not None:
+                    # 144 10-minute buckets instead of up to 86400 readings.
+                    rows = rollup.series(600, since, now)
+                    if rows:
+                        agg = empty_aggregate()
+                        # series() skips empty buckets: every row goes to its
+                        # own slot, so an outage stays a gap on the x axis.
+                        start = int(since) - int(since) % 600
+                        slots = (int(now) - start) // 600 + 1
+                        points = [None] * slots
+                        low = [None] * slots
+                        high = [None] * slots
+                        for row in rows:
+                            merge_aggregate(agg, row)
+                            slot = (int(row['ts']) - start) // 600
+                            if 0 <= slot < slots:
+                                points[slot] = aggregate_mean(row)
+                                low[slot] = row.get('min')
+                                high[slot] = row.get('max')
+                        url = _build_quickchart_url(points, low=low, high=high)
+                        caption = 'Wind ultime {}h (campioni={}, medie 10 min)'.format(hours, agg['count'])
+                        if agg['n']:
+                            caption += '\nmin={:.2f} avg={:.2f} max={:.2f}'.format(
+                                agg['min'], aggregate_mean(agg), agg['max'])
+                        try:
+                            self._bot.send_photo(chat_id, url, caption=caption)
+                        except Exception:
+                            self._reply(chat_id, caption + '\n' + url)
+                        return
+
+                # One pass over the records into 48 time buckets.
+                ds = Downsampler(since, now, 48)
                 seen = 0
                 for r in iter_records_since_newest(self.db_table, since_epoch=since, max_scan=20000):
-                    if not isinstance(r, dict):
-                        continue
-                    ws = _to_float(r.get('windspeed'))
-                    points.append(ws)
+                    ds.add_record(r)
                     seen += 1
-                    # Keep bounded by repeatedly decimating.
-                    max_points = 48
-                    while len(points) > max_points:
-                        points = points[::2]
                     if seen % 250 == 0:
                         try:
                             import gc
@@ -481,27 +574,14 @@ class WindTelegramBot:
                         except Exception:
                             pass
 
-                if not points:
+                count, mn, av, mx = ds.summary()
+                if not count:
                     self._reply(chat_id, 'Nessun dato windspeed nelle ultime {}h'.format(hours))
                     return
 
-                # We iterated newest->oldest; reverse for chart left-to-right.
-                try:
-                    points.reverse()
-                except Exception:
-                    pass
-
-                url = _build_quickchart_url(points)
-
-                # Caption with quick stats
-                vals = [p for p in points if isinstance(p, (int, float))]
-                if vals:
-                    mn = min(vals)
-                    mx = max(vals)
-                    av = sum(vals) / len(vals)
-                    caption = 'Wind ultime {}h (campioni={})\nmin={:.2f} avg={:.2f} max={:.2f}'.format(hours, len(points), mn, av, mx)
-                else:
-                    caption = 'Wind ultime {}h (campioni={})'.format(hours, len(points))
+                # Mean line inside the min/max band of every bucket.
+                url = _build_quickchart_url(ds.means(), low=ds.mins(), high=ds.maxs())
+                caption = 'Wind ultime {}h (campioni={})\nmin={:.2f} avg={:.2f} max={:.2f}'.format(hours, count, mn, av, mx)
 
                 # Send as photo
                 try:
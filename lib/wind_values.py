@@ -0,0 +1,27 @@
+"""Value coercion shared by the wind modules.
+
+Older readings pages store every column as a string ("3.2", "True", "");
+these turn such values (or typed ones) into floats and bools. No imports
+from the other wind modules, so any of them can use it.
+"""
+
+
+def to_float(v):
+    """float of v; None for None, '', bools and anything unparsable."""
+    if isinstance(v, float):
+        return v
+    if v is None or v == '' or isinstance(v, bool):
+        return None
+    try:
+        return float(v)
+    except Exception:
+        return None
+
+
+def to_bool(v):
+    """bool of v; strings like '1', 'true', 'yes' are True, None is False."""
+    if isinstance(v, bool):
+        return v
+    if v is None:
+        return False
+    return str(v).strip().lower() in ('1', 'true', 't', 'yes', 'y')
@@ -1,6 +1,11 @@
 from lib.ina_sensor_reader import init_ina, read_bus_voltage
 from lib.wind_output import voltage_to_wind_speed, min_scale, max_scale, print_wind_info
-from lib.wind_db import init_db, insert_record
+from lib.wind_db import init_db, insert_record, BufferedTable
+from lib.wind_rollup import open_rollup, RollupTable, ROLLUP_LEVELS
+from lib.wind_retention import Retention, RETENTION_DAYS
+from lib.wind_metrics import WindMetrics, open_metrics_table
+from lib.wind_sampler import FastSampler
+from lib.wind_acquisition import Acquisition
 from lib.sdcard_writer import SDCardFS
 from lib.is_pico_w import is_pico_w
 import wifi_credentials
@@ -41,6 +46,40 @@ TIMEZONE = 'Europe/Rome'
 INA_RETRY_INTERVAL_SEC = 5
 INA_MISSING_LOG_INTERVAL_SEC = 10
 
+# Write-behind buffering of readings (one storage write per batch)
+DB_BATCH_SIZE = 10
+DB_MAX_DELAY_SEC = 10
+DB_MAX_PENDING = 60
+# Store readings in one table per day (data/wind/readings/YYYY/MM/DD).
+DB_PARTITIONED = False
+# 'table' (micro_py_database JSON pages) or 'binary' (11 byte records)
+DB_ENGINE = 'table'
+# Readings kept before the oldest are overwritten (ring table); SD / internal flash
+DB_RING_ROWS = 7 * 86400
+DB_RING_ROWS_INTERNAL = 4000
+# Fallback JSONL file: keep it open and flush every N seconds (None: reopen per write)
+DB_FILE_SYNC_SEC = 30
+# Keep 1-min/10-min/hourly aggregates (used by /chart24 and /stats <h>h)
+DB_ROLLUPS = True
+# Drop whole pages older than RETENTION_DAYS per tier (raw 7 d, 1-min 90 d,
+# 10-min 365 d, hourly forever), a few per step; kept ages shrink when
+# storage runs low
+RETENTION_INTERVAL_SEC = 60
+# Anemometer reads per second; each second is stored as one mean/min/max/std record
+SAMPLE_RATE_HZ = 20
+# Sample on the second core (_thread); needs the INA3221 present at boot
+ACQUISITION_THREAD = True
+ACQUISITION_POLL_SEC = 0.2
+
+# Gust / 2-min / 10-min / turbulence metrics, one record per period
+WIND_METRICS_PERIOD_SEC = 60
+
+# One uasyncio scheduler for sampling, storage, Telegram, NTP and HTTP
+# (falls back to the polling loop when asyncio isn't available)
+USE_ASYNCIO = True
+HTTP_PORT = 80
+NTP_RESYNC_SEC = 6 * 3600
+
 IS_PICO_W = is_pico_w()
 
 # Set up RTC (for timestamping without WiFi)
@@ -78,7 +117,23 @@ except Exception as e:
 
 # Init DB (pass SD path when available)
 db_path = SD_MOUNT_POINT + '/data/wind' if use_sd else None
-db = init_db(db_path=db_path) if db_path else init_db()
+if db_path:
+    db = init_db(db_path=db_path, partitioned=DB_PARTITIONED, engine=DB_ENGINE,
+                 file_sync_s=DB_FILE_SYNC_SEC, ring_rows=DB_RING_ROWS)
+else:
+    db = init_db(partitioned=DB_PARTITIONED, engine=DB_ENGINE, file_sync_s=DB_FILE_SYNC_SEC,
+                 ring_rows=DB_RING_ROWS_INTERNAL)
+if DB_ROLLUPS:
+    db = RollupTable(db, open_rollup(db_path or 'data/wind'))
+db = BufferedTable(db, batch_size=DB_BATCH_SIZE, max_delay_s=DB_MAX_DELAY_SEC, max_pending=DB_MAX_PENDING)
+wind_metrics = WindMetrics(sample_period_s=1, period_s=WIND_METRICS_PERIOD_SEC)
+metrics_db = open_metrics_table(db_path or 'data/wind')
+retention = Retention(statvfs_path=SD_MOUNT_POINT if use_sd else '/')
+retention.add_tier('raw', db, RETENTION_DAYS['raw'])
+if DB_ROLLUPS:
+    for res, suffix in ROLLUP_LEVELS:
+        retention.add_tier(suffix, db.rollup.tables[res], RETENTION_DAYS[suffix])
+retention.add_tier('metrics', metrics_db, RETENTION_DAYS['metrics'])
 
 # Memory info
 print_memory_info()
@@ -91,17 +146,12 @@ next_ina_retry_ts = 0
 next_ina_missing_log_ts = 0
 
 # Shared state for Telegram /status
-wind_state = {'latest_record': None, 'rtc': rtc, 'timezone': TIMEZONE}
+wind_state = {'latest_record': None, 'latest_metrics': None, 'sampling': None, 'rtc': rtc, 'timezone': TIMEZONE}
 telegram_bot = None
 
-# Connect to WiFi
-if IS_PICO_W:
-    from lib.wifi_connection import connect, scan
 
-    print(scan())
-    connection = connect(wifi_credentials.WIFI_SSID, wifi_credentials.WIFI_PASSWORD)
-    print(connection)
-    # Optionally, get NTP time (requires WiFi)
+def _sync_ntp():
+    """Set the RTCs from NTP (requires WiFi); also run periodically."""
     try:
         ntp_time_utc = getTimeNTP(TIMEZONE)
         print('NTP time (UTC):', ntp_time_utc)
@@ -137,6 +187,17 @@ if IS_PICO_W:
     except Exception as e:
         print("NTP time error:", e)
 
+
+# Connect to WiFi
+if IS_PICO_W:
+    from lib.wifi_connection import connect, scan
+
+    print(scan())
+    connection = connect(wifi_credentials.WIFI_SSID, wifi_credentials.WIFI_PASSWORD)
+    print(connection)
+    # Optionally, get NTP time (requires WiFi)
+    _sync_ntp()
+
     # Telegram bot (optional)
     if TELEGRAM_BOT_TOKEN:
         try:
@@ -152,63 +213,171 @@ if IS_PICO_W:
         except Exception as e:
             print('Telegram bot init error:', e)
 
-try:
-    while True:
-        if telegram_bot is not None:
-            telegram_bot.poll()
 
-        if ina is not None:
-            voltFromAnemometer = read_bus_voltage(ina)
-            windSpeed, outOfScale = voltage_to_wind_speed(voltFromAnemometer, min_scale, max_scale)
-            print_wind_info(windSpeed, outOfScale)
+def _read_wind_speed():
+    return voltage_to_wind_speed(read_bus_voltage(ina), min_scale, max_scale)
 
-            # Store reading
-            try:
-                insert_record(db, time.time(), windSpeed, outOfScale)
-            except Exception:
-                pass
-
-            # Update latest record snapshot for Telegram
-            wind_state['latest_record'] = {
-                'timestamp': str(time.time()),
-                'windspeed': '' if windSpeed is None else str(windSpeed),
-                'outofscale': str(bool(outOfScale)),
-            }
-        else:
-            # INA missing: keep registering on DB (at a reduced rate) and retry init.
-            now = time.time()
-
-            if not reported_ina_missing:
-                next_ina_retry_ts = 0
-                next_ina_missing_log_ts = 0
-                reported_ina_missing = True
-
-            if now >= next_ina_missing_log_ts:
-                try:
-                    insert_record(db, now, None, True, message='ina_missing')
-                except Exception:
-                    pass
-                next_ina_missing_log_ts = now + INA_MISSING_LOG_INTERVAL_SEC
 
-                # Update latest record snapshot for Telegram
-                wind_state['latest_record'] = {
-                    'timestamp': str(now),
-                    'windspeed': '',
-                    'outofscale': 'True',
-                    'message': 'ina_missing',
-                }
+sampler = FastSampler(_read_wind_speed, rate_hz=SAMPLE_RATE_HZ)
 
-            if now >= next_ina_retry_ts:
-                ina = init_ina(addr=INA3221_ADDR)
-                next_ina_retry_ts = now + INA_RETRY_INTERVAL_SEC
 
-            time.sleep(1)
-            continue
+def _update_wind_metrics(ts, speed):
+    # Derived metrics from the in-RAM window; stored once per period.
+    rec = wind_metrics.add(ts, speed)
+    if rec is None:
+        return
+    wind_state['latest_metrics'] = rec
+    try:
+        metrics_db.insert(rec)
+    except Exception as e:
+        print('Failed to store wind metrics:', e)
 
-        time.sleep(1)
+
+def _store_second(sec):
+    windSpeed, outOfScale = sec['mean'], sec['oos']
+    print_wind_info(windSpeed, outOfScale)
+
+    # Store reading
+    try:
+        insert_record(db, sec['timestamp'], windSpeed, outOfScale,
+                      wind_min=sec['min'], wind_max=sec['max'], wind_std=sec['std'])
+    except Exception:
+        pass
+    _update_wind_metrics(sec['timestamp'], windSpeed)
+
+    # Update latest record snapshot for Telegram
+    wind_state['latest_record'] = {
+        'timestamp': sec['timestamp'],
+        'windspeed': windSpeed,
+        'outofscale': bool(outOfScale),
+    }
+    wind_state['sampling'] = {
+        'rate_hz': sampler.rate_hz,
+        'samples': sec['samples'],
+        'jitter_max_us': sec['jitter_max_us'],
+        'jitter_mean_us': sec['jitter_mean_us'],
+        'max_gap_us': sampler.max_gap_us,
+        'dropped': acquisition.ring.overruns if acquisition is not None else 0,
+    }
+
+
+acquisition = None
+if ACQUISITION_THREAD and ina is not None:
+    try:
+        acquisition = Acquisition(sampler)
+        acquisition.start()
+        print('Acquisition running on the second core')
+    except Exception as e:
+        print('Acquisition thread error, sampling inline:', e)
+        acquisition = None
+
+def _ina_missing_step():
+    # INA missing: keep registering on DB (at a reduced rate) and retry init.
+    global ina, reported_ina_missing, next_ina_retry_ts, next_ina_missing_log_ts
+    now = time.time()
+
+    _update_wind_metrics(now, None)
+
+    if not reported_ina_missing:
+        next_ina_retry_ts = 0
+        next_ina_missing_log_ts = 0
+        reported_ina_missing = True
+
+    if now >= next_ina_missing_log_ts:
+        try:
+            insert_record(db, now, None, True, message='ina_missing')
+        except Exception:
+            pass
+        next_ina_missing_log_ts = now + INA_MISSING_LOG_INTERVAL_SEC
+
+        # Update latest record snapshot for Telegram
+        wind_state['latest_record'] = {
+            'timestamp': now,
+            'windspeed': None,
+            'outofscale': True,
+            'message': 'ina_missing',
+        }
+
+    if now >= next_ina_retry_ts:
+        ina = init_ina(addr=INA3221_ADDR)
+        next_ina_retry_ts = now + INA_RETRY_INTERVAL_SEC
+        if ina is not None and runtime is not None:
+            # Sensor back: the runtime samples inline from now on.
+            runtime.sampler = sampler
+
+
+runtime = None
+if USE_ASYNCIO:
+    try:
+        from lib.wind_runtime import WindRuntime, asyncio
+        runtime = WindRuntime(
+            wind_state,
+            on_record=_store_second,
+            sampler=sampler if ina is not None else None,
+            acquisition=acquisition,
+            on_idle=_ina_missing_step,
+            db=db,
+            telegram_bot=telegram_bot,
+            ntp_sync=_sync_ntp if IS_PICO_W else None,
+            http_port=HTTP_PORT if IS_PICO_W else None,
+            retention=retention,
+            poll_s=ACQUISITION_POLL_SEC,
+            flush_s=DB_MAX_DELAY_SEC,
+            ntp_s=NTP_RESYNC_SEC,
+            retention_s=RETENTION_INTERVAL_SEC,
+        )
+    except Exception as e:
+        print('asyncio runtime unavailable, using the polling loop:', e)
+        runtime = None
+
+try:
+    if runtime is not None:
+        asyncio.run(runtime.run())
+    else:
+        next_retention_ts = time.time() + RETENTION_INTERVAL_SEC
+        while True:
+            if telegram_bot is not None:
+                telegram_bot.poll()
+
+            if time.time() >= next_retention_ts:
+                next_retention_ts = time.time() + RETENTION_INTERVAL_SEC
+                try:
+                    retention.step()
+                except Exception as e:
+                    print('Retention error:', e)
+
+            if acquisition is not None:
+                # Records come from the acquisition core; store what's queued.
+                sec = acquisition.get()
+                while sec is not None:
+                    _store_second(sec)
+                    sec = acquisition.get()
+                time.sleep(ACQUISITION_POLL_SEC)
+            elif ina is not None:
+                # Takes one second: SAMPLE_RATE_HZ reads reduced to one record.
+                _store_second(sampler.sample_second())
+            else:
+                _ina_missing_step()
+                time.sleep(1)
 
 except KeyboardInterrupt:
     print("Interrupted by user.")
+    if acquisition is not None:
+        acquisition.stop()
+        while True:
+            sec = acquisition.get()
+            if sec is None:
+                break
+            _store_second(sec)
+    try:
+        db.close()
+    except Exception:
+        pass
+    try:
+        if hasattr(metrics_db, 'close'):
+            metrics_db.close()
+    except Exception:
+        pass
     try:
         sd_fs.umount()
     except Exception:
@@ -0,0 +1,67 @@
+"""Host check: max sample gap with inline sampling vs the acquisition thread.
+
+Run from the repository root:  python test/bench_acquisition.py
+
+A fake 20 Hz sensor is sampled for a few seconds while the "main loop"
+stalls for STALL_S once (like a /csv24 export). Inline, the stall shows up
+as a sample gap; with the acquisition thread the gap stays near 50 ms and
+no record is lost.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.wind_acquisition import Acquisition  # noqa: E402
+from lib.wind_sampler import FastSampler  # noqa: E402
+
+RATE_HZ = 20
+SECONDS = 5
+STALL_S = 1.5
+
+
+def _fake_sensor():
+    return random.random() * 10, False
+
+
+def inline():
+    sampler = FastSampler(_fake_sensor, RATE_HZ)
+    records = 0
+    for i in range(SECONDS):
+        sampler.sample_second()
+        records += 1
+        if i == 1:
+            time.sleep(STALL_S)
+    return records, sampler.max_gap_us
+
+
+def threaded():
+    acq = Acquisition(FastSampler(_fake_sensor, RATE_HZ))
+    acq.start()
+    records = 0
+    start = time.time()
+    stalled = False
+    while time.time() - start < SECONDS + STALL_S:
+        while acq.get() is not None:
+            records += 1
+        if not stalled and time.time() - start > 1.5:
+            time.sleep(STALL_S)
+            stalled = True
+        time.sleep(0.2)
+    acq.stop()
+    while acq.get() is not None:
+        records += 1
+    return records, acq.max_gap_us, acq.ring.overruns
+
+
+def main():
+    records, gap = inline()
+    print('inline:   {} records, max sample gap {:.0f} ms'.format(records, gap / 1000))
+    records, gap, dropped = threaded()
+    print('threaded: {} records, max sample gap {:.0f} ms, dropped {}'.format(records, gap / 1000, dropped))
+
+
+if __name__ == '__main__':
+    main()
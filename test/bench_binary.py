@@ -0,0 +1,65 @@
+"""Host check: bytes per reading, binary records vs micro_py_database pages.
+
+Run from the repository root:  python test/bench_binary.py [rows]
+
+The same readings go to a BinaryTable and to the JSON-lines readings table
+(both through lib.wind_db.init_db) in a temporary directory. Prints bytes
+per row and the time of a newest-first scan of each, and asserts the binary
+file is at least MIN_RATIO times smaller.
+"""
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.wind_db import init_db, insert_record  # noqa: E402
+
+# The binary format is meant to be about 10x smaller.
+MIN_RATIO = 8
+
+
+def _fill(tbl, rows, start):
+    random.seed(1)
+    for i in range(rows):
+        insert_record(tbl, start + i, round(random.random() * 12, 2), i % 97 == 0,
+                      message='ina_missing' if i % 1000 == 5 else None)
+
+
+def _scan_ms(tbl):
+    t = time.perf_counter()
+    n = sum(1 for _ in tbl.scan_reverse())
+    return n, (time.perf_counter() - t) * 1000
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    tmp = tempfile.mkdtemp()
+    cwd = os.getcwd()
+    # lib.path joins relative paths, like on the device (cwd '/').
+    os.chdir(tmp)
+    try:
+        start = int(time.time()) - rows
+        binary = init_db(db_path='bin', engine='binary')
+        table = init_db(db_path='json', ring_rows=None)
+        _fill(binary, rows, start)
+        _fill(table, rows, start)
+        binary_size = os.stat(binary.filepath)[6]
+        table_size = table.stats()['Data_Size']
+        ratio = table_size / binary_size
+        for label, size, tbl in (('binary', binary_size, binary), ('json pages', table_size, table)):
+            n, ms = _scan_ms(tbl)
+            print('{:<11} {:>7.1f} bytes/row, scan of {} rows {:.0f} ms'.format(
+                label, size / rows, n, ms))
+        print('binary is {:.1f}x smaller'.format(ratio))
+        assert ratio >= MIN_RATIO, 'binary records only {:.1f}x smaller'.format(ratio)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Host benchmark: FileTable reopen-per-insert vs persistent handle.
+
+Run from the repository root:  python test/bench_filetable.py [rows]
+
+Inserts one reading per call (like the main loop does at 1 Hz) and reports
+inserts per second, bytes in the file and how many times the file was
+opened, i.e. the metadata commits the flash filesystem would do.
+"""
+import builtins
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.wind_db import FileTable  # noqa: E402
+
+BENCH_DIR = 'bench_filetable_data'
+
+
+def _run(label, rows, sync_interval_s):
+    if os.path.exists(BENCH_DIR):
+        shutil.rmtree(BENCH_DIR)
+    path = BENCH_DIR + '/readings.jsonl'
+    opens = [0]
+    real_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        if str(file).startswith(BENCH_DIR):
+            opens[0] += 1
+        return real_open(file, *args, **kwargs)
+
+    # Large segments: measure the write path only, not rollovers.
+    tbl = FileTable(path, segment_bytes=1 << 30, segment_by_day=False,
+                    sync_interval_s=sync_interval_s)
+    now = time.time()
+    builtins.open = counting_open
+    try:
+        start = time.perf_counter()
+        for i in range(rows):
+            tbl.insert({'timestamp': now + i, 'windspeed': 3.25, 'outofscale': False, 'message': None})
+        tbl.close()
+        elapsed = time.perf_counter() - start
+    finally:
+        builtins.open = real_open
+    size = os.stat(path).st_size
+    print('{:<22} {:>10.0f} ops/s {:>10} bytes {:>8} opens'.format(
+        label, rows / elapsed, size, opens[0]))
+    shutil.rmtree(BENCH_DIR)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    print('{} single-row inserts'.format(rows))
+    _run('reopen per insert', rows, None)
+    _run('persistent, sync 1s', rows, 1)
+    _run('persistent, sync 30s', rows, 30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Host check: BufferedTable keeps the records a failed flush didn't write.
+
+Run from the repository root:  python test/run_buffered_host.py
+
+Two failing tables behind a RollupTable and a BufferedTable, in a temporary
+directory: a FileTable whose file can't be opened (its insert() returns
+False) and a table that raises part way through a multi-row insert after
+writing some rows (like a multi-page micro_py_database insert). Asserts no
+record is lost or written twice and the rollup counts each one once.
+"""
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.wind_db import BufferedTable, FileTable  # noqa: E402
+from lib.wind_rollup import RollupTable  # noqa: E402
+
+RECORDS = 6
+
+
+class CountingRollup:
+    def __init__(self):
+        self.records = 0
+
+    def add_record(self, rec):
+        self.records += 1
+
+
+class PartialTable:
+    """Counts rows in current_row; the first insert raises after 3 rows."""
+
+    def __init__(self):
+        self.rows = []
+        self.fail = True
+
+    @property
+    def current_row(self):
+        return len(self.rows)
+
+    def insert(self, records):
+        for i, rec in enumerate(records):
+            if self.fail and i == 3:
+                self.fail = False
+                raise Exception('page write failed')
+            self.rows.append(rec)
+        return True
+
+
+def _fill(tbl):
+    for i in range(RECORDS):
+        tbl.insert({'timestamp': 1700000000 + i, 'windspeed': float(i)})
+
+
+def check_false_insert(tmp):
+    path = os.path.join(tmp, 'readings.jsonl')
+    # A directory in the way: every open() of the segment fails.
+    os.mkdir(path)
+    rollup = CountingRollup()
+    tbl = BufferedTable(RollupTable(FileTable(path), rollup), batch_size=100)
+    _fill(tbl)
+    assert tbl.flush() is False, 'failed flush reported as written'
+    assert tbl.pending() == RECORDS, 'pending records dropped: {}'.format(tbl.pending())
+    assert rollup.records == 0, 'rollup counted a failed batch'
+    os.rmdir(path)
+    assert tbl.flush() is True
+    with open(path) as f:
+        written = [json.loads(line)['windspeed'] for line in f]
+    assert written == [float(i) for i in range(RECORDS)], written
+    assert tbl.pending() == 0 and rollup.records == RECORDS
+    print('insert() returning False: {} records kept, then written once'.format(RECORDS))
+
+
+def check_partial_insert():
+    table = PartialTable()
+    rollup = CountingRollup()
+    tbl = BufferedTable(RollupTable(table, rollup), batch_size=100)
+    _fill(tbl)
+    assert tbl.flush() is False
+    assert tbl.pending() == RECORDS - 3, 'pending: {}'.format(tbl.pending())
+    assert rollup.records == 3, 'rollup: {}'.format(rollup.records)
+    assert tbl.flush() is True
+    assert [r['windspeed'] for r in table.rows] == [float(i) for i in range(RECORDS)]
+    assert rollup.records == RECORDS
+    print('insert() raising part way: 3 records written, the other {} retried'.format(RECORDS - 3))
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        check_false_insert(tmp)
+        check_partial_insert()
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
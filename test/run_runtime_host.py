@@ -0,0 +1,97 @@
+"""Host check: the asyncio runtime with stub hardware.
+
+Run from the repository root:  python test/run_runtime_host.py
+
+A fake 20 Hz sensor is sampled inline by `WindRuntime` into a FileTable in
+a temporary directory, next to a fake Telegram bot whose poll() blocks for
+a while now and then, and the HTTP task. After a few seconds the JSON
+status and a one hour chart are fetched over HTTP and the sampling
+figures are printed.
+"""
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.wind_db import BufferedTable, FileTable, insert_record  # noqa: E402
+from lib.wind_runtime import WindRuntime, asyncio  # noqa: E402
+from lib.wind_sampler import FastSampler  # noqa: E402
+
+RATE_HZ = 20
+SECONDS = 4
+HTTP_PORT = 8765
+
+
+def _fake_sensor():
+    return random.random() * 10, False
+
+
+class FakeBot:
+    def __init__(self):
+        self.polls = 0
+
+    def poll(self):
+        self.polls += 1
+        if self.polls % 5 == 0:
+            time.sleep(0.03)  # a short blocking HTTPS call
+
+
+async def _fetch_json(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write('GET {} HTTP/1.1\r\nHost: localhost\r\n\r\n'.format(path).encode())
+    await writer.drain()
+    data = await reader.read()
+    writer.close()
+    return json.loads(data.split(b'\r\n\r\n', 1)[1])
+
+
+async def _main(runtime):
+    task = asyncio.create_task(runtime.run(SECONDS))
+    await asyncio.sleep(SECONDS - 1)
+    status = await _fetch_json(HTTP_PORT, '/status')
+    chart = await _fetch_json(HTTP_PORT, '/chart?hours=1')
+    await task
+    return status, chart
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    try:
+        table = FileTable(os.path.join(tmp, 'readings.jsonl'))
+        db = BufferedTable(table, batch_size=10, max_delay_s=10, max_pending=60)
+        sampler = FastSampler(_fake_sensor, RATE_HZ)
+        state = {'latest_record': None, 'latest_metrics': None, 'sampling': None}
+        stored = []
+
+        def on_record(sec):
+            insert_record(db, sec['timestamp'], sec['mean'], sec['oos'],
+                          wind_min=sec['min'], wind_max=sec['max'], wind_std=sec['std'])
+            stored.append(sec)
+            state['latest_record'] = {'timestamp': sec['timestamp'], 'windspeed': sec['mean'],
+                                      'outofscale': sec['oos']}
+            state['sampling'] = {'samples': sec['samples'], 'jitter_max_us': sec['jitter_max_us'],
+                                 'max_gap_us': sampler.max_gap_us}
+
+        bot = FakeBot()
+        runtime = WindRuntime(state, on_record=on_record, sampler=sampler, db=db,
+                              telegram_bot=bot, http_port=HTTP_PORT, flush_s=1, telegram_s=0.1)
+        status, chart = asyncio.run(_main(runtime))
+        db.close()
+        print('records: {}, samples/s: {}, telegram polls: {}'.format(
+            len(stored), [s['samples'] for s in stored], bot.polls))
+        print('max sample gap {:.0f} ms, max jitter {:.0f} ms'.format(
+            sampler.max_gap_us / 1000, sampler.jitter_max_us / 1000))
+        print('http status:', status)
+        print('http chart summary:', chart['summary'], 'lttb points:', len(chart['lttb']))
+        print('task errors:', runtime.errors)
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()